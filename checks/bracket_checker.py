@@ -1,7 +1,7 @@
 """Checks related to single-elimination bracket assignments."""
 from collections import defaultdict
 from typing import Dict, List
-from models.player import players_by_start_number
+from models.team import FULL_COUNTRY
 
 
 def _match_half(match_index: int, number_of_matches: int) -> int:
@@ -82,7 +82,7 @@ def check_no_first_vs_first(matches: Dict[int, List]):
     return violations
 
 
-def check_country_balance_halves(matches: Dict[int, List], number_of_matches: int):
+def check_country_balance_halves(context, matches: Dict[int, List], number_of_matches: int):
     """Compute country counts per half and flag imbalances.
 
     Returns list of violations as tuples:
@@ -102,20 +102,19 @@ def check_country_balance_halves(matches: Dict[int, List], number_of_matches: in
         for p in participants:
             if p == "BYE" or p is None:
                 continue
+            if getattr(p, "start_number_b", None) is not None:
+                team = context.team_of(p)
+                counts[team.player_a.country_id][half] += 1
+                counts[team.player_b.country_id][half] += 1
+                is_doubles = True
+                if team.team_type == FULL_COUNTRY:
+                    full_team_counts[team.country_ids[0]][half] += 1
+                continue
             try:
-                a = players_by_start_number[p.start_number_a]
+                a = context.players_by_start_number[p.start_number_a]
             except Exception:
                 continue
-            counts[a.country][half] += 1
-            if getattr(p, "start_number_b", None) is not None:
-                b = players_by_start_number[p.start_number_b]
-                counts[b.country][half] += 1
-                is_doubles = True
-                try:
-                    if a.country == b.country:
-                        full_team_counts[a.country][half] += 1
-                except Exception:
-                    pass
+            counts[a.country_id][half] += 1
 
     allowed_diff = 2 if is_doubles else 1
 
@@ -132,11 +131,11 @@ def check_country_balance_halves(matches: Dict[int, List], number_of_matches: in
         # reduce violation by players that can be explained by full teams
         remaining_violation = violation_amount - full_team_players
         if remaining_violation > 0:
-            violations.append((country, c0, c1, remaining_violation))
+            violations.append((context.countries.names[country], c0, c1, remaining_violation))
     return violations
 
 
-def check_base_conflicts_first_round(matches: Dict[int, List]):
+def check_base_conflicts_first_round(context, matches: Dict[int, List]):
     """Return list of matches where both participants share the same base in first round."""
     violations = []
     for match_idx, participants in matches.items():
@@ -146,16 +145,16 @@ def check_base_conflicts_first_round(matches: Dict[int, List]):
         if a == "BYE" or b == "BYE":
             continue
         try:
-            pa = players_by_start_number[a.start_number_a]
-            pb = players_by_start_number[b.start_number_a]
+            pa = context.players_by_start_number[a.start_number_a]
+            pb = context.players_by_start_number[b.start_number_a]
         except Exception:
             continue
-        if pa.base and pb.base and pa.base == pb.base:
+        if pa.base_id is not None and pa.base_id == pb.base_id:
             violations.append((match_idx, pa.base, a, b))
     return violations
 
 
-def score_bracket(matches: Dict[int, List], number_of_matches: int, weights: Dict[str, int] = None):
+def score_bracket(context, matches: Dict[int, List], number_of_matches: int, weights: Dict[str, int] = None):
     """Return a weighted score for the bracket; lower is better."""
     if weights is None:
         weights = {"half_split": 150, "first_vs_first": 100, "country_half": 10, "base_first": 20}
@@ -163,9 +162,9 @@ def score_bracket(matches: Dict[int, List], number_of_matches: int, weights: Dic
     score = 0
     score += len(check_half_group_separation(matches, number_of_matches)) * weights.get("half_split", 50)
     score += len(check_no_first_vs_first(matches)) * weights.get("first_vs_first", 100)
-    country_violations = check_country_balance_halves(matches, number_of_matches)
+    country_violations = check_country_balance_halves(context, matches, number_of_matches)
     # country_violations entries are (country, c0, c1, violation_amount)
     country_violation_magnitude = sum(v[3] for v in country_violations) if country_violations else 0
     score += country_violation_magnitude * weights.get("country_half", 10)
-    score += len(check_base_conflicts_first_round(matches)) * weights.get("base_first", 20)
+    score += len(check_base_conflicts_first_round(context, matches)) * weights.get("base_first", 20)
     return score
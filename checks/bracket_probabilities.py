@@ -0,0 +1,104 @@
+"""Analytical meeting probabilities of a drawn single-elimination bracket.
+
+From the QTTR ratings of the participants, every match is decided with the expected score of the
+TTR formula, P(a beats b) = 1 / (1 + 10 ** ((qttr_b - qttr_a) / 150)). A dynamic program over the
+bracket tree then computes, round by round, the probability of every participant to reach each
+round and of every pair to meet in each round: two participants can only meet in the round in
+which their sub-brackets are joined, so
+
+    meet[r][i, j] = reach[r][i] * reach[r][j]                     (i, j in sibling sub-brackets)
+    reach[r + 1][i] = reach[r][i] * sum_j reach[r][j] * P(i beats j)
+
+which costs O(n^2) per round and O(n^2 log n) in total, instead of simulating thousands of
+tournaments. Byes never win; a participant whose opponents are all byes advances by walkover.
+"""
+# denominator of the TTR expected score
+QTTR_SCALE = 150
+
+
+def participant_strength(context, participant):
+    """QTTR of a single player, mean QTTR of the rated players of a team, None if nobody is rated."""
+    ratings = [context.players_by_start_number[sn].qttr for sn in (participant.start_number_a, participant.start_number_b) if sn is not None]
+    ratings = [rating for rating in ratings if rating is not None]
+    return sum(ratings) / len(ratings) if ratings else None
+
+
+class MeetingProbabilities:
+    """Result of meeting_probabilities, indexed by bracket slot (slot 2 * (match_no - 1) + side).
+
+    participants: participant of every slot, "BYE" or None for empty slots
+    reach: (rounds + 1, slots) array, reach[r][i] = probability that slot i plays in round r + 1
+           (reach[rounds] is the probability to win the bracket)
+    meet: (rounds, slots, slots) array, meet[r][i, j] = probability that i and j meet in round r + 1
+    """
+    __slots__ = ("participants", "reach", "meet")
+
+    def __init__(self, participants, reach, meet):
+        self.participants = participants
+        self.reach = reach
+        self.meet = meet
+
+    @property
+    def rounds(self) -> int:
+        return len(self.meet)
+
+    def slot_of(self, participant) -> int:
+        return next(i for i, p in enumerate(self.participants) if p is participant)
+
+    def meeting_probability(self, slot_a, slot_b) -> float:
+        """Probability that two slots meet in any round."""
+        return float(self.meet[:, slot_a, slot_b].sum())
+
+
+def win_probabilities(strengths, scale=QTTR_SCALE):
+    """Matrix P[i, j] = probability that i beats j; rows and columns of byes (NaN strengths) are 0."""
+    import numpy as np
+    strengths = np.asarray(strengths, dtype=float)
+    with np.errstate(invalid="ignore", over="ignore"):
+        p = 1.0 / (1.0 + 10.0 ** ((strengths[None, :] - strengths[:, None]) / scale))
+    return np.nan_to_num(p, nan=0.0)
+
+
+def meeting_probabilities(context, matches, strengths=None, scale=QTTR_SCALE) -> MeetingProbabilities:
+    """Compute the meeting probabilities of a bracket as drawn by draw_bracket (match_no -> [participant, participant]).
+
+    strengths maps slots to ratings (default: participant_strength); participants without a rating
+    get the median rating of the bracket, so that they are neither favorites nor outsiders.
+    """
+    import numpy as np
+    participants = []
+    for match_no in sorted(matches):
+        pair = list(matches[match_no]) + [None] * (2 - len(matches[match_no]))
+        participants.extend(pair)
+    slots = len(participants)
+    if slots < 2 or slots & (slots - 1):
+        raise ValueError("the number of bracket slots must be a power of two >= 2")
+    present = np.array([p is not None and p != "BYE" for p in participants])
+    if strengths is None:
+        strengths = [participant_strength(context, p) if present[i] else None for i, p in enumerate(participants)]
+    rated = [s for i, s in enumerate(strengths) if present[i] and s is not None]
+    default = float(np.median(rated)) if rated else 0.0
+    values = np.array([(s if s is not None else default) if present[i] else np.nan for i, s in enumerate(strengths)], dtype=float)
+    beats = win_probabilities(values, scale)
+
+    rounds = slots.bit_length() - 1
+    index = np.arange(slots)
+    reach = np.zeros((rounds + 1, slots))
+    reach[0] = present
+    meet = np.zeros((rounds, slots, slots))
+    for r in range(rounds):
+        block = 1 << r
+        # slots of the sibling sub-bracket: same block of 2 * block, other half of it
+        sibling = ((index[:, None] // (2 * block)) == (index[None, :] // (2 * block))) & ((index[:, None] // block) != (index[None, :] // block))
+        current = reach[r]
+        meet[r] = np.outer(current, current) * sibling
+        arriving = sibling @ current  # probability that any opponent arrives
+        reach[r + 1] = current * ((beats * sibling) @ current + (1.0 - arriving))
+    return MeetingProbabilities(participants, reach, meet)
+
+
+def expected_meetings(probabilities, pairs, rounds=None):
+    """Expected number of meetings of the slot pairs marked in the boolean (slots, slots) matrix pairs
+    within the first `rounds` rounds (default: all), e.g. to compare candidate brackets."""
+    meet = probabilities.meet[:rounds] if rounds is not None else probabilities.meet
+    return float(meet[:, pairs].sum()) / 2
@@ -1,8 +1,8 @@
 """Checks related to group assignments in competitions."""
 from collections import defaultdict
-from models.player import players_by_start_number
+from models.team import FULL_COUNTRY, HALF_COUNTRY
 
-def check_country_distribution(competition, groups):
+def check_country_distribution(context, competition, groups):
 	"""
 	For each country, ensure the difference between the group with the most and least participants is at most 1.
 	Returns a list of (competition_class, country, max_count, min_count, group_counts) for violations.
@@ -10,34 +10,34 @@ def check_country_distribution(competition, groups):
 	violations = []
 	all_group_nos = set(groups.keys())
 	# Build country counts per group
-	country_group_counts = defaultdict(lambda: defaultdict(int))  # country -> group_no -> count
+	country_group_counts = defaultdict(lambda: defaultdict(int))  # country id -> group_no -> count
 	for group_no, members in groups.items():
 		for member in members:
 			# Ignore empty slots
 			if member.start_number_a is None or member.start_number_a == "EMPTY":
 				continue
 			# Single or team
-			a = players_by_start_number[member.start_number_a]
-			country_group_counts[a.country][group_no] += 1
+			a = context.players_by_start_number[member.start_number_a]
+			country_group_counts[a.country_id][group_no] += 1
 			if member.start_number_b is not None:
-				b = players_by_start_number[member.start_number_b]
-				country_group_counts[b.country][group_no] += 1
+				b = context.players_by_start_number[member.start_number_b]
+				country_group_counts[b.country_id][group_no] += 1
 	# Determine allowed difference
 	if competition in ('D', 'M'):
 		allowed_diff = 2
 	else:
 		allowed_diff = 1
 	# For each country, check max-min <= allowed_diff, including groups with 0
-	for country, group_counts in country_group_counts.items():
+	for country_id, group_counts in country_group_counts.items():
 		# Fill in zeros for groups where country is not present
 		counts = [group_counts.get(group_no, 0) for group_no in all_group_nos]
 		if not counts:
 			continue
 		if max(counts) - min(counts) > allowed_diff:
-			violations.append((country, max(counts), min(counts), dict((g, group_counts.get(g, 0)) for g in all_group_nos)))
+			violations.append((context.countries.names[country_id], max(counts), min(counts), dict((g, group_counts.get(g, 0)) for g in all_group_nos)))
 	return violations
 
-def check_base_uniqueness(groups):
+def check_base_uniqueness(context, groups):
 	"""
 	Ensure no two opponents in a group have the same base.
 	Returns a list of (competition_class, group_no, base, count) for violations.
@@ -51,25 +51,22 @@ def check_base_uniqueness(groups):
 			# Ignore empty slots
 			if member.start_number_a is None or member.start_number_a == "EMPTY":
 				continue
-			# For a team, collect all unique bases in the team
-			bases = set()
-			a = players_by_start_number[member.start_number_a]
-			if a.base is not None and a.base != "None":
-				bases.add(a.base)
+			# For a team, use all unique bases in the team
 			if member.start_number_b is not None:
-				b = players_by_start_number[member.start_number_b]
-				if b.base is not None and b.base != "None":
-					bases.add(b.base)
-			for base in bases:
+				member_bases = context.team_of(member).base_ids
+			else:
+				base_id = context.players_by_start_number[member.start_number_a].base_id
+				member_bases = (base_id,) if base_id is not None else ()
+			for base in member_bases:
 				if base not in base_to_teams:
 					base_to_teams[base] = []
 				base_to_teams[base].append(member)
 		for base, team_list in base_to_teams.items():
 			if len(team_list) > 1:
-				violations.append((group_no, base, len(team_list)))
+				violations.append((group_no, context.bases.names[base], len(team_list)))
 	return violations
 
-def get_qttr_violations(groups):
+def get_qttr_violations(context, groups):
 	"""
 	Check for violations in the distribution of players without a QTTR rating across groups (singles only).
 	Returns a list of (competition_class, group_no, count_no_qttr) for groups with players lacking QTTR, only if the distribution is unbalanced.
@@ -82,7 +79,7 @@ def get_qttr_violations(groups):
 		for member in members:
 			if member.start_number_a is None or member.start_number_a == "EMPTY":
 				continue
-			a = players_by_start_number[member.start_number_a]
+			a = context.players_by_start_number[member.start_number_a]
 			if a.qttr is None or a.qttr == "" or a.qttr == "None":
 				count_no_qttr += 1
 		no_qttr_counts[group_no] = count_no_qttr
@@ -95,7 +92,7 @@ def get_qttr_violations(groups):
 					violations.append((group_no, count, no_qttr_counts))
 	return violations
 
-def check_team_country_distribution(groups):
+def check_team_country_distribution(context, groups):
 	"""
 	For doubles/mixed: Checks that full-country teams (e.g. <Germany, Germany>) and half-country teams (e.g. <Germany, Other>) are evenly distributed across groups.
 	Returns a list of violations: (competition_class, team_type, country, min_count, max_count, group_counts)
@@ -110,11 +107,10 @@ def check_team_country_distribution(groups):
 		for member in members:
 			if member.start_number_a is None or member.start_number_a == "EMPTY" or member.start_number_b is None:
 				continue
-			a = players_by_start_number[member.start_number_a]
-			b = players_by_start_number[member.start_number_b]
-			if a.country == b.country:
+			team = context.team_of(member)
+			if team.team_type == FULL_COUNTRY:
 				# Full-country team
-				country = a.country
+				country = team.country_ids[0]
 				if country not in full_country_counts:
 					full_country_counts[country] = {}
 				if group_no not in full_country_counts[country]:
@@ -122,7 +118,7 @@ def check_team_country_distribution(groups):
 				full_country_counts[country][group_no] += 1
 			else:
 				# Half-country teams: count for each country
-				for country in (a.country, b.country):
+				for country in team.country_ids:
 					if country not in half_country_counts:
 						half_country_counts[country] = {}
 					if group_no not in half_country_counts[country]:
@@ -135,7 +131,7 @@ def check_team_country_distribution(groups):
 			min_count = min(counts)
 			max_count = max(counts)
 			if max_count > min_count + 1:
-				violations.append(("full-country", country, min_count, max_count, dict(group_counts)))
+				violations.append((FULL_COUNTRY, context.countries.names[country], min_count, max_count, dict(group_counts)))
 	# Check for violations in half-country teams
 	for country, group_counts in half_country_counts.items():
 		counts = [group_counts.get(group_no, 0) for group_no in groups.keys()]
@@ -143,5 +139,103 @@ def check_team_country_distribution(groups):
 			min_count = min(counts)
 			max_count = max(counts)
 			if max_count > min_count + 1:
-				violations.append(("half-country", country, min_count, max_count, dict(group_counts)))
-	return violations
\ No newline at end of file
+				violations.append((HALF_COUNTRY, context.countries.names[country], min_count, max_count, dict(group_counts)))
+	return violations
+
+class GroupViolationCounts:
+	"""
+	Number of violations per rule of a group assignment, updated in place when two members swap groups.
+	Counts exactly what the checks above report, but a swap only updates the counts of the countries,
+	bases and groups of the two swapped members instead of checking all groups again.
+	"""
+	def __init__(self, context, competition, groups):
+		self.context = context
+		self.allowed_diff = 2 if competition in ('D', 'M') else 1
+		self.check_qttr = competition == 'S'
+		self.check_teams = competition in ('D', 'M')
+		self.group_index = {group_no: i for i, group_no in enumerate(groups)}
+		group_count = len(groups)
+		self.country_counts = defaultdict(lambda: [0] * group_count)  # country id -> count per group
+		self.base_counts = [defaultdict(int) for _ in range(group_count)]  # per group: base id -> members
+		self.no_qttr_counts = [0] * group_count
+		self.team_counts = defaultdict(lambda: [0] * group_count)  # (team type, country id) -> count per group
+		self.contributions = {}
+		self.country = 0
+		self.base = 0
+		self.team_country = 0
+		for group_no, members in groups.items():
+			for member in members:
+				self._add(member, self.group_index[group_no], 1)
+
+	def _contribution(self, member):
+		"""(country ids, base ids, lacks QTTR, team country keys) of a member, empty for empty slots."""
+		contribution = self.contributions.get(id(member))
+		if contribution is not None:
+			return contribution
+		if member.start_number_a is None or member.start_number_a == "EMPTY":
+			contribution = ((), (), False, ())
+		else:
+			players = self.context.players_by_start_number
+			a = players[member.start_number_a]
+			if member.start_number_b is not None:
+				team = self.context.team_of(member)
+				countries = (a.country_id, players[member.start_number_b].country_id)
+				bases = tuple(team.base_ids)
+				team_keys = ((team.team_type, team.country_ids[0]),) if team.team_type == FULL_COUNTRY else tuple((HALF_COUNTRY, c) for c in team.country_ids)
+			else:
+				countries = (a.country_id,)
+				bases = (a.base_id,) if a.base_id is not None else ()
+				team_keys = ()
+			contribution = (countries, bases, a.qttr is None or a.qttr == "" or a.qttr == "None", team_keys if self.check_teams else ())
+		self.contributions[id(member)] = contribution
+		return contribution
+
+	def _add(self, member, group, amount):
+		countries, bases, no_qttr, team_keys = self._contribution(member)
+		for country in countries:
+			counts = self.country_counts[country]
+			before = max(counts) - min(counts) > self.allowed_diff
+			counts[group] += amount
+			self.country += (max(counts) - min(counts) > self.allowed_diff) - before
+		base_counts = self.base_counts[group]
+		for base in bases:
+			before = base_counts[base] > 1
+			base_counts[base] += amount
+			self.base += (base_counts[base] > 1) - before
+		if no_qttr:
+			self.no_qttr_counts[group] += amount
+		for key in team_keys:
+			counts = self.team_counts[key]
+			before = max(counts) - min(counts) > 1
+			counts[group] += amount
+			self.team_country += (max(counts) - min(counts) > 1) - before
+
+	def add(self, member, group_no):
+		"""Update the counts after member was placed into group_no."""
+		self._add(member, self.group_index[group_no], 1)
+
+	def remove(self, member, group_no):
+		"""Update the counts after member was taken out of group_no."""
+		self._add(member, self.group_index[group_no], -1)
+
+	def swap(self, member_1, group_no_1, member_2, group_no_2):
+		"""Update the counts after member_1 moved from group_no_1 to group_no_2 and member_2 the other way."""
+		group_1 = self.group_index[group_no_1]
+		group_2 = self.group_index[group_no_2]
+		self._add(member_1, group_1, -1)
+		self._add(member_1, group_2, 1)
+		self._add(member_2, group_2, -1)
+		self._add(member_2, group_1, 1)
+
+	@property
+	def qttr(self):
+		if not self.check_qttr:
+			return 0
+		min_count = min(self.no_qttr_counts)
+		if max(self.no_qttr_counts) <= min_count + 1:
+			return 0
+		return sum(1 for count in self.no_qttr_counts if count > min_count + 1)
+
+	def counts(self):
+		"""Number of violations per rule, like the lengths of the lists of get_violations."""
+		return {"country": self.country, "base": self.base, "qttr": self.qttr, "team_country": self.team_country}
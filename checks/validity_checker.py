@@ -1,18 +1,17 @@
 import logging
-from models.player import players_by_start_number
-from models.player import players_list
 
-def check_all_players_only_exist_once() -> set:
-    """Check that all players only exist once in players_list and populate players_by_start_number."""
+def check_all_players_only_exist_once(context) -> set:
+    """Check that all players only exist once in the player list and populate players_by_start_number."""
     wrongful_player_data = []
-    for player in players_list:
+    players_by_start_number = context.players_by_start_number
+    for player in context.players_list:
         if player.start_number in players_by_start_number:
             wrongful_player_data.append(player.start_number)
         else:
             players_by_start_number[player.start_number] = player
     return set(wrongful_player_data)
 
-def find_missing_players(draw_data) -> set:
+def find_missing_players(context, draw_data) -> set:
     """Find players that are referenced in draw_data but not in players_by_start_number."""
     # collect both start_number_a and start_number_b from draw_data
     referenced_players = {
@@ -23,11 +22,11 @@ def find_missing_players(draw_data) -> set:
     }
 
     # check missing players
-    all_players = set(players_by_start_number.keys())
+    all_players = set(context.players_by_start_number.keys())
     missing_players = referenced_players - all_players
     return missing_players
 
-def find_players_not_in_draw_data(draw_data) -> set:
+def find_players_not_in_draw_data(context, draw_data) -> set:
     """Find players that are in players_by_start_number but not referenced in draw_data."""
     # collect both start_number_a and start_number_b from draw_data
     referenced_players = {
@@ -37,15 +36,15 @@ def find_players_not_in_draw_data(draw_data) -> set:
         if num is not None
     }
 
-    all_players = set(players_by_start_number.keys())
+    all_players = set(context.players_by_start_number.keys())
     extra_references = referenced_players - all_players
     return extra_references
 
 
-def find_players_in_wrong_competition(draw_data) -> list:
+def find_players_in_wrong_competition(context, draw_data) -> list:
     """Check if all players are in the correct competition based on their gender."""
-    female_players = set({start_number: player for start_number, player in players_by_start_number.items() if player.gender == 'F'})
-    male_players = set({start_number: player for start_number, player in players_by_start_number.items() if player.gender == 'M'})
+    female_players = set({start_number: player for start_number, player in context.players_by_start_number.items() if player.gender == 'F'})
+    male_players = set({start_number: player for start_number, player in context.players_by_start_number.items() if player.gender == 'M'})
 
     female_competitions = [row for row in draw_data if 'W' in row.competition_class]
     male_competitions   = [row for row in draw_data if 'M' in row.competition_class]
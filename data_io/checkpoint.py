@@ -0,0 +1,105 @@
+"""Checkpoints of a running draw, used to resume after a crash or interruption.
+
+Every finished class result (groups or brackets, including snapshots) is written atomically to
+its own file. Every class is drawn with its own seed derived from the configuration, so resumed
+classes need no random state. A checkpoint directory belongs to exactly one run, identified by a
+fingerprint of the input files, the player ratings and the configuration; checkpoints of a
+different run are never resumed.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+from data_io.file_utils import write_atomic
+from data_io.input_cache import input_fingerprint
+from misc.config import config
+
+RUN_ID_FILE = "run.id"
+
+
+def run_fingerprint(context) -> str:
+    """Hash the input files, the player ratings and the complete configuration of the current run.
+
+    Players read from the player database are identified by the fingerprint of their import,
+    as the players file may have been removed after it was imported. The ratings are those in
+    effect after the ratings refresh, which may differ from the input files.
+    """
+    input_paths = [config["files"]["draw_data_path"]]
+    if context.players_fingerprint is None:
+        input_paths.insert(0, config["files"]["players_path"])
+    results_path = config["files"].get("group_results_path", "")
+    if results_path and os.path.exists(results_path):
+        # brackets can be drawn from the group standings
+        input_paths.append(results_path)
+    digest = hashlib.sha256(input_fingerprint(*input_paths).encode())
+    if context.players_fingerprint is not None:
+        digest.update(f"|players:{context.players_fingerprint}".encode())
+    for start_number, player in sorted(context.players_by_start_number.items()):
+        digest.update(f"|qttr:{start_number}={player.qttr}".encode())
+    for section in config.sections():
+        for option, value in sorted(config[section].items()):
+            digest.update(f"|{section}.{option}={value}".encode())
+    return digest.hexdigest()
+
+
+def has_resumable_checkpoints(context) -> bool:
+    """Whether finished classes of the current run are checkpointed, so --resume can continue its draw."""
+    directory = config.get("files", "checkpoint_path", fallback="")
+    if not directory:
+        return False
+    try:
+        with open(os.path.join(directory, RUN_ID_FILE), "rb") as file:
+            stored = file.read().decode()
+        if not any(name.endswith(".checkpoint") for name in os.listdir(directory)):
+            return False
+        return stored == run_fingerprint(context)
+    except (OSError, KeyError, UnicodeDecodeError):
+        return False
+
+
+class RunCheckpoint:
+    """Directory of per-class checkpoints belonging to one run."""
+    def __init__(self, directory, fingerprint, resume=False):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.resumed = resume and self._stored_fingerprint() == fingerprint
+        if resume and not self.resumed:
+            logging.warning("No checkpoint of an identical run found in %s - starting from scratch", directory)
+        if not self.resumed:
+            self.clear()
+            write_atomic(os.path.join(directory, RUN_ID_FILE), fingerprint.encode())
+
+    def _stored_fingerprint(self):
+        try:
+            with open(os.path.join(self.directory, RUN_ID_FILE), "rb") as file:
+                return file.read().decode()
+        except OSError:
+            return None
+
+    def _path(self, stage, competition, competition_class):
+        return os.path.join(self.directory, f"{competition}_{competition_class}_{stage}.checkpoint")
+
+    def load(self, stage, competition, competition_class):
+        """Return the result of a class finished earlier in this run, or None."""
+        if not self.resumed:
+            return None
+        path = self._path(stage, competition, competition_class)
+        try:
+            with open(path, "rb") as file:
+                checkpoint = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logging.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+            return None
+        return checkpoint["result"]
+
+    def save(self, stage, competition, competition_class, result):
+        """Atomically persist the result of a finished class."""
+        data = pickle.dumps({"result": result}, protocol=pickle.HIGHEST_PROTOCOL)
+        write_atomic(self._path(stage, competition, competition_class), data)
+
+    def clear(self):
+        """Remove all checkpoints, e.g. after the run completed successfully."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,31 @@
+"""Helpers for writing files to disk safely."""
+import os
+import tempfile
+
+
+def write_atomic(file_path, data: bytes):
+    """Write data to file_path atomically by writing a temporary file and renaming it into place.
+
+    Readers either see the previous file content or the complete new content, never a partial write.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(file_path))
+    try:
+        os.chmod(tmp_path, 0o666 & ~_current_umask())
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _current_umask() -> int:
+    """Return the process umask (mkstemp always creates files readable by the owner only)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
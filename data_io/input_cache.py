@@ -0,0 +1,47 @@
+"""Binary cache for parsed and validated input tables.
+
+The cache file starts with a short text header holding a fingerprint of the input files'
+contents and the reader version, followed by the pickled tables. A cache whose fingerprint
+does not match the current input files is ignored and rebuilt on the next successful import.
+"""
+import hashlib
+import logging
+import os
+import pickle
+from data_io.file_utils import write_atomic
+from data_io.input_reader import READER_VERSION
+
+CACHE_MAGIC = b"HLINPUT1"
+
+
+def input_fingerprint(*file_paths) -> str:
+    """Hash the reader version and the contents of all given input files."""
+    digest = hashlib.sha256(f"reader:{READER_VERSION}".encode())
+    for file_path in file_paths:
+        digest.update(b"\0" + os.path.basename(file_path).encode() + b"\0")
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_input_cache(cache_path, fingerprint):
+    """Return the cached tables if the cache exists and matches fingerprint, otherwise None."""
+    try:
+        with open(cache_path, "rb") as file:
+            header = file.readline().rstrip(b"\n")
+            if header != CACHE_MAGIC + b" " + fingerprint.encode():
+                logging.debug("Input cache %s is stale", cache_path)
+                return None
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logging.warning("Ignoring unreadable input cache %s: %s", cache_path, e)
+        return None
+
+
+def store_input_cache(cache_path, fingerprint, tables: dict):
+    """Persist the parsed and validated tables for the given fingerprint."""
+    header = CACHE_MAGIC + b" " + fingerprint.encode() + b"\n"
+    write_atomic(cache_path, header + pickle.dumps(tables, protocol=pickle.HIGHEST_PROTOCOL))
@@ -1,25 +1,274 @@
+"""Module for reading player and draw data from CSV input files.
+
+Rows are parsed with the `csv` module and yielded lazily as typed model objects, so even
+federation-sized player files are read in bounded memory. Malformed rows do not stop the
+read: all of them are collected with their line numbers and reported together in a single
+`InputFormatError` once the file has been consumed.
+"""
+import csv
+from functools import partial
+from typing import Iterator
 from models.player import Player
 from models.draw_data import DrawDataRow
+from models.group_result import GroupMatchResult
 from misc.config import config
 
-def read_draw_data() -> list[DrawDataRow]:
-    """Read draw data from the specified CSV file and return a list of DrawDataRow objects."""
-    draw_data_file_path = config["files"]["draw_data_path"]
-    with open(draw_data_file_path, "r", encoding="utf-8") as file:
-        lines = file.readlines()
-        draw_data = []
-        for line in lines[1:]:
-            competition, competition_class, amount_of_groups, seeding, group_no, group_pos, main_round, consolation_round, start_number_a, start_number_b = line.strip().split(";")
-            draw_data.append(DrawDataRow(competition=competition, competition_class=competition_class, seeding=seeding, amount_of_groups=amount_of_groups, group_no=group_no, group_pos=group_pos, main_round=bool(main_round), consolation_round=bool(consolation_round), start_number_a=start_number_a, start_number_b=start_number_b))
-        return draw_data
-
-def read_players() -> list[Player]:
-    """Read player data from the specified CSV file and return a list of Player objects."""
-    player_file_path = config["files"]["players_path"]
-    with open(player_file_path, "r", encoding="utf-8") as file:
-        lines = file.readlines()
-        players = []
-        for line in lines[1:]:
-            start_number, last_name, first_name, country, base, gender, qttr = line.strip().split(";")
-            players.append(Player(start_number=start_number, first_name=first_name, last_name=last_name, country=country, base=base, gender=gender, qttr=qttr))
-        return players
+# bump whenever parsing changes, so that cached input tables are rebuilt
+READER_VERSION = 7
+
+PLAYER_COLUMNS = ("start_number", "last_name", "first_name", "country", "base", "gender", "qttr")
+DRAW_DATA_COLUMNS = ("S_D_M", "class", "#groups", "seeding", "group_no", "group_pos", "for_main_round", "for_consolation", "startnumber_A", "startnumber_B")
+GROUP_RESULT_COLUMNS = ("S_D_M", "class", "group_no", "startnumber_1", "startnumber_2", "result")
+# columns read from a previous output.csv or a draw input draft to warm-start the group draw
+GROUP_ASSIGNMENT_COLUMNS = ("S_D_M", "class", "group_no", "group_pos", "startnumber_A", "startnumber_B")
+
+TRUE_VALUES = {"1", "true", "yes", "y", "x", "ja", "j"}
+FALSE_VALUES = {"", "0", "false", "no", "n", "nein"}
+
+
+class InputFormatError(ValueError):
+    """Raised after a complete pass over an input file if one or more rows were malformed."""
+    def __init__(self, file_path, errors: list[tuple[int, str]]):
+        self.file_path = file_path
+        self.errors = errors  # list of (line_number, message)
+        super().__init__(f"{len(errors)} malformed row(s) in {file_path}")
+
+    def __str__(self):
+        lines = [super().__str__()]
+        lines.extend(f"  line {line_number}: {message}" for line_number, message in self.errors)
+        return "\n".join(lines)
+
+
+def parse_bool(value: str) -> bool:
+    """Parse a boolean input cell. Empty cells are False, anything unknown is an error."""
+    normalized = value.strip().lower()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid boolean value {value!r}")
+
+
+def parse_optional_int(value: str, column: str):
+    """Parse an integer input cell, returning None for empty cells."""
+    value = value.strip()
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"invalid integer {value!r} in column {column}") from None
+
+
+def parse_int(value: str, column: str) -> int:
+    """Parse a mandatory integer input cell."""
+    parsed = parse_optional_int(value, column)
+    if parsed is None:
+        raise ValueError(f"missing value in column {column}")
+    return parsed
+
+
+def _normalize_row(row: list[str], columns: tuple) -> list[str]:
+    """Strip surrounding whitespace and trailing empty cells and check the column count."""
+    cells = [cell.strip() for cell in row]
+    while len(cells) > len(columns) and cells[-1] == "":
+        cells.pop()
+    if len(cells) != len(columns):
+        raise ValueError(f"expected {len(columns)} columns, got {len(cells)}")
+    return cells
+
+
+def _iter_rows(file_path, parse_row, with_line_numbers=False) -> Iterator:
+    """Yield parsed rows of a semicolon separated file, collecting errors for a final report.
+
+    With with_line_numbers, (line number, row) pairs are yielded.
+    """
+    errors = []
+    with open(file_path, "r", newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file, delimiter=";")
+        next(reader, None)  # header
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                record = parse_row(row)
+            except ValueError as e:
+                errors.append((reader.line_num, str(e)))
+                continue
+            yield (reader.line_num, record) if with_line_numbers else record
+    if errors:
+        raise InputFormatError(file_path, errors)
+
+
+def _player_values_from_row(row: list[str]) -> tuple:
+    """Typed cells of a player row, in the order of PLAYER_COLUMNS."""
+    start_number, last_name, first_name, country, base, gender, qttr = _normalize_row(row, PLAYER_COLUMNS)
+    return parse_int(start_number, "start_number"), last_name, first_name, country, base, gender, parse_optional_int(qttr, "qttr")
+
+
+def _player_from_row(context, row: list[str]) -> Player:
+    start_number, last_name, first_name, country, base, gender, qttr = _player_values_from_row(row)
+    return Player(
+        start_number=start_number,
+        first_name=first_name,
+        last_name=last_name,
+        country=country,
+        base=base,
+        gender=gender,
+        qttr=qttr,
+        context=context,
+    )
+
+
+def _draw_data_row_from_row(row: list[str]) -> DrawDataRow:
+    competition, competition_class, amount_of_groups, seeding, group_no, group_pos, main_round, consolation_round, start_number_a, start_number_b = _normalize_row(row, DRAW_DATA_COLUMNS)
+    if competition not in ("S", "D", "M"):
+        raise ValueError(f"invalid competition {competition!r}")
+    return DrawDataRow(
+        competition=competition,
+        competition_class=competition_class,
+        seeding=parse_optional_int(seeding, "seeding"),
+        amount_of_groups=parse_optional_int(amount_of_groups, "#groups"),
+        group_no=parse_optional_int(group_no, "group_no"),
+        group_pos=parse_optional_int(group_pos, "group_pos"),
+        main_round=parse_bool(main_round),
+        consolation_round=parse_bool(consolation_round),
+        start_number_a=parse_int(start_number_a, "startnumber_A"),
+        start_number_b=parse_optional_int(start_number_b, "startnumber_B"),
+    )
+
+
+def parse_games(value: str) -> list[tuple[int, int]]:
+    """Parse the games of a match result like "11:7 9:11 11:5 11:3" (separated by spaces or commas)."""
+    games = []
+    for game in value.replace(",", " ").split():
+        points = game.split(":")
+        if len(points) != 2 or not all(p.strip().isdigit() for p in points):
+            raise ValueError(f"invalid game score {game!r}")
+        a, b = int(points[0]), int(points[1])
+        if a == b:
+            raise ValueError(f"game {game!r} has no winner")
+        games.append((a, b))
+    if not games:
+        raise ValueError("missing result")
+    if sum(a > b for a, b in games) == sum(a < b for a, b in games):
+        raise ValueError(f"result {value!r} has no winner")
+    return games
+
+
+def _group_result_from_row(row: list[str]) -> GroupMatchResult:
+    competition, competition_class, group_no, start_number_1, start_number_2, result = _normalize_row(row, GROUP_RESULT_COLUMNS)
+    if competition not in ("S", "D", "M"):
+        raise ValueError(f"invalid competition {competition!r}")
+    start_number_1 = parse_int(start_number_1, "startnumber_1")
+    start_number_2 = parse_int(start_number_2, "startnumber_2")
+    if result.lower().startswith("wo"):
+        # walkover: "wo <start number of the absent participant>"
+        absent = parse_int(result[2:].strip(" :"), "result")
+        if absent not in (start_number_1, start_number_2):
+            raise ValueError(f"absent participant {absent} does not play in this match")
+        return GroupMatchResult(competition, competition_class, parse_int(group_no, "group_no"), start_number_1, start_number_2, absent=absent)
+    return GroupMatchResult(competition, competition_class, parse_int(group_no, "group_no"), start_number_1, start_number_2, games=parse_games(result))
+
+
+def iter_group_results(file_path=None) -> Iterator[GroupMatchResult]:
+    """Lazily yield GroupMatchResult objects from the group results CSV file."""
+    return _iter_rows(file_path or config["files"]["group_results_path"], _group_result_from_row)
+
+
+def iter_draw_data(file_path=None) -> Iterator[DrawDataRow]:
+    """Lazily yield DrawDataRow objects from the draw data CSV file."""
+    return _iter_rows(file_path or config["files"]["draw_data_path"], _draw_data_row_from_row)
+
+
+def iter_players(context, file_path=None) -> Iterator[Player]:
+    """Lazily yield Player objects from the player CSV file, registering them in context."""
+    return _iter_rows(file_path or config["files"]["players_path"], partial(_player_from_row, context))
+
+
+def iter_player_values(file_path=None) -> Iterator[tuple]:
+    """Lazily yield (line number, typed cells) of the rows of the player CSV file, without creating players."""
+    return _iter_rows(file_path or config["files"]["players_path"], _player_values_from_row, with_line_numbers=True)
+
+
+def _player_database_path():
+    """Path of the configured player database, empty if the players are read from the CSV file."""
+    return config["files"].get("player_database_path", "")
+
+
+def _read_through_player_database(context) -> list[Player]:
+    """Read the players and the draw data of the context through the player database, opened once.
+
+    The players file is imported when it changed and the draw input is imported once; the draw rows
+    are stored in the context and only the players they reference are returned.
+    """
+    # sqlite3 is only imported when the database is used
+    from data_io.player_database import open_player_database
+    database = open_player_database(_player_database_path(), config["files"]["players_path"])
+    try:
+        draw_input = database.import_draw_input(config["files"]["draw_data_path"])
+        players = list(database.iter_referenced_players(context, draw_input))
+        context.draw_data = list(database.iter_draw_data(draw_input))
+        context.players_fingerprint = database.players_fingerprint()
+    finally:
+        database.close()
+    return players
+
+
+def read_draw_data(context) -> list[DrawDataRow]:
+    """Read draw data from the specified CSV file into the draw data of the context and return it.
+
+    With a player database, the draw input is imported together with the players by read_players.
+    """
+    if not _player_database_path():
+        context.draw_data = list(iter_draw_data())
+    elif context.players_fingerprint is None:
+        _read_through_player_database(context)
+    return context.draw_data
+
+
+def read_players(context) -> list[Player]:
+    """Read player data from the specified CSV file and return a list of Player objects.
+
+    With a player database, the players file is imported into the database when it changed and
+    only the players referenced by the draw input are read; the draw data is read along with them.
+    Missing or malformed draw input is reported by this step then.
+    """
+    if not _player_database_path():
+        return list(iter_players(context))
+    return _read_through_player_database(context)
+
+
+def read_group_assignments(file_path) -> dict:
+    """Read the group of every participant from a previous output.csv or a draw input draft.
+
+    Only the columns of GROUP_ASSIGNMENT_COLUMNS are used, found by their header; rows without a
+    group number and bracket rows (with a group position or draw number) are skipped.
+    Returns (competition, competition_class) -> {(start number A, start number B): group_no}.
+    """
+    assignments = {}
+    errors = []
+    with open(file_path, "r", newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file, delimiter=";")
+        header = [cell.strip() for cell in next(reader, [])]
+        missing = [column for column in GROUP_ASSIGNMENT_COLUMNS if column not in header]
+        if missing:
+            raise InputFormatError(file_path, [(1, f"missing column(s) {', '.join(missing)}")])
+        competition_at, class_at, group_no_at, group_pos_at, a_at, b_at = (header.index(column) for column in GROUP_ASSIGNMENT_COLUMNS)
+        draw_number_at = header.index("draw_number") if "draw_number" in header else None
+        for row in reader:
+            cells = [cell.strip() for cell in row] + [""] * (len(header) - len(row))
+            if not any(cells) or cells[group_pos_at] or (draw_number_at is not None and cells[draw_number_at]):
+                continue
+            try:
+                group_no = parse_optional_int(cells[group_no_at], "group_no")
+                if group_no is None:
+                    continue
+                key = (parse_int(cells[a_at], "startnumber_A"), parse_optional_int(cells[b_at], "startnumber_B"))
+            except ValueError as e:
+                errors.append((reader.line_num, str(e)))
+                continue
+            assignments.setdefault((cells[competition_at], cells[class_at]), {})[key] = group_no
+    if errors:
+        raise InputFormatError(file_path, errors)
+    return assignments
@@ -1,115 +1,163 @@
-"""Module for writing output data to CSV files."""
+"""Module for writing output data to CSV files.
+
+Output rows are produced as tuples straight from the draw results. The `ExportWriter`
+accepts the result of each competition class as soon as its draw has finished and writes
+it to the combined output file and to the per-class files in background threads, while the
+next class is still being drawn.
+"""
 import csv
-from types import SimpleNamespace
-from models.player import players_by_start_number
-from misc.config import config
-
-def prepare_export_from_group_draw(groups):
-    """Prepare export data from group draw data."""
-    export = []
-
-    for _, competition_classes in groups.items():
-            for _, items in sorted(competition_classes.items()):
-                for group_number, members in items["group"].items():
-                    for member in members:
-                        player_a = players_by_start_number[member.start_number_a]
-                        player_b = players_by_start_number[member.start_number_b] if member.start_number_b is not None else None
-                    export_line_to_add = SimpleNamespace()
-                    export_line_to_add.S_D_M = member.competition
-                    setattr(export_line_to_add, "class", member.competition_class)
-                    export_line_to_add.seeding = member.seeding
-                    export_line_to_add.group_no = group_number
-                    export_line_to_add.group_pos = None
-                    export_line_to_add.for_main_round = None
-                    export_line_to_add.for_consolation = None
-                    export_line_to_add.draw_number = None
-                    export_line_to_add.startnumber_A = member.start_number_a
-                    export_line_to_add.startnumber_B = member.start_number_b if member.start_number_b is not None else ''
-                    export_line_to_add.last_name_A = player_a.last_name
-                    export_line_to_add.last_name_B = player_b.last_name if player_b is not None else ''
-                    export_line_to_add.country_A = player_a.country
-                    export_line_to_add.country_B = player_b.country if player_b is not None else ''
-                    export_line_to_add.PPP_chapter_A = player_a.base
-                    export_line_to_add.PPP_chapter_B = player_b.base if player_b is not None else ''
-
-
-                    export.append(export_line_to_add)
-
-    return export
-
-def prepare_export_from_bracket_draw(draw_data):
-    """Prepare export data from bracket draw data.
-
-    `draw_data` expected format:
-      { 'S': { competition_class: {'main': {'matches': matches_dict, ...}, 'consolation': {'matches': matches_dict, ...}}, ... }, 'D': {...}, 'M': {...} }
-
-    Returns a list of SimpleNamespace objects compatible with `write_to_csv`.
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from data_io.input_reader import DRAW_DATA_COLUMNS
+
+HEADERS = ("S_D_M", "class", "seeding", "group_no", "group_pos", "for_main_round", "for_consolation", "draw_number", "startnumber_A", "last_name_A", "country_A", "PPP_chapter_A", "startnumber_B", "last_name_B", "country_B", "PPP_chapter_B", "is_bye")
+GROUP_FILE_HEADERS = ("group_id", "start_number")
+BRACKET_FILE_HEADERS = ("match_id", "start_number")
+
+
+def _player_columns(context, start_number) -> tuple:
+    """Return (start number, last name, country, base) of a player, empty for missing players."""
+    player = context.players_by_start_number.get(start_number) if start_number is not None else None
+    if player is None:
+        return (start_number if start_number is not None else '', '', '', '')
+    return (start_number, player.last_name, player.country, player.base)
+
+
+def _participant_id(participant) -> str:
+    """Start number of a single player or "a/b" for a team, as used in the per-class files."""
+    if participant == "BYE":
+        return "bye"
+    if participant.start_number_b is None:
+        return str(participant.start_number_a)
+    return f"{participant.start_number_a}/{participant.start_number_b}"
+
+
+def group_rows(context, competition, competition_class, groups) -> Iterator[tuple]:
+    """Yield one output row per group member of a group draw."""
+    for group_number, members in groups.items():
+        for member in members:
+            player_a = _player_columns(context, member.start_number_a)
+            player_b = _player_columns(context, member.start_number_b) if member.start_number_b is not None else ('', '', '', '')
+            yield (competition, competition_class, member.seeding, group_number, None, None, None, None) + player_a + player_b + ('',)
+
+
+def bracket_rows(context, competition, competition_class, bracket) -> Iterator[tuple]:
+    """Yield one output row per first-round match of the main and consolation bracket.
+
+    `bracket` expected format: {'main': {'matches': matches_dict, ...}, 'consolation': {'matches': matches_dict, ...}}
+    """
+    for bracket_type in ('main', 'consolation'):
+        section = bracket.get(bracket_type)
+        if not section:
+            continue
+        matches = section.get('matches') if isinstance(section, dict) else section
+        if not matches:
+            continue
+        for draw_number, participants in matches.items():
+            if len(participants) == 0:
+                continue
+            a = participants[0]
+            b = participants[1] if len(participants) > 1 else None
+
+            columns_a = ('', '', '', '') if a == "BYE" else _player_columns(context, a.start_number_a)
+            columns_b = ('', '', '', '') if b is None or b == "BYE" else _player_columns(context, b.start_number_a)
+            # BYE marker: True if either side is BYE
+            is_bye = (a == 'BYE') or (b == 'BYE')
+            yield (
+                competition,
+                competition_class,
+                getattr(a, 'seeding', ''),
+                getattr(a, 'group_no', ''),
+                getattr(a, 'group_pos', ''),
+                bracket_type == 'main',
+                bracket_type == 'consolation',
+                draw_number,
+            ) + columns_a + columns_b + (is_bye,)
+
+
+def draw_input_rows(rows) -> Iterator[tuple]:
+    """Yield draw data rows in the column layout of the draw input file."""
+    for row in rows:
+        yield (
+            row.competition,
+            row.competition_class,
+            row.amount_of_groups if row.amount_of_groups is not None else '',
+            row.seeding if row.seeding is not None else '',
+            row.group_no if row.group_no is not None else '',
+            row.group_pos if row.group_pos is not None else '',
+            1 if row.main_round else '',
+            1 if row.consolation_round else '',
+            row.start_number_a,
+            row.start_number_b if row.start_number_b is not None else '',
+        )
+
+
+def write_draw_input(file_path, rows):
+    """Write draw data rows as a draw input file, e.g. the bracket input computed from group standings."""
+    _write_csv(file_path, DRAW_DATA_COLUMNS, draw_input_rows(rows))
+
+
+def _write_csv(file_path, headers, rows):
+    with open(file_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, delimiter=';')
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+
+class ExportWriter:
+    """Writes draw results to the combined output file and one file per class and stage.
+
+    Class results are handed over with `add_groups`/`add_bracket` as soon as they are drawn.
+    Rows are appended to the combined file in the order the classes were added, the per-class
+    files are written concurrently. `close` waits for all writes and raises the first error.
     """
-    export = []
-    for comp_type, classes in draw_data.items():
-        for competition_class, bracket_payload in classes.items():
-            for bracket_type in ('main', 'consolation'):
-                section = bracket_payload.get(bracket_type)
-                if not section:
-                    continue
-                matches = section.get('matches') if isinstance(section, dict) else section
-                if not matches:
-                    continue
-                for draw_number, participants in matches.items():
-                    if len(participants) == 0:
-                        continue
-                    a = participants[0]
-                    b = participants[1] if len(participants) > 1 else None
-
-                    export_line = SimpleNamespace()
-                    export_line.S_D_M = comp_type
-                    setattr(export_line, "class", competition_class)
-                    export_line.seeding = getattr(a, 'seeding', '')
-                    export_line.group_no = getattr(a, 'group_no', '')
-                    export_line.group_pos = getattr(a, 'group_pos', '')
-                    export_line.for_main_round = True if bracket_type == 'main' else False
-                    export_line.for_consolation = True if bracket_type == 'consolation' else False
-                    export_line.draw_number = draw_number
-
-                    if a == "BYE":
-                        export_line.startnumber_A = ''
-                        export_line.last_name_A = ''
-                        export_line.country_A = ''
-                        export_line.PPP_chapter_A = ''
-                    else:
-                        player_a = players_by_start_number.get(a.start_number_a)
-                        export_line.startnumber_A = a.start_number_a
-                        export_line.last_name_A = player_a.last_name if player_a is not None else ''
-                        export_line.country_A = player_a.country if player_a is not None else ''
-                        export_line.PPP_chapter_A = player_a.base if player_a is not None else ''
-
-                    if b is None or b == "BYE":
-                        export_line.startnumber_B = ''
-                        export_line.last_name_B = ''
-                        export_line.country_B = ''
-                        export_line.PPP_chapter_B = ''
-                    else:
-                        player_b = players_by_start_number.get(b.start_number_a)
-                        export_line.startnumber_B = b.start_number_a
-                        export_line.last_name_B = player_b.last_name if player_b is not None else ''
-                        export_line.country_B = player_b.country if player_b is not None else ''
-                        export_line.PPP_chapter_B = player_b.base if player_b is not None else ''
-
-                    # BYE marker: True if either side is BYE
-                    export_line.is_bye = (a == 'BYE') or (b == 'BYE')
-
-                    export.append(export_line)
-
-    return export
-
-def write_to_csv(draw_data):
-    """Write the provided draw data to a CSV file."""
-    headers = ["S_D_M","class","seeding","group_no","group_pos","for_main_round","for_consolation","draw_number","startnumber_A","last_name_A","country_A","PPP_chapter_A","startnumber_B","last_name_B","country_B","PPP_chapter_B","is_bye"]
-    output_file_path = config["files"]["output_file_path"]
-    with open(output_file_path, "w", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=headers, delimiter=';')
-        writer.writeheader()
-
-        for line in draw_data:
-            row_dict = vars(line)  # convert SimpleNamespace → dict
-            writer.writerow(row_dict)
\ No newline at end of file
+    def __init__(self, context, output_file_path, max_workers=4):
+        self.context = context
+        self.output_file_path = output_file_path
+        self.output_dir = os.path.dirname(output_file_path)
+        self._combined_file = open(output_file_path, "w", newline="", encoding="utf-8")
+        self._combined_writer = csv.writer(self._combined_file, delimiter=';')
+        self._combined_writer.writerow(HEADERS)
+        # a single worker keeps the combined file in submission order
+        self._combined_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export-combined")
+        self._class_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export-class")
+        self._futures = []
+        self.class_files = []
+
+    def _class_file_path(self, competition, competition_class, suffix):
+        path = os.path.join(self.output_dir, f"{competition}_{competition_class}_{suffix}.csv")
+        self.class_files.append(path)
+        return path
+
+    def add_groups(self, competition, competition_class, groups):
+        """Schedule writing the result of a group draw."""
+        self._futures.append(self._combined_executor.submit(self._combined_writer.writerows, group_rows(self.context, competition, competition_class, groups)))
+        rows = ((group_number, _participant_id(member)) for group_number, members in groups.items() for member in members)
+        path = self._class_file_path(competition, competition_class, "groups")
+        self._futures.append(self._class_executor.submit(_write_csv, path, GROUP_FILE_HEADERS, rows))
+
+    def add_bracket(self, competition, competition_class, bracket):
+        """Schedule writing the result of a main and consolation bracket draw."""
+        self._futures.append(self._combined_executor.submit(self._combined_writer.writerows, bracket_rows(self.context, competition, competition_class, bracket)))
+        for bracket_type in ('main', 'consolation'):
+            matches = (bracket.get(bracket_type) or {}).get('matches')
+            if not matches:
+                continue
+            rows = ((match_idx, _participant_id(p)) for match_idx, participants in matches.items() for p in participants if p is not None)
+            path = self._class_file_path(competition, competition_class, bracket_type)
+            self._futures.append(self._class_executor.submit(_write_csv, path, BRACKET_FILE_HEADERS, rows))
+
+    def close(self):
+        """Wait for all pending writes, close the combined file and raise the first write error if any."""
+        self._combined_executor.shutdown(wait=True)
+        self._class_executor.shutdown(wait=True)
+        self._combined_file.close()
+        for future in self._futures:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,212 @@
+"""Optional SQLite store of the players and the draw input (see `player_database_path` in config.ini).
+
+Federation player files are imported once into an indexed SQLite database and only re-imported
+when the file changes. Each start then only loads the players referenced by the draw input, so
+reading time and memory depend on the size of the tournament instead of the federation. Draw
+inputs are stored per file content, so batch runs with different inputs can share one database.
+"""
+import logging
+import os
+import sqlite3
+import time
+from typing import Iterator
+
+from data_io.input_cache import input_fingerprint
+from data_io.input_reader import InputFormatError, iter_draw_data, iter_player_values
+from models.draw_data import DrawDataRow
+from models.player import Player
+
+SCHEMA_VERSION = 1
+# draw inputs kept in the database besides the current one
+KEEP_DRAW_INPUTS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS players (
+    start_number INTEGER PRIMARY KEY,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    country TEXT NOT NULL,
+    base TEXT,
+    gender TEXT NOT NULL,
+    qttr INTEGER,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_country ON players (country);
+CREATE INDEX IF NOT EXISTS players_base ON players (base);
+CREATE TABLE IF NOT EXISTS draw_inputs (fingerprint TEXT PRIMARY KEY, imported REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS draw_rows (
+    input TEXT NOT NULL REFERENCES draw_inputs (fingerprint) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    competition TEXT NOT NULL,
+    competition_class TEXT NOT NULL,
+    seeding INTEGER,
+    amount_of_groups INTEGER,
+    group_no INTEGER,
+    group_pos INTEGER,
+    main_round INTEGER NOT NULL,
+    consolation_round INTEGER NOT NULL,
+    start_number_a INTEGER NOT NULL,
+    start_number_b INTEGER,
+    PRIMARY KEY (input, line)
+);
+CREATE INDEX IF NOT EXISTS draw_rows_class ON draw_rows (input, competition, competition_class);
+CREATE INDEX IF NOT EXISTS draw_rows_start_number_a ON draw_rows (input, start_number_a);
+CREATE INDEX IF NOT EXISTS draw_rows_start_number_b ON draw_rows (input, start_number_b);
+"""
+
+
+class PlayerDatabase:
+    """SQLite database of the federation's players and of imported draw inputs."""
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # parallel batch runs may import at the same time
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        with self._transaction():
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+                # the database only mirrors the input files, so it is simply rebuilt
+                for table in ("draw_rows", "draw_inputs", "players", "meta"):
+                    self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.connection.execute(statement)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+    def _meta(self, key):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def players_fingerprint(self):
+        """Fingerprint of the players file the players were imported from, None before the first import."""
+        return self._meta("players_fingerprint")
+
+    def player_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def import_players(self, file_path) -> bool:
+        """Replace the players by those of a players CSV file, unless the file was imported already.
+
+        Returns whether the file was imported. Malformed rows and duplicate start numbers are
+        reported in an InputFormatError and leave the database unchanged.
+        """
+        fingerprint = input_fingerprint(file_path)
+        if self._meta("players_fingerprint") == fingerprint:
+            return False
+        started = time.perf_counter()
+        with self._transaction():
+            self.connection.execute("DELETE FROM players")
+            lines = {}
+            duplicates = []
+
+            def unique_rows():
+                for line, values in iter_player_values(file_path):
+                    if values[0] in lines:
+                        duplicates.append((line, f"start number {values[0]} was already used in line {lines[values[0]]}"))
+                        continue
+                    lines[values[0]] = line
+                    yield (*values, line)
+
+            self.connection.executemany("INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?)", unique_rows())
+            if duplicates:
+                raise InputFormatError(file_path, duplicates)
+            self._set_meta("players_fingerprint", fingerprint)
+        logging.info("Imported %d players from %s into %s in %.1f s", len(lines), file_path, self.path, time.perf_counter() - started)
+        return True
+
+    def import_draw_input(self, file_path) -> str:
+        """Store the rows of a draw input file unless its content was imported already, return its key."""
+        fingerprint = input_fingerprint(file_path)
+        with self._transaction():
+            if self.connection.execute("SELECT 1 FROM draw_inputs WHERE fingerprint = ?", (fingerprint,)).fetchone() is None:
+                self.connection.execute("INSERT INTO draw_inputs VALUES (?, ?)", (fingerprint, time.time()))
+                self.connection.executemany(
+                    "INSERT INTO draw_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((fingerprint, line, row.competition, row.competition_class, row.seeding, row.amount_of_groups, row.group_no,
+                      row.group_pos, row.main_round, row.consolation_round, row.start_number_a, row.start_number_b)
+                     for line, row in enumerate(iter_draw_data(file_path))))
+            else:
+                self.connection.execute("UPDATE draw_inputs SET imported = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+            self.connection.execute("DELETE FROM draw_inputs WHERE fingerprint NOT IN "
+                                    "(SELECT fingerprint FROM draw_inputs ORDER BY imported DESC LIMIT ?)", (KEEP_DRAW_INPUTS + 1,))
+        return fingerprint
+
+    def iter_draw_data(self, draw_input) -> Iterator[DrawDataRow]:
+        """Yield the rows of an imported draw input in file order."""
+        cursor = self.connection.execute(
+            "SELECT competition, competition_class, seeding, amount_of_groups, group_no, group_pos, main_round, consolation_round, "
+            "start_number_a, start_number_b FROM draw_rows WHERE input = ? ORDER BY line", (draw_input,))
+        for competition, competition_class, seeding, amount_of_groups, group_no, group_pos, main_round, consolation_round, start_number_a, start_number_b in cursor:
+            yield DrawDataRow(competition, competition_class, seeding, amount_of_groups, group_no, group_pos,
+                              bool(main_round), bool(consolation_round), start_number_a, start_number_b)
+
+    def iter_referenced_players(self, context, draw_input) -> Iterator[Player]:
+        """Yield the players referenced by an imported draw input (in the order of the players file), registering them in context."""
+        cursor = self.connection.execute(
+            "SELECT start_number, last_name, first_name, country, base, gender, qttr FROM players WHERE start_number IN "
+            "(SELECT start_number_a FROM draw_rows WHERE input = ? UNION SELECT start_number_b FROM draw_rows WHERE input = ?) "
+            "ORDER BY line", (draw_input, draw_input))
+        for start_number, last_name, first_name, country, base, gender, qttr in cursor:
+            yield Player(start_number, first_name, last_name, country, base, gender, qttr, context)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on errors."""
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def current_players_fingerprint(database_path, players_path):
+    """Fingerprint of the players open_player_database provides, without importing them.
+
+    That is the players file if it exists, as it is imported whenever it changed, otherwise the
+    players held by the database. None if there are no players.
+    """
+    if os.path.exists(players_path):
+        return input_fingerprint(players_path)
+    if not os.path.exists(database_path):
+        return None
+    try:
+        database = PlayerDatabase(database_path)
+    except sqlite3.Error:
+        return None
+    try:
+        return database.players_fingerprint()
+    finally:
+        database.close()
+
+
+def open_player_database(database_path, players_path):
+    """Open the database and import the players file if it changed.
+
+    A missing players file is fine as long as the database already holds players.
+    """
+    database = PlayerDatabase(database_path)
+    try:
+        if os.path.exists(players_path) or database.player_count() == 0:
+            database.import_players(players_path)
+    except BaseException:
+        database.close()
+        raise
+    return database
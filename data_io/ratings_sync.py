@@ -0,0 +1,165 @@
+"""Bulk refresh of the QTTR ratings of all players from an HTTP endpoint (see [ratings] in config.ini).
+
+The ratings of the players file may be outdated, and the QTTR check of the group draw depends
+on whether a rating is missing. Before drawing, the ratings of all players of the tournament are
+requested in batches from the configured endpoint with a pooled, concurrent asyncio client
+(aiohttp); failed batches are retried with exponential backoff. Fetched ratings are kept in an
+on-disk cache and reused until they are older than the configured time to live; if the endpoint
+cannot be reached, stale cached ratings are used before falling back to the players file.
+
+Protocol: POST {"start_numbers": [1, 2, ...]} to the endpoint, answered with
+{"ratings": {"1": 1534, "2": null, ...}} (null for players without a rating).
+"""
+import asyncio
+import json
+import logging
+import time
+
+from data_io.file_utils import write_atomic
+from misc.config import config
+
+
+class RatingsSyncError(RuntimeError):
+    """Raised if a batch of ratings could not be fetched after all retries."""
+
+
+def read_ratings_settings():
+    """Read the [ratings] section, returns None if no endpoint is configured."""
+    section = config["ratings"] if config.has_section("ratings") else {}
+    endpoint = section.get("endpoint", "").strip()
+    if not endpoint:
+        return None
+    return {
+        "endpoint": endpoint,
+        "batch_size": int(section.get("batch_size", "100")),
+        "max_connections": int(section.get("max_connections", "8")),
+        "retries": int(section.get("retries", "3")),
+        "timeout": float(section.get("timeout", "10")),
+        "cache_path": section.get("cache_path", ""),
+        "cache_ttl": float(section.get("cache_ttl_hours", "24")) * 3600,
+    }
+
+
+class RatingsCache:
+    """Ratings fetched earlier: start number -> (QTTR or None, time fetched)."""
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    self.entries = {int(start_number): tuple(entry) for start_number, entry in json.load(file).items()}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError) as e:
+                logging.warning("Ignoring unreadable ratings cache %s: %s", path, e)
+
+    def get(self, start_number, max_age=None):
+        """Return (True, rating) if a rating not older than max_age (default: the TTL) is cached, else (False, None)."""
+        entry = self.entries.get(start_number)
+        if entry is None or time.time() - entry[1] > (self.ttl if max_age is None else max_age):
+            return False, None
+        return True, entry[0]
+
+    def update(self, ratings):
+        now = time.time()
+        for start_number, rating in ratings.items():
+            self.entries[start_number] = (rating, now)
+
+    def save(self):
+        if self.path:
+            data = {str(start_number): list(entry) for start_number, entry in sorted(self.entries.items())}
+            write_atomic(self.path, json.dumps(data).encode())
+
+
+async def _fetch_batch(session, settings, start_numbers):
+    """POST one batch, retrying with exponential backoff, and return start number -> rating."""
+    import aiohttp
+    delay = 0.2
+    for attempt in range(settings["retries"] + 1):
+        try:
+            async with session.post(settings["endpoint"], json={"start_numbers": start_numbers}) as response:
+                if response.status >= 500 or response.status == 429:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                response.raise_for_status()
+                ratings = (await response.json())["ratings"]
+                return {int(start_number): (int(rating) if rating is not None else None) for start_number, rating in ratings.items()}
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError, TypeError) as e:
+            if attempt == settings["retries"] or (isinstance(e, aiohttp.ClientResponseError) and 400 <= e.status < 500 and e.status != 429):
+                raise RatingsSyncError(f"ratings of {len(start_numbers)} players could not be fetched: {e}") from e
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def fetch_ratings(start_numbers, settings):
+    """Fetch the ratings of all start numbers in concurrent batches over a shared connection pool.
+
+    Returns (start number -> rating, number of failed batches).
+    """
+    import aiohttp
+    batches = [start_numbers[i:i + settings["batch_size"]] for i in range(0, len(start_numbers), settings["batch_size"])]
+    connector = aiohttp.TCPConnector(limit=settings["max_connections"])
+    timeout = aiohttp.ClientTimeout(total=settings["timeout"])
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(*(_fetch_batch(session, settings, batch) for batch in batches), return_exceptions=True)
+    ratings = {}
+    errors = []
+    for result in results:
+        if isinstance(result, RatingsSyncError):
+            errors.append(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            ratings.update(result)
+    if errors:
+        logging.warning("%d of %d ratings requests failed, e.g. %s", len(errors), len(batches), errors[0])
+    return ratings, len(errors)
+
+
+def refresh_ratings(context, settings=None):
+    """Update the QTTR values of all players (and teams) of the context, see the module docstring.
+
+    Returns a dict with the number of players taken from the cache, fetched, changed and
+    not refreshed, or None if no endpoint is configured.
+    """
+    settings = settings or read_ratings_settings()
+    if settings is None:
+        return None
+    cache = RatingsCache(settings["cache_path"], settings["cache_ttl"])
+    ratings = {}
+    missing = []
+    for start_number in sorted(context.players_by_start_number):
+        cached, rating = cache.get(start_number)
+        if cached:
+            ratings[start_number] = rating
+        else:
+            missing.append(start_number)
+    report = {"cached": len(ratings), "fetched": 0, "changed": 0, "not_refreshed": 0}
+
+    if missing:
+        fetched, _ = asyncio.run(fetch_ratings(missing, settings))
+        # the service may answer with further start numbers, only the requested players are taken over
+        requested = set(missing)
+        fetched = {start_number: rating for start_number, rating in fetched.items() if start_number in requested}
+        cache.update(fetched)
+        cache.save()
+        ratings.update(fetched)
+        report["fetched"] = len(fetched)
+        for start_number in missing:
+            if start_number not in fetched:
+                # fall back to a stale cached rating, otherwise keep the rating of the players file
+                cached, rating = cache.get(start_number, max_age=float("inf"))
+                if cached:
+                    ratings[start_number] = rating
+                else:
+                    report["not_refreshed"] += 1
+
+    for start_number, rating in ratings.items():
+        player = context.players_by_start_number[start_number]
+        if player.qttr != rating:
+            player.qttr = rating
+            report["changed"] += 1
+    for team in context.teams.values():
+        team.qttr = (team.player_a.qttr, team.player_b.qttr)
+    return report
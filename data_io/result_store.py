@@ -0,0 +1,74 @@
+"""Persisted store of per-class draw results for incremental re-draws.
+
+Each drawn class is stored in its own file together with a fingerprint of everything the
+draw depends on: the participant rows, the relevant attributes of the participating
+players, the config section of the drawing algorithm and the class seed. On the next run a
+class whose fingerprint is unchanged is taken from the store instead of being drawn again.
+"""
+import hashlib
+import logging
+import os
+import pickle
+from data_io.file_utils import write_atomic
+from misc.config import config
+
+# bump whenever a drawing algorithm changes its results for identical input
+RESULT_STORE_VERSION = 4
+STORE_MAGIC = b"HLRESULT1"
+
+CONFIG_SECTION_BY_STAGE = {"groups": "group_draw", "bracket": "bracket_draw"}
+
+
+def _participant_key(row) -> str:
+    key = str(row.start_number_a)
+    if row.start_number_b is not None:
+        key += "/" + str(row.start_number_b)
+    return key
+
+
+def class_fingerprint(context, stage: str, competition: str, competition_class: str, class_subset, seed, initial_groups=None) -> str:
+    """Hash all inputs that influence the draw result of a single competition class (including a warm-start assignment)."""
+    digest = hashlib.sha256(f"{RESULT_STORE_VERSION}|{stage}|{competition}|{competition_class}|{seed}".encode())
+    section = CONFIG_SECTION_BY_STAGE[stage]
+    for option, value in sorted(config[section].items()) if config.has_section(section) else ():
+        digest.update(f"|cfg:{option}={value}".encode())
+    for row in sorted(class_subset, key=_participant_key):
+        # bracket rows carry no seeding of their own, it is looked up from the group rows
+        seeding = row.seeding if row.seeding is not None else context.seeding_of(row)
+        digest.update(f"|row:{_participant_key(row)},{seeding},{row.amount_of_groups},{row.group_no},{row.group_pos},{row.main_round},{row.consolation_round}".encode())
+        for start_number in (row.start_number_a, row.start_number_b):
+            if start_number is None:
+                continue
+            player = context.players_by_start_number[start_number]
+            digest.update(f"|player:{start_number},{player.country},{player.base},{player.gender},{player.qttr}".encode())
+    for key, group_no in sorted((initial_groups or {}).items(), key=lambda item: str(item[0])):
+        digest.update(f"|initial:{key},{group_no}".encode())
+    return digest.hexdigest()
+
+
+class ResultStore:
+    """Directory of pickled per-class draw results, each tagged with its input fingerprint."""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, stage, competition, competition_class):
+        return os.path.join(self.directory, f"{competition}_{competition_class}_{stage}.result")
+
+    def load(self, stage, competition, competition_class, fingerprint):
+        """Return the stored result if it was drawn from identical input, otherwise None."""
+        path = self._path(stage, competition, competition_class)
+        try:
+            with open(path, "rb") as file:
+                if file.readline().rstrip(b"\n") != STORE_MAGIC + b" " + fingerprint.encode():
+                    return None
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logging.warning("Ignoring unreadable stored result %s: %s", path, e)
+            return None
+
+    def store(self, stage, competition, competition_class, fingerprint, result):
+        """Persist a draw result for the given fingerprint, replacing any previous one."""
+        header = STORE_MAGIC + b" " + fingerprint.encode() + b"\n"
+        write_atomic(self._path(stage, competition, competition_class), header + pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
@@ -0,0 +1,166 @@
+"""Export of the draw results to an indexed SQLite database (see `results_database_path` in config.ini).
+
+Next to the flat output files, the groups, bracket slots (including byes), rule violations and run
+metadata are written into normalized tables, so that tools for scheduling, printing or
+announcements can answer questions like "all matches of country X" with an indexed query instead
+of scanning output.csv. The database is written in one transaction into a temporary file that
+replaces the previous database, so readers always see a complete export.
+
+Useful views: `group_players` and `bracket_players` list one row per player of a group slot or
+bracket slot with the player's name, country and base.
+"""
+import os
+import sqlite3
+import time
+
+from checks.group_checker import check_country_distribution, check_base_uniqueness, get_qttr_violations, check_team_country_distribution
+from checks.bracket_checker import check_half_group_separation, check_no_first_vs_first, check_country_balance_halves, check_base_conflicts_first_round
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE run (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE players (
+    start_number INTEGER PRIMARY KEY,
+    last_name TEXT, first_name TEXT, country TEXT, base TEXT, gender TEXT, qttr INTEGER
+);
+CREATE INDEX players_country ON players (country);
+CREATE INDEX players_base ON players (base);
+CREATE TABLE participants (
+    participant_id INTEGER PRIMARY KEY,
+    competition TEXT NOT NULL, competition_class TEXT NOT NULL,
+    start_number_a INTEGER NOT NULL, start_number_b INTEGER,
+    seeding INTEGER, group_no INTEGER, group_pos INTEGER
+);
+CREATE INDEX participants_class ON participants (competition, competition_class);
+CREATE TABLE participant_players (
+    participant_id INTEGER NOT NULL REFERENCES participants, start_number INTEGER NOT NULL REFERENCES players,
+    PRIMARY KEY (participant_id, start_number)
+);
+CREATE INDEX participant_players_start_number ON participant_players (start_number);
+CREATE TABLE group_slots (
+    competition TEXT NOT NULL, competition_class TEXT NOT NULL, group_no INTEGER NOT NULL, position INTEGER NOT NULL,
+    participant_id INTEGER REFERENCES participants,
+    PRIMARY KEY (competition, competition_class, group_no, position)
+);
+CREATE INDEX group_slots_participant ON group_slots (participant_id);
+CREATE TABLE bracket_slots (
+    competition TEXT NOT NULL, competition_class TEXT NOT NULL, bracket TEXT NOT NULL, match_no INTEGER NOT NULL, side INTEGER NOT NULL,
+    participant_id INTEGER REFERENCES participants, is_bye INTEGER NOT NULL,
+    PRIMARY KEY (competition, competition_class, bracket, match_no, side)
+);
+CREATE INDEX bracket_slots_participant ON bracket_slots (participant_id);
+CREATE TABLE violations (
+    stage TEXT NOT NULL, competition TEXT NOT NULL, competition_class TEXT NOT NULL, bracket TEXT,
+    rule TEXT NOT NULL, group_no INTEGER, match_no INTEGER, country TEXT, base TEXT, detail TEXT
+);
+CREATE INDEX violations_class ON violations (competition, competition_class, stage);
+CREATE VIEW group_players AS
+    SELECT g.competition, g.competition_class, g.group_no, g.position, p.start_number, p.last_name, p.first_name, p.country, p.base
+    FROM group_slots g JOIN participant_players pp USING (participant_id) JOIN players p USING (start_number);
+CREATE VIEW bracket_players AS
+    SELECT b.competition, b.competition_class, b.bracket, b.match_no, b.side, p.start_number, p.last_name, p.first_name, p.country, p.base
+    FROM bracket_slots b JOIN participant_players pp USING (participant_id) JOIN players p USING (start_number);
+"""
+
+
+class _Writer:
+    """Inserts the results of one context, registering every participant once."""
+    def __init__(self, connection, context):
+        self.connection = connection
+        self.context = context
+        self.participant_ids = {}
+
+    def participant(self, competition, competition_class, participant):
+        key = (competition, competition_class, participant.start_number_a, participant.start_number_b,
+               getattr(participant, 'group_no', None), getattr(participant, 'group_pos', None))
+        participant_id = self.participant_ids.get(key)
+        if participant_id is None:
+            participant_id = self.participant_ids[key] = len(self.participant_ids) + 1
+            seeding = participant.seeding if participant.seeding is not None else self.context.seeding_of(participant)
+            self.connection.execute("INSERT INTO participants VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (participant_id, competition, competition_class, participant.start_number_a, participant.start_number_b,
+                                     seeding, key[4], key[5]))
+            self.connection.executemany("INSERT OR IGNORE INTO participant_players VALUES (?, ?)",
+                                        ((participant_id, start_number) for start_number in (participant.start_number_a, participant.start_number_b)
+                                         if start_number is not None))
+        return participant_id
+
+    def violations(self, stage, competition, competition_class, bracket, rows):
+        self.connection.executemany("INSERT INTO violations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    ((stage, competition, competition_class, bracket, *row) for row in rows))
+
+    def groups(self, competition, competition_class, groups):
+        for group_no, members in groups.items():
+            for position, member in enumerate(members, start=1):
+                participant_id = None if isinstance(member.start_number_a, str) else self.participant(competition, competition_class, member)
+                self.connection.execute("INSERT INTO group_slots VALUES (?, ?, ?, ?, ?)", (competition, competition_class, group_no, position, participant_id))
+        context = self.context
+        rows = [("country", None, None, v[0], None, f"max {v[1]}, min {v[2]} per group: {v[3]}") for v in check_country_distribution(context, competition, groups)]
+        rows += [("base", v[0], None, None, v[1], f"{v[2]} participants") for v in check_base_uniqueness(context, groups)]
+        if competition in ('D', 'M'):
+            rows += [("team_country", None, None, v[1], None, f"{v[0]}: min {v[2]}, max {v[3]} per group: {v[4]}") for v in check_team_country_distribution(context, groups)]
+        if competition == 'S':
+            rows += [("qttr", v[0], None, None, None, f"{v[1]} without QTTR, per group: {v[2]}") for v in get_qttr_violations(context, groups)]
+        self.violations("groups", competition, competition_class, None, rows)
+
+    def bracket(self, competition, competition_class, bracket):
+        for bracket_type in ('main', 'consolation'):
+            matches = (bracket.get(bracket_type) or {}).get('matches')
+            if not matches:
+                continue
+            for match_no, participants in matches.items():
+                for side, participant in enumerate(participants, start=1):
+                    if participant is None:
+                        continue
+                    is_bye = participant == "BYE"
+                    participant_id = None if is_bye else self.participant(competition, competition_class, participant)
+                    self.connection.execute("INSERT INTO bracket_slots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                            (competition, competition_class, bracket_type, match_no, side, participant_id, is_bye))
+            context = self.context
+            rows = [("half_split", v[0], None, None, None, v[1]) for v in check_half_group_separation(matches, len(matches))]
+            rows += [("first_vs_first", None, v[0], None, None, None) for v in check_no_first_vs_first(matches)]
+            rows += [("country_half", None, None, v[0], None, f"{v[1]}/{v[2]} per half, {v[3]} too many") for v in check_country_balance_halves(context, matches, len(matches))]
+            rows += [("base_first", None, v[0], None, v[1], None) for v in check_base_conflicts_first_round(context, matches)]
+            self.violations("bracket", competition, competition_class, bracket_type, rows)
+
+
+def write_results_database(context, path, metadata=None):
+    """Write all groups and brackets of the context into a new results database at path.
+
+    metadata (e.g. the random seed or the input fingerprint) is stored in the run table.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("BEGIN")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                connection.execute(statement)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        run = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), **(metadata or {})}
+        connection.executemany("INSERT INTO run VALUES (?, ?)", ((key, None if value is None else str(value)) for key, value in run.items()))
+        connection.executemany("INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               ((p.start_number, p.last_name, p.first_name, p.country, p.base, p.gender, p.qttr)
+                                for p in context.players_by_start_number.values()))
+        writer = _Writer(connection, context)
+        for competition, classes in context.groups.items():
+            for competition_class, result in sorted(classes.items()):
+                writer.groups(competition, competition_class, result["group"])
+        for competition, classes in context.brackets.items():
+            for competition_class, result in sorted(classes.items()):
+                writer.bracket(competition, competition_class, result)
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.close()
+        os.remove(tmp_path)
+        raise
+    connection.close()
+    # readers keep the previous export open until they reconnect
+    os.replace(tmp_path, path)
@@ -0,0 +1,274 @@
+"""Compact fixed-record binary files for draw snapshots.
+
+A snapshot file holds the replay log of one group draw or one bracket draw:
+
+    header        magic, kind, competition, input fingerprint of the class, table sizes, record
+                  count and size, followed by the UTF-8 class name (its length is the last header field)
+    participants  one entry per participant (start numbers, seeding, group number and position)
+    initial state group draws only: participant index per group slot of the initial assignment
+    records       one fixed-size record per snapshot
+
+Participants are referenced by their index in the participant table (-1 for an empty slot,
+-2 for a bye). Instead of the full violation lists, each record keeps the number of
+violations per constraint. `SnapshotFile` maps the file into memory and decodes records on
+access, so a viewer can jump to any snapshot of a previous run without loading the whole log.
+
+Draws in replay mode record no snapshots. For them a replay record is written instead: the pickled
+replay (seed, budget, checkpoints and initial groups) that re-simulates the snapshots when viewed.
+"""
+import mmap
+import pickle
+import struct
+from collections.abc import Sequence
+from data_io.file_utils import write_atomic
+from draw.group_drawer import EmptySlot
+from models.draw_data import DrawDataRow
+from models.snapshot import Snapshot
+
+MAGIC = b"HLSNAP3\0"
+REPLAY_MAGIC = b"HLREPLAY1"
+KIND_GROUPS = 0
+KIND_BRACKET = 1
+
+GROUP_VIOLATIONS = ("country", "base", "qttr", "team_country")
+BRACKET_VIOLATIONS = ("half_group_separation", "first_vs_first", "country_balance", "base_conflicts")
+GROUP_ACTIONS = (None, "swap", "revert")
+BRACKET_ACTIONS = ("seed_start", "top_seed_assign", "top_seed_complete", "bye_assign", "seeded_byes", "initial_fill", "improvement", "progress", "final")
+
+EMPTY = -1
+BYE = -2
+NONE_INT = -(2 ** 31)
+
+# magic, kind, competition, fingerprint, participant count, layout a, layout b, record count, record size, class name length
+HEADER = struct.Struct("<8sB1s32sIIIIIH")
+PARTICIPANT = struct.Struct("<iiiii")
+# action, group 1, group 2, index, participant 1, participant 2, score, violation counts
+GROUP_RECORD = struct.Struct("<BHHHiii4H")
+# action, metadata, score, violation counts; followed by one participant index per bracket slot
+BRACKET_RECORD = struct.Struct("<Bii4H")
+
+
+def _encode_int(value):
+    return NONE_INT if value is None else value
+
+
+def _decode_int(value):
+    return None if value == NONE_INT else value
+
+
+def _pack_header(kind, competition, competition_class, fingerprint, *sizes):
+    """Header of a snapshot file, raises ValueError if the competition or class cannot be stored.
+
+    fingerprint is the hex digest of the class input, None is stored as zeros.
+    """
+    competition_bytes = competition.encode()
+    class_bytes = competition_class.encode()
+    if len(competition_bytes) != 1:
+        raise ValueError(f"competition {competition!r} must be a single character")
+    if len(class_bytes) > 0xFFFF:
+        raise ValueError(f"competition class {competition_class[:20]!r}... is too long")
+    fingerprint_bytes = bytes.fromhex(fingerprint) if fingerprint else bytes(32)
+    return HEADER.pack(MAGIC, kind, competition_bytes, fingerprint_bytes, *sizes, len(class_bytes)) + class_bytes
+
+
+def _participant_key(participant):
+    return (participant.start_number_a, participant.start_number_b)
+
+
+def _violation_counts(violations, names):
+    return [min(len(violations.get(name, ())), 0xFFFF) for name in names]
+
+
+class _ParticipantTable:
+    """Assigns indices to participants by start numbers (snapshots hold copies of the same rows)."""
+    def __init__(self):
+        self.rows = []
+        self.index_by_key = {}
+
+    def index(self, participant):
+        if participant == "BYE":
+            return BYE
+        if participant is None or getattr(participant, "start_number_a", None) in (None, "EMPTY"):
+            return EMPTY
+        key = _participant_key(participant)
+        if key not in self.index_by_key:
+            self.index_by_key[key] = len(self.rows)
+            self.rows.append(participant)
+        return self.index_by_key[key]
+
+    def pack(self):
+        return b"".join(
+            PARTICIPANT.pack(p.start_number_a, _encode_int(p.start_number_b), _encode_int(p.seeding), _encode_int(p.group_no), _encode_int(p.group_pos))
+            for p in self.rows
+        )
+
+
+def write_group_snapshots(file_path, competition, competition_class, snapshots, fingerprint=None):
+    """Write the snapshots of a group draw (the first snapshot must hold the initial groups)."""
+    table = _ParticipantTable()
+    initial_groups = snapshots[0].initial_groups
+    amount_of_groups = len(initial_groups)
+    group_size = max(len(members) for members in initial_groups.values())
+    initial_state = []
+    for group_no in sorted(initial_groups):
+        members = initial_groups[group_no]
+        indices = [table.index(member) for member in members] + [EMPTY] * (group_size - len(members))
+        initial_state.extend(indices)
+
+    records = bytearray()
+    for snapshot in snapshots:
+        if snapshot.action is None:
+            g1 = g2 = index = 0
+            p1 = p2 = EMPTY
+        else:
+            g1, g2 = snapshot.groups
+            index = snapshot.index
+            p1, p2 = (table.index(p) for p in snapshot.participants)
+        records += GROUP_RECORD.pack(GROUP_ACTIONS.index(snapshot.action), g1, g2, index, p1, p2, snapshot.violation_score,
+                                     *_violation_counts(snapshot.violations, GROUP_VIOLATIONS))
+
+    header = _pack_header(KIND_GROUPS, competition, competition_class, fingerprint, len(table.rows),
+                          amount_of_groups, group_size, len(snapshots), GROUP_RECORD.size)
+    write_atomic(file_path, header + table.pack() + struct.pack(f"<{len(initial_state)}i", *initial_state) + bytes(records))
+
+
+def write_bracket_snapshots(file_path, competition, competition_class, snapshots, fingerprint=None):
+    """Write the snapshots of a bracket draw (every snapshot holds its complete first round)."""
+    table = _ParticipantTable()
+    number_of_matches = max(len(snapshot.initial_groups) for snapshot in snapshots)
+    record_size = BRACKET_RECORD.size + 4 * 2 * number_of_matches
+
+    records = bytearray()
+    for snapshot in snapshots:
+        slots = [EMPTY] * (2 * number_of_matches)
+        for match_idx, participants in snapshot.initial_groups.items():
+            for side, participant in enumerate(participants):
+                slots[(match_idx - 1) * 2 + side] = table.index(participant)
+        metadata = snapshot.groups[0] if snapshot.groups and len(snapshot.groups) == 1 else -1
+        records += BRACKET_RECORD.pack(BRACKET_ACTIONS.index(snapshot.action), metadata, snapshot.violation_score,
+                                       *_violation_counts(snapshot.violations, BRACKET_VIOLATIONS))
+        records += struct.pack(f"<{len(slots)}i", *slots)
+
+    header = _pack_header(KIND_BRACKET, competition, competition_class, fingerprint, len(table.rows),
+                          number_of_matches, 0, len(snapshots), record_size)
+    write_atomic(file_path, header + table.pack() + bytes(records))
+
+
+class SnapshotFile(Sequence):
+    """Read-only, memory-mapped view of a snapshot file behaving like a list of Snapshot objects.
+
+    If a competition and class are given, a file of another class raises a ValueError.
+    """
+    def __init__(self, file_path, competition=None, competition_class=None):
+        self.file_path = file_path
+        with open(file_path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.kind, competition_bytes, fingerprint, participant_count, self._layout_a, self._layout_b, self._count, self._record_size, name_length = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{file_path} is not a snapshot file")
+            self.fingerprint = fingerprint.hex() if any(fingerprint) else None
+            self.competition = competition_bytes.decode()
+            self.competition_class = self._map[HEADER.size:HEADER.size + name_length].decode()
+        except (struct.error, UnicodeDecodeError) as e:
+            self._map.close()
+            raise ValueError(f"{file_path} is not a snapshot file") from e
+        except ValueError:
+            self._map.close()
+            raise
+        if (competition is not None and competition != self.competition) or (competition_class is not None and competition_class != self.competition_class):
+            self._map.close()
+            raise ValueError(f"{file_path} holds the snapshots of {self.competition} {self.competition_class}, not of {competition} {competition_class}")
+
+        offset = HEADER.size + name_length
+        self.participants = []
+        for _ in range(participant_count):
+            a, b, seeding, group_no, group_pos = PARTICIPANT.unpack_from(self._map, offset)
+            self.participants.append(DrawDataRow(self.competition, self.competition_class, _decode_int(seeding), '', _decode_int(group_no),
+                                                 _decode_int(group_pos), False, False, a, _decode_int(b)))
+            offset += PARTICIPANT.size
+
+        self._initial_state = None
+        if self.kind == KIND_GROUPS:
+            slot_count = self._layout_a * self._layout_b
+            self._initial_state = struct.unpack_from(f"<{slot_count}i", self._map, offset)
+            offset += 4 * slot_count
+        self._records_offset = offset
+
+    def _participant(self, index):
+        if index == EMPTY:
+            return EmptySlot() if self.kind == KIND_GROUPS else None
+        if index == BYE:
+            return "BYE"
+        return self.participants[index]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot index out of range")
+        offset = self._records_offset + index * self._record_size
+        if self.kind == KIND_GROUPS:
+            return self._decode_group_record(offset)
+        return self._decode_bracket_record(offset)
+
+    def _decode_group_record(self, offset):
+        action, g1, g2, index, p1, p2, score, *counts = GROUP_RECORD.unpack_from(self._map, offset)
+        violations = dict(zip(GROUP_VIOLATIONS, counts))
+        action = GROUP_ACTIONS[action]
+        if action is None:
+            size = self._layout_b
+            initial_groups = {
+                group_no + 1: [self._participant(i) for i in self._initial_state[group_no * size:(group_no + 1) * size]]
+                for group_no in range(self._layout_a)
+            }
+            return Snapshot(None, None, None, None, violations, score, initial_groups=initial_groups)
+        return Snapshot(action, [g1, g2], index, [self._participant(p1), self._participant(p2)], violations, score)
+
+    def _decode_bracket_record(self, offset):
+        action, metadata, score, *counts = BRACKET_RECORD.unpack_from(self._map, offset)
+        number_of_matches = self._layout_a
+        slots = struct.unpack_from(f"<{2 * number_of_matches}i", self._map, offset + BRACKET_RECORD.size)
+        matches = {}
+        for match_idx in range(1, number_of_matches + 1):
+            a, b = (self._participant(i) for i in slots[2 * match_idx - 2:2 * match_idx])
+            matches[match_idx] = [a, b] if b is not None else ([a] if a is not None else [])
+        return Snapshot(BRACKET_ACTIONS[action], [metadata] if metadata >= 0 else None, None, None,
+                        dict(zip(BRACKET_VIOLATIONS, counts)), score, initial_groups=matches)
+
+    def close(self):
+        self._map.close()
+
+
+def write_replay_record(file_path, kind, competition, competition_class, snapshots, fingerprint=None):
+    """Write the replay of a draw in replay mode (a GroupDrawReplay or BracketDrawReplay)."""
+    header = REPLAY_MAGIC + b" " + (fingerprint or "-").encode() + b"\n"
+    record = {"kind": kind, "competition": competition, "competition_class": competition_class, "snapshots": snapshots}
+    write_atomic(file_path, header + pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ReplayRecord:
+    """Replay record read back from a file, with the kind, competition, class and fingerprint attributes of a SnapshotFile.
+
+    Its snapshots are re-simulated on first access, raises ValueError if the file is not a replay record.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        try:
+            with open(file_path, "rb") as file:
+                magic, _, fingerprint = file.readline().rstrip(b"\n").partition(b" ")
+                if magic != REPLAY_MAGIC:
+                    raise ValueError(f"{file_path} is not a replay record")
+                record = pickle.load(file)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError) as e:
+            raise ValueError(f"{file_path} is not a replay record") from e
+        self.fingerprint = fingerprint.decode() if fingerprint not in (b"", b"-") else None
+        self.kind = record["kind"]
+        self.competition = record["competition"]
+        self.competition_class = record["competition_class"]
+        self.snapshots = record["snapshots"]
@@ -5,7 +5,6 @@ import logging
 import configparser
 from typing import List
 from models.draw_data import DrawDataRow
-from models.draw_data import seeding_by_start_numbers
 from models.snapshot import Snapshot
 from checks.bracket_checker import (
     score_bracket,
@@ -14,13 +13,21 @@ from checks.bracket_checker import (
     check_country_balance_halves,
     check_base_conflicts_first_round,
 )
+from draw.search_budget import read_budget_settings, SearchBudget
 from misc.config import config
 import copy
+from collections.abc import Sequence
 
-def draw_bracket(class_subset: list[DrawDataRow]):
+def draw_bracket(context, class_subset: list[DrawDataRow], seed=None, snapshot_mode=None, max_attempts=None, on_progress=None, on_budget=None, snapshot_interval=None):
     """
     Build a single-elimination bracket from seeded participants.
     class_subset: players advancing from groups
+    seed: optional seed for this bracket, defaults to the configured random seed (or a random one)
+    snapshot_mode: full, replay or off (default from config), see draw_groups_monte_carlo
+    max_attempts: optional number of improvement attempts, defaults to the configured value
+                  (sized adaptively if adaptive budgets are enabled, see draw/search_budget.py)
+    on_budget: called with a description of the adaptive budget decisions, if adaptive budgets are used
+    snapshot_interval: attempts between progress snapshots, defaults to a tenth of the attempt budget
     """
 
     def bye_hierarchy(num_slots: int) -> List[List[int]]:
@@ -44,18 +51,10 @@ def draw_bracket(class_subset: list[DrawDataRow]):
         return groups
 
     for entry in class_subset:
-        key = str(entry.start_number_a)
-        if entry.start_number_b is not None:
-            alternate_key = f"{entry.start_number_b}/{entry.start_number_a}"
-            key = f"{entry.start_number_a}/{entry.start_number_b}"
-            if key in seeding_by_start_numbers:
-                entry.seeding = seeding_by_start_numbers[key]
-            elif alternate_key in seeding_by_start_numbers:
-                entry.seeding = seeding_by_start_numbers[alternate_key]
-            else:
-                raise KeyError(f"Seeding key not found for participant: {key} or {alternate_key}")
-        else:
-            entry.seeding = seeding_by_start_numbers[key]
+        seeding = context.seeding_of(entry)
+        if seeding is None:
+            raise KeyError(f"Seeding not found for participant: {entry.start_number_a}" + (f"/{entry.start_number_b}" if entry.start_number_b is not None else ""))
+        entry.seeding = seeding
 
     class_subset.sort(key=lambda p: (p.group_pos, -p.seeding))
 
@@ -93,23 +92,29 @@ def draw_bracket(class_subset: list[DrawDataRow]):
         return {
             "half_group_separation": check_half_group_separation(current_matches, number_of_matches),
             "first_vs_first": check_no_first_vs_first(current_matches),
-            "country_balance": check_country_balance_halves(current_matches, number_of_matches),
-            "base_conflicts": check_base_conflicts_first_round(current_matches),
+            "country_balance": check_country_balance_halves(context, current_matches, number_of_matches),
+            "base_conflicts": check_base_conflicts_first_round(context, current_matches),
         }
 
-    max_attempts = 2000
-    try:
-        max_attempts = int(config.get("bracket_draw", {}).get("max_attempts", max_attempts))
-    except (TypeError, ValueError, KeyError, AttributeError, configparser.Error):
-        pass
-
-    rng = random.Random()
-    try:
-        seed = int(config["settings"].get("random_seed", "0"))
-        if seed:
-            rng.seed(seed)
-    except (TypeError, ValueError, KeyError, configparser.Error):
-        pass
+    budget_settings = read_budget_settings("bracket_draw") if max_attempts is None else None
+    if max_attempts is None:
+        max_attempts = 2000
+        try:
+            max_attempts = int(config.get("bracket_draw", {}).get("max_attempts", max_attempts))
+        except (TypeError, ValueError, KeyError, AttributeError, configparser.Error):
+            pass
+
+    snapshot_mode = snapshot_mode or config.get("settings", "snapshot_mode", fallback="replay")
+    if seed is None:
+        try:
+            seed = int(config["settings"].get("random_seed", "0"))
+        except (TypeError, ValueError, KeyError, configparser.Error):
+            seed = 0
+        if not seed:
+            seed = random.randrange(1 << 63)
+    rng = random.Random(seed)
+    # keep an untouched copy of the input for replays, the draw itself reorders the rows
+    replay_input = [copy.copy(p) for p in class_subset] if snapshot_mode == "replay" else None
 
     top_group_pos = min(p.group_pos for p in class_subset if p.group_pos is not None)
     top_participants = [p for p in class_subset if p.group_pos == top_group_pos]
@@ -125,7 +130,7 @@ def draw_bracket(class_subset: list[DrawDataRow]):
         if needs_bye:
             trial_state[opponent_slot(slot)] = "BYE"
         trial_matches = slots_to_matches(trial_state)
-        return score_bracket(trial_matches, number_of_matches), trial_matches
+        return score_bracket(context, trial_matches, number_of_matches), trial_matches
 
     def usable_slots_in_group(group, current_state, needs_bye):
         available = []
@@ -137,19 +142,17 @@ def draw_bracket(class_subset: list[DrawDataRow]):
             available.append(slot)
         return available
 
-    snapshots = []
+    record = snapshot_mode == "full"
+    snapshots = BracketDrawReplay(context, replay_input, seed, max_attempts, snapshot_interval) if snapshot_mode == "replay" else []
+
+    def add_snapshot(action, groups, participants, matches):
+        """Record a snapshot of the bracket, only evaluated when all snapshots are kept."""
+        if record:
+            snapshots.append(Snapshot(action, groups, None, participants, get_bracket_violations(matches),
+                                      score_bracket(context, matches, number_of_matches), initial_groups=copy.deepcopy(matches)))
+
     initial_matches = slots_to_matches(slot_state)
-    snapshots.append(
-        Snapshot(
-            "seed_start",
-            None,
-            None,
-            None,
-            get_bracket_violations(initial_matches),
-            score_bracket(initial_matches, number_of_matches),
-            initial_groups=copy.deepcopy(initial_matches),
-        )
-    )
+    add_snapshot("seed_start", None, None, initial_matches)
 
     def place_seeded_batch(participants, action_name):
         group_index = 0
@@ -191,17 +194,7 @@ def draw_bracket(class_subset: list[DrawDataRow]):
                 slot_state[bye_slot] = "BYE"
                 locked_slots.add(bye_slot)
 
-            snapshots.append(
-                Snapshot(
-                    action_name,
-                    [chosen_slot],
-                    None,
-                    [participant],
-                    get_bracket_violations(chosen_matches),
-                    score_bracket(chosen_matches, number_of_matches),
-                    initial_groups=copy.deepcopy(chosen_matches),
-                )
-            )
+            add_snapshot(action_name, [chosen_slot], [participant], chosen_matches)
 
             if candidate_group_index is not None:
                 group_index = candidate_group_index
@@ -210,17 +203,7 @@ def draw_bracket(class_subset: list[DrawDataRow]):
     place_seeded_batch(top_sorted, "top_seed_assign")
 
     post_top_matches = slots_to_matches(slot_state)
-    snapshots.append(
-        Snapshot(
-            "top_seed_complete",
-            sorted(locked_slots),
-            None,
-            list(top_sorted),
-            get_bracket_violations(post_top_matches),
-            score_bracket(post_top_matches, number_of_matches),
-            initial_groups=copy.deepcopy(post_top_matches),
-        )
-    )
+    add_snapshot("top_seed_complete", sorted(locked_slots), list(top_sorted), post_top_matches)
 
     remaining_bye_participants = [
         participant for participant in bye_recipients if participant.group_pos != top_group_pos
@@ -229,17 +212,7 @@ def draw_bracket(class_subset: list[DrawDataRow]):
         place_seeded_batch(remaining_bye_participants, "bye_assign")
 
     fixed_state_matches = slots_to_matches(slot_state)
-    snapshots.append(
-        Snapshot(
-            "seeded_byes",
-            sorted(locked_slots),
-            None,
-            list(top_sorted) + list(remaining_bye_participants),
-            get_bracket_violations(fixed_state_matches),
-            score_bracket(fixed_state_matches, number_of_matches),
-            initial_groups=copy.deepcopy(fixed_state_matches),
-        )
-    )
+    add_snapshot("seeded_byes", sorted(locked_slots), list(top_sorted) + list(remaining_bye_participants), fixed_state_matches)
 
     free_slots = [slot for slot in range(1, bracket_size + 1) if slot_state[slot] is None]
     remaining = [
@@ -256,89 +229,89 @@ def draw_bracket(class_subset: list[DrawDataRow]):
 
     participants_list = list(remaining)
     first_full_matches = build_matches_from_perm(participants_list)
-    first_full_violations = get_bracket_violations(first_full_matches)
-    first_full_score = score_bracket(first_full_matches, number_of_matches)
-
-    snapshots.append(
-        Snapshot(
-            "initial_fill",
-            None,
-            None,
-            None,
-            first_full_violations,
-            first_full_score,
-            initial_groups=copy.deepcopy(first_full_matches),
-        )
-    )
+    first_full_score = score_bracket(context, first_full_matches, number_of_matches)
+
+    add_snapshot("initial_fill", None, None, first_full_matches)
 
     best_score = first_full_score
     best_matches = copy.deepcopy(first_full_matches)
 
     if not remaining:
-        snapshots.append(
-            Snapshot(
-                "final",
-                None,
-                None,
-                None,
-                first_full_violations,
-                first_full_score,
-                initial_groups=copy.deepcopy(first_full_matches),
-            )
-        )
+        add_snapshot("final", None, None, first_full_matches)
         return first_full_matches, snapshots
 
-    snapshot_interval = max(1, max_attempts // 10)
+    budget = None
+    attempt_limit = max_attempts
+    if budget_settings is not None:
+        budget = SearchBudget(max_attempts, len(remaining), budget_settings)
+        budget.proceed(0, best_score)
+        attempt_limit = budget.limit if budget.decision is None else 0
+    if snapshot_interval is None:
+        snapshot_interval = max(1, (budget.budget if budget is not None else max_attempts) // 10)
 
-    for attempt in range(max_attempts):
+    for attempt in range(attempt_limit):
         perm = participants_list[:]
         rng.shuffle(perm)
         m_try = build_matches_from_perm(perm)
-        score = score_bracket(m_try, number_of_matches)
+        score = score_bracket(context, m_try, number_of_matches)
 
         if score < best_score:
             best_score = score
             best_matches = copy.deepcopy(m_try)
-            violations = get_bracket_violations(m_try)
-            snapshots.append(
-                Snapshot(
-                    "improvement",
-                    [attempt],
-                    None,
-                    None,
-                    violations,
-                    score,
-                    initial_groups=copy.deepcopy(m_try),
-                )
-            )
+            if on_progress is not None:
+                on_progress(best_score)
+            add_snapshot("improvement", [attempt], None, m_try)
             if best_score == 0:
+                if budget is not None:
+                    budget.proceed(attempt + 1, best_score)
                 break
         elif attempt % snapshot_interval == 0:
-            violations = get_bracket_violations(m_try)
-            snapshots.append(
-                Snapshot(
-                    "progress",
-                    [attempt],
-                    None,
-                    None,
-                    violations,
-                    score,
-                    initial_groups=copy.deepcopy(m_try),
-                )
-            )
-
-    final_violations = get_bracket_violations(best_matches)
-    final_score = score_bracket(best_matches, number_of_matches)
-    snapshots.append(
-        Snapshot(
-            "final",
-            None,
-            None,
-            None,
-            final_violations,
-            final_score,
-            initial_groups=copy.deepcopy(best_matches),
-        )
-    )
+            add_snapshot("progress", [attempt], None, m_try)
+        if budget is not None and not budget.proceed(attempt + 1, best_score):
+            break
+
+    if budget is not None:
+        if isinstance(snapshots, BracketDrawReplay):
+            # replay exactly the attempts of this draw, independent of the budget settings at replay time
+            snapshots.max_attempts = budget.iterations
+            snapshots.snapshot_interval = snapshot_interval
+        if on_budget is not None:
+            on_budget(f"{len(remaining)} participants to place, {budget.initial_budget} attempts: {budget.describe()}")
+    add_snapshot("final", None, None, best_matches)
 
     return best_matches, snapshots
+
+
+class BracketDrawReplay(Sequence):
+    """Snapshots of a bracket draw, regenerated by re-running the seeded draw on first access.
+
+    max_attempts is the number of attempts the draw actually made if its budget was adaptive.
+    """
+    # replays stored before adaptive budgets existed
+    snapshot_interval = None
+
+    def __init__(self, context, class_subset, seed, max_attempts, snapshot_interval=None):
+        self.context = context
+        self.class_subset = class_subset
+        self.seed = seed
+        self.max_attempts = max_attempts
+        self.snapshot_interval = snapshot_interval
+        self._snapshots = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_snapshots"] = None
+        state["context"] = self.context.for_participants(self.class_subset)
+        return state
+
+    def _replayed(self):
+        if self._snapshots is None:
+            participants = [copy.copy(p) for p in self.class_subset]
+            _, self._snapshots = draw_bracket(self.context, participants, self.seed, "full", self.max_attempts, snapshot_interval=self.snapshot_interval)
+        return self._snapshots
+
+    def __len__(self):
+        return len(self._replayed())
+
+    def __getitem__(self, index):
+        return self._replayed()[index]
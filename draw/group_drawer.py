@@ -1,9 +1,13 @@
 """Module to handle drawing of groups with country conflict avoidance."""
+import math
 import random
 import copy
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence
 from models.draw_data import DrawDataRow
 from models.snapshot import Snapshot
-from checks.group_checker import check_base_uniqueness, check_country_distribution, get_qttr_violations, check_team_country_distribution
+from checks.group_checker import check_base_uniqueness, check_country_distribution, get_qttr_violations, check_team_country_distribution, GroupViolationCounts
+from draw.search_budget import read_budget_settings, size_factor, SearchBudget, RetryBudget
 from misc.config import config
 
 # Define a safe EmptySlot class
@@ -22,143 +26,488 @@ class EmptySlot:
         # EmptySlot is stateless, so just return a new instance
         return type(self)()
 
-def draw_groups_monte_carlo(class_subset: list[DrawDataRow], amount_of_groups):
-    """Draw groups for a competition class using Monte Carlo optimization to minimize country conflicts.
-    Retries with different random seeds if the score is not 0, up to a configurable limit.
+def read_group_draw_settings():
+    """Read the tuning parameters of the group draw from the config."""
+    section = config["group_draw"]
+    return {
+        "max_iterations": int(section["max_iterations"]),
+        "max_no_improvement_iterations": int(section["max_no_improvement_iterations"]),
+        "max_escape_attempts": int(section["max_escape_attempts"]),
+        "max_seed_retries": int(section.get("max_seed_retries", 5)),
+        "initial_assignment": section.get("initial_assignment", "greedy"),
+        "country_violation_weight": int(section["country_violation_weight"]),
+        "team_country_violation_weight": int(section["team_country_violation_weight"]),
+        "base_violation_weight": int(section["base_violation_weight"]),
+        "qttr_violation_weight": int(section["qttr_violation_weight"]),
+    }
+
+def get_violations(context, groups):
+    """Run all group checks relevant for the competition of the given groups."""
+    competition = groups[1][0].competition
+    violations = {}
+    violations["country"] = check_country_distribution(context, competition, groups)
+    violations["base"] = check_base_uniqueness(context, groups)
+    violations["qttr"] = get_qttr_violations(context, groups) if (competition == 'S') else []
+    violations["team_country"] = check_team_country_distribution(context, groups) if (competition in ('D', 'M')) else []
+    return violations
+
+def calculate_violation_score(violations, settings):
+    """Weighted number of violations, lower is better."""
+    return violation_count_score({rule: len(found) for rule, found in violations.items()}, settings)
+
+def violation_count_score(counts, settings):
+    """Weighted number of violations from the number of violations per rule."""
+    return (
+        counts["country"] * settings["country_violation_weight"]
+        + counts["team_country"] * settings["team_country_violation_weight"]
+        + counts["base"] * settings["base_violation_weight"]
+        + counts["qttr"] * settings["qttr_violation_weight"]
+    )
+
+def violation_score_lower_bound(context, class_subset, amount_of_groups, settings):
+    """Lowest violation score any assignment of the class can reach.
+
+    A base with k participants in more than one group each, spread over pots of which every group
+    takes one participant, must share groups: x groups holding participants of p pots of the base
+    take at most x * p + (groups - x) of them, so x >= (k - groups) / (p - 1).
     """
-    max_iterations = int(config["group_draw"]["max_iterations"])
-    max_no_improvement_iterations = int(config["group_draw"]["max_no_improvement_iterations"])
-    max_escape_attempts = int(config["group_draw"]["max_escape_attempts"])
-    max_seed_retries = int(config["group_draw"].get("max_seed_retries", 5))
+    participants = sorted(class_subset, key=lambda d: d.seeding, reverse=True)
+    pots_per_base = defaultdict(set)
+    participants_per_base = defaultdict(int)
+    for index, row in enumerate(participants):
+        if row.start_number_b is not None:
+            bases = context.team_of(row).base_ids
+        else:
+            base_id = context.players_by_start_number[row.start_number_a].base_id
+            bases = (base_id,) if base_id is not None else ()
+        for base in bases:
+            participants_per_base[base] += 1
+            pots_per_base[base].add(index // amount_of_groups)
+    shared_groups = sum(math.ceil((count - amount_of_groups) / (len(pots_per_base[base]) - 1))
+                        for base, count in participants_per_base.items() if count > amount_of_groups)
+    return shared_groups * settings["base_violation_weight"]
 
-    best_groups = None
-    best_snapshots = None
-    best_score = float("inf")
+def calc_max_group_size(num_participants: int, num_groups: int) -> int:
+    return -(-num_participants // num_groups)
+
+
+def previous_group(initial_groups, participant):
+    """Group of a participant in initial_groups (pairs may be listed in either order), None if unknown."""
+    group_no = initial_groups.get((participant.start_number_a, participant.start_number_b))
+    if group_no is None and participant.start_number_b is not None:
+        group_no = initial_groups.get((participant.start_number_b, participant.start_number_a))
+    return group_no
+
+def warm_start_batch(batch, initial_groups, group_nos):
+    """Place the participants of one batch into their previous groups, repairing the assignment.
+
+    Every group takes at most one participant per batch. If several participants of the batch
+    were in the same group before (e.g. after a withdrawal moved participants into another
+    batch), the higher seeded one keeps it. New entries and displaced participants fill the
+    remaining groups in order. Returns group_no -> participant.
+    """
+    placement = {}
+    unplaced = []
+    for participant in batch:
+        group_no = previous_group(initial_groups, participant)
+        if group_no in group_nos and group_no not in placement:
+            placement[group_no] = participant
+        else:
+            unplaced.append(participant)
+    free_groups = [group_no for group_no in group_nos if group_no not in placement]
+    for participant, group_no in zip(unplaced, free_groups):
+        placement[group_no] = participant
+    return placement
+
+def greedy_batch(batch, counts, group_nos, rng, settings):
+    """Place the participants of one batch, in seeding order, into the groups with the lowest marginal violation score.
+
+    counts holds the violation counts of everything placed so far and is updated with every
+    placement. Every group takes at most one participant per batch; ties between equally good
+    groups are broken randomly. Returns group_no -> participant.
+    """
+    placement = {}
+    for participant in batch:
+        best_score = None
+        best_groups = []
+        for group_no in group_nos:
+            if group_no in placement:
+                continue
+            counts.add(participant, group_no)
+            score = violation_count_score(counts.counts(), settings)
+            counts.remove(participant, group_no)
+            if best_score is None or score < best_score:
+                best_score = score
+                best_groups = [group_no]
+            elif score == best_score:
+                best_groups.append(group_no)
+        group_no = rng.choice(best_groups)
+        counts.add(participant, group_no)
+        placement[group_no] = participant
+    return placement
+
+class GroupSearch:
+    """One Monte Carlo search for a group assignment, driven only by its own seed.
+
+    Every call to `step` performs one iteration. If `record` is set, the snapshots produced by
+    the iteration are appended to `snapshots`. The complete search state can be saved and
+    restored, which allows re-simulating any part of the search deterministically.
+
+    With initial_groups ((start number A, start number B) -> group_no, e.g. of a previous draw),
+    the search starts from that assignment, repaired by warm_start_batch. Otherwise the top seeds
+    are placed into groups 1, 2, ... and, with the greedy initial assignment, the remaining batches
+    are filled by greedy_batch, so the search only has to resolve the conflicts that are left.
+
+    Swaps are scored with incrementally updated violation counts; the violations themselves are
+    only listed for snapshots and otherwise computed when they are accessed.
+    """
+    def __init__(self, context, class_subset: list[DrawDataRow], amount_of_groups, seed, settings, record=False, initial_groups=None):
+        self.context = context
+        self.rng = random.Random(seed)
+        self.settings = settings
+        self.record = record
+        self.snapshots = []
 
-    for _ in range(max_seed_retries):
-        seed = random.randint(1, 99999999)
-        random.seed(seed)
-
-        snapshots = []
-        def snapshot_delta(action: str, groups: list[int], index_in_group: int, participants: list[DrawDataRow], violations, violation_score):
-            snapshots.append(Snapshot(action, groups, index_in_group, participants, violations, violation_score))
-
-        def get_violations(groups):
-            competition = groups[1][0].competition
-            violations = {}
-            violations["country"] = check_country_distribution(competition, groups)
-            violations["base"] = check_base_uniqueness(groups)
-            violations["qttr"] = get_qttr_violations(groups) if (competition == 'S') else []     
-            violations["team_country"] = check_team_country_distribution(groups) if (competition in ('D', 'M')) else []
-            return violations
-
-        def calculate_violation_score(violations):
-            country_violations = violations["country"]
-            country_violation_weight = int(config["group_draw"]["country_violation_weight"])
-            team_country_violations = violations["team_country"]
-            team_country_violation_weight = int(config["group_draw"]["team_country_violation_weight"])
-            base_violations = violations["base"]
-            base_violation_weight = int(config["group_draw"]["base_violation_weight"])
-            qttr_violations = violations["qttr"]
-            qttr_violation_weight = int(config["group_draw"]["qttr_violation_weight"])
-            return (
-                len(country_violations) * country_violation_weight
-                + len(team_country_violations) * team_country_violation_weight
-                + len(base_violations) * base_violation_weight
-                + len(qttr_violations) * qttr_violation_weight
-            )
-
-        def calc_max_group_size(num_participants: int, num_groups: int) -> int:
-            return -(-num_participants // num_groups)
-        
         class_subset.sort(key=lambda d: d.seeding, reverse=True)
         max_group_size = calc_max_group_size(len(class_subset), amount_of_groups)
-        groups = {i + 1: [] for i in range(amount_of_groups)}
+        self.groups = {i + 1: [] for i in range(amount_of_groups)}
 
-        # Deterministic batch assignment
-        batches = []
+        # Batch assignment: warm start, greedy (randomized by the seed) or deterministic
+        self.batches = []
+        construction_counts = None
         for i in range(0, len(class_subset), amount_of_groups):
             batch = class_subset[i:i + amount_of_groups]
-            batches.append(batch)
+            self.batches.append(batch)
+            placement = None
+            if initial_groups:
+                placement = warm_start_batch(batch, initial_groups, list(self.groups))
+            elif i > 0 and settings.get("initial_assignment") == "greedy":
+                if construction_counts is None:
+                    construction_counts = GroupViolationCounts(context, batch[0].competition, self.groups)
+                placement = greedy_batch(batch, construction_counts, list(self.groups), self.rng, settings)
+            if placement is not None:
+                for group_no, members in self.groups.items():
+                    members.append(placement.get(group_no) or EmptySlot())
+                continue
             for j, participant in enumerate(batch):
                 group_no = j + 1
-                groups[group_no].append(participant)
+                self.groups[group_no].append(participant)
+
+        # groups of the warm start, kept stable by swaps that do not change the score
+        self.anchor = {(p.start_number_a, p.start_number_b): group_no for group_no, members in self.groups.items()
+                       for p in members if not isinstance(p, EmptySlot)} if initial_groups else None
 
         # Fill up groups with EmptySlot for empty slots
+        for group_no in self.groups:
+            while len(self.groups[group_no]) < max_group_size:
+                self.groups[group_no].append(EmptySlot())
+
+        self._violations = get_violations(context, self.groups)
+        self.counts = GroupViolationCounts(context, self.groups[1][0].competition, self.groups)
+        self.score = violation_count_score(self.counts.counts(), settings)
+        self.iteration = 0
+        self.no_improvement_count = 0
+        self.escape_attempts = 0
+        self.finished = self.score == 0
+
+    @property
+    def violations(self):
+        """Violations of the search state (None internally stands for those of the current groups)."""
+        if self._violations is None:
+            self._violations = get_violations(self.context, self.groups)
+        return self._violations
+
+    def initial_snapshot(self):
+        return Snapshot(None, None, None, None, self.violations, self.score, initial_groups=copy.deepcopy(self.groups))
+
+    def _snapshot(self, action, groups, index_in_group, participants, violations, violation_score):
+        if self.record:
+            self.snapshots.append(Snapshot(action, groups, index_in_group, participants, violations, violation_score))
+        return 1
+
+    def step(self) -> int:
+        """Perform one iteration of the Monte Carlo optimization with escape from local minima.
+
+        Returns the number of snapshots the iteration produced.
+        """
+        self.iteration += 1
+        if self.iteration >= self.settings["max_iterations"]:
+            self.finished = True
+        groups = self.groups
+
+        # Choose a batch randomly, never swap first batch
+        batch_idx = self.rng.randint(1, len(self.batches) - 1)
+        # Find group slots for this batch, but never swap the first batch (index 0)
+        batch_slots = []
         for group_no in groups:
-            while len(groups[group_no]) < max_group_size:
-                groups[group_no].append(EmptySlot())
-
-        # Monte Carlo optimization with escape from local minima
-        current_violations = get_violations(groups)
-        current_violation_score = calculate_violation_score(current_violations)
-        snapshots.append(Snapshot(None, None, None, None, current_violations, current_violation_score, initial_groups=copy.deepcopy(groups)))
-
-        no_improvement_count = 0
-        escape_attempts = 0
-
-        for _ in range(max_iterations):
-            # Choose a batch randomly, never swap first batch
-            batch_idx = random.randint(1, len(batches) - 1)
-            batch = batches[batch_idx]
-            # Find group slots for this batch, but never swap the first batch (index 0)
-            batch_slots = []
-            for group_no in groups:
-                if batch_idx < len(groups[group_no]):
-                    batch_slots.append((group_no, batch_idx))
-            # Only swap if there are at least two eligible slots
-            if len(batch_slots) < 2:
-                continue
-            slot1, slot2 = random.sample(batch_slots, 2)
-            g1, idx1 = slot1
-            g2, idx2 = slot2
-            if idx1 != idx2:
-                raise IndexError("This should never happen. Can only swap same index in different groups.")
-            p1 = groups[g1][idx1]
-            p2 = groups[g2][idx2]
-            # Swap
-            groups[g1][idx1], groups[g2][idx2] = p2, p1
-            new_violations = get_violations(groups)
-            new_violation_score = calculate_violation_score(new_violations)
-            snapshot_delta("swap", [g1, g2], idx1, [p1, p2], new_violations, new_violation_score)
-
-            if new_violation_score < current_violation_score:
-                current_violation_score = new_violation_score
-                current_violations = new_violations
-                no_improvement_count = 0
-                escape_attempts = 0  # Only reset on improvement!
-                if current_violation_score == 0:
-                    break
-            elif new_violation_score == current_violation_score:
-                no_improvement_count += 1
-                current_violations = new_violations
-                current_violation_score = new_violation_score
-                # escape_attempts unchanged
-            else:
-                # Bad swap: only allow if stuck in local minimum
-                if no_improvement_count >= max_no_improvement_iterations and escape_attempts < max_escape_attempts:
-                    escape_attempts += 1
-                    # Accept the bad swap, but don't reset no_improvement_count
-                    current_violation_score = new_violation_score
-                else:
-                    # Revert swap
+            if batch_idx < len(groups[group_no]):
+                batch_slots.append((group_no, batch_idx))
+        # Only swap if there are at least two eligible slots
+        if len(batch_slots) < 2:
+            return 0
+        slot1, slot2 = self.rng.sample(batch_slots, 2)
+        g1, idx1 = slot1
+        g2, idx2 = slot2
+        if idx1 != idx2:
+            raise IndexError("This should never happen. Can only swap same index in different groups.")
+        p1 = groups[g1][idx1]
+        p2 = groups[g2][idx2]
+        # Swap
+        groups[g1][idx1], groups[g2][idx2] = p2, p1
+        self.counts.swap(p1, g1, p2, g2)
+        new_violations = get_violations(self.context, groups) if self.record else None
+        new_violation_score = violation_count_score(self.counts.counts(), self.settings)
+        produced = self._snapshot("swap", [g1, g2], idx1, [p1, p2], new_violations, new_violation_score)
+
+        if new_violation_score < self.score:
+            self.score = new_violation_score
+            self._violations = new_violations
+            self.no_improvement_count = 0
+            self.escape_attempts = 0  # Only reset on improvement!
+            if self.score == 0:
+                self.finished = True
+        elif new_violation_score == self.score and not self._moves_away(p1, g1, p2, g2):
+            self.no_improvement_count += 1
+            self._violations = new_violations
+            self.score = new_violation_score
+            # escape_attempts unchanged
+        else:
+            # Bad swap: only allow if stuck in local minimum
+            if new_violation_score > self.score and self.no_improvement_count >= self.settings["max_no_improvement_iterations"] and self.escape_attempts < self.settings["max_escape_attempts"]:
+                self.escape_attempts += 1
+                if self._violations is None:
+                    # the violations stay those from before the swap
                     groups[g1][idx1], groups[g2][idx2] = p1, p2
-                    snapshot_delta("revert", [g1, g2], idx1, [p1, p2], current_violations, current_violation_score)
-                    no_improvement_count += 1
+                    self._violations = get_violations(self.context, groups)
+                    groups[g1][idx1], groups[g2][idx2] = p2, p1
+                # Accept the bad swap, but don't reset no_improvement_count
+                self.score = new_violation_score
+            else:
+                # Revert swap
+                groups[g1][idx1], groups[g2][idx2] = p1, p2
+                self.counts.swap(p2, g1, p1, g2)
+                produced += self._snapshot("revert", [g1, g2], idx1, [p1, p2], self.violations, self.score)
+                self.no_improvement_count += 1
+        return produced
 
-        # Remove EmptySlot placeholders from groups
-        for group_no in groups:
-            groups[group_no] = [p for p in groups[group_no] if not isinstance(p, EmptySlot)]
+    def _moves_away(self, p1, g1, p2, g2):
+        """Whether swapping p1 from g1 to g2 and p2 from g2 to g1 moves participants out of their warm-start groups.
+
+        Swaps that do not change the score are only accepted if they keep the warm-started groups stable.
+        """
+        if not self.anchor:
+            return False
+        def away(participant, group_no):
+            anchor = self.anchor.get((participant.start_number_a, participant.start_number_b))
+            return anchor is not None and anchor != group_no
+        return away(p1, g2) + away(p2, g1) > away(p1, g1) + away(p2, g2)
+
+    def save_state(self):
+        """Return a compact copy of the search state (group lists, counters and RNG state)."""
+        return ({g: list(members) for g, members in self.groups.items()}, self.rng.getstate(), self.violations, self.score,
+                self.iteration, self.no_improvement_count, self.escape_attempts, self.finished)
+
+    def restore_state(self, state):
+        groups, rng_state, self._violations, self.score, self.iteration, self.no_improvement_count, self.escape_attempts, self.finished = state
+        self.groups = {g: list(members) for g, members in groups.items()}
+        self.counts = GroupViolationCounts(self.context, self.groups[1][0].competition, self.groups)
+        self.rng.setstate(rng_state)
+
+    def result(self):
+        """Return the current groups without EmptySlot placeholders."""
+        return {group_no: [p for p in members if not isinstance(p, EmptySlot)] for group_no, members in self.groups.items()}
+
+
+class GroupDrawReplay(Sequence):
+    """Snapshots of a group draw, regenerated on demand by re-running the deterministic search.
+
+    Only the seed of the retry and a few saved search states are kept. Accessing a snapshot
+    restores the nearest saved state before it and re-simulates the search up to that point;
+    stepping forward continues the running search, so sequential access is cheap.
+    """
+    WINDOW_SIZE = 256
+    # replays stored before warm starts existed
+    initial_groups = None
+
+    def __init__(self, context, class_subset, amount_of_groups, seed, settings, length, checkpoints, initial_groups=None):
+        self.context = context
+        self.initial_groups = initial_groups
+        self.class_subset = list(class_subset)
+        self.amount_of_groups = amount_of_groups
+        self.seed = seed
+        self.settings = settings
+        self.length = length
+        self.checkpoints = checkpoints  # list of (snapshot index, search state), ascending
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._search = None
+        self._position = 0
+        self._window = OrderedDict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ("_search", "_position", "_window"):
+            state.pop(key)
+        state["context"] = self.context.for_participants(self.class_subset)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_cache()
+
+    def __len__(self):
+        return self.length
+
+    def _new_search(self):
+        return GroupSearch(self.context, list(self.class_subset), self.amount_of_groups, self.seed, self.settings, record=True, initial_groups=self.initial_groups)
+
+    def _seek(self, index):
+        """Position the search so that the snapshot at index has just been produced."""
+        if index in self._window:
+            return
+        start_index, state = max(((i, s) for i, s in self.checkpoints if i <= index), key=lambda c: c[0])
+        if self._search is None or index < self._position or start_index > self._position:
+            self._search = self._new_search()
+            self._search.restore_state(state)
+            self._position = start_index
+            self._window.clear()
+        search = self._search
+        while self._position <= index:
+            if search.finished:
+                raise IndexError("replay ended before the requested snapshot")
+            search.step()
+            for snapshot in search.snapshots:
+                self._window[self._position] = snapshot
+                self._position += 1
+            search.snapshots.clear()
+            while len(self._window) > self.WINDOW_SIZE:
+                self._window.popitem(last=False)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("snapshot index out of range")
+        if index == 0:
+            return self._new_search().initial_snapshot()
+        self._seek(index)
+        return self._window[index]
+
+    def groups_at(self, index):
+        """Return the group assignment (including empty slots) right after the snapshot at index."""
+        if index == 0:
+            return {g: list(members) for g, members in self._new_search().groups.items()}
+        # the search state is only valid for the last iteration, otherwise re-simulate up to index
+        ends_last_iteration = index == self._position - 1 or (index == self._position - 2 and self._window.get(index + 1) is not None
+                                                               and self._window[index + 1].action == "revert")
+        if not ends_last_iteration:
+            self._reset_cache()
+        snapshot = self[index]
+        groups = {g: list(members) for g, members in self._search.groups.items()}
+        if index < self._position - 1 and snapshot.action == "swap":
+            # the swap was reverted later in the same iteration
+            g1, g2 = snapshot.groups
+            p1, p2 = snapshot.participants
+            groups[g1][snapshot.index], groups[g2][snapshot.index] = p2, p1
+        return groups
+
+
+def draw_groups_monte_carlo(context, class_subset: list[DrawDataRow], amount_of_groups, seed=None, snapshot_mode=None, on_progress=None, initial_groups=None, on_budget=None):
+    """Draw groups for a competition class using Monte Carlo optimization to minimize country conflicts.
+    Retries with different random seeds if the score is not 0, up to a configurable limit.
+
+    The draw only depends on the seed and the input. Without a seed, a random one is chosen.
+    snapshot_mode (default from config) decides what is returned as snapshots:
+      full   - a list of all snapshots of the best retry
+      replay - a GroupDrawReplay that regenerates the snapshots of the best retry on demand
+      off    - an empty list
+    on_progress, if given, is called with the lowest violation score seen so far whenever it drops.
+    initial_groups, if given, warm-starts every retry from a previous assignment, see GroupSearch.
+    With adaptive budgets (see draw/search_budget.py), on_budget, if given, is called with a description
+    of the budgets and stopping decisions of the class.
+    """
+    settings = read_group_draw_settings()
+    snapshot_mode = snapshot_mode or config.get("settings", "snapshot_mode", fallback="replay")
+    budget_settings = read_budget_settings("group_draw")
+    lower_bound = 0
+    if budget_settings is not None:
+        # searches run up to the hard limit, their budget object decides when they stop
+        factor = size_factor(len(class_subset), budget_settings)
+        lower_bound = violation_score_lower_bound(context, class_subset, amount_of_groups, settings)
+        retry_budget = RetryBudget(settings["max_seed_retries"], budget_settings, lower_bound)
+        search_settings = dict(settings, max_no_improvement_iterations=max(1, round(settings["max_no_improvement_iterations"] * factor)),
+                               max_iterations=round(settings["max_iterations"] * budget_settings["max_budget_factor"]))
+        iterations_per_search = max(1, round(settings["max_iterations"] * factor))
+        checkpoint_interval = max(1, iterations_per_search // 10)
+    else:
+        search_settings = settings
+        checkpoint_interval = max(1, settings["max_iterations"] // 10)
+    if seed is None:
+        seed = random.randrange(1 << 63)
+    rng = random.Random(seed)
+
+    best_groups = None
+    best_snapshots = []
+    best_score = float("inf")
+    lowest_seen = float("inf")
+    searches = 0
+    search_reports = []
+
+    def report_progress(score):
+        nonlocal lowest_seen
+        if on_progress is not None and score < lowest_seen:
+            lowest_seen = score
+            on_progress(score)
+
+    retry_limit = retry_budget.limit if budget_settings is not None else settings["max_seed_retries"]
+    for _ in range(retry_limit):
+        retry_seed = rng.randint(1, 99999999)
+        search = GroupSearch(context, class_subset, amount_of_groups, retry_seed, search_settings, record=(snapshot_mode == "full"), initial_groups=initial_groups)
+        budget = SearchBudget(settings["max_iterations"], len(class_subset), budget_settings, lower_bound) if budget_settings is not None else None
+        snapshots = [search.initial_snapshot()] if snapshot_mode == "full" else []
+        checkpoints = [(1, search.save_state())] if snapshot_mode == "replay" else None
+        snapshot_count = 1
+        report_progress(search.score)
+
+        while not search.finished:
+            if checkpoints is not None and search.iteration % checkpoint_interval == 0 and search.iteration > 0:
+                checkpoints.append((snapshot_count, search.save_state()))
+            snapshot_count += search.step()
+            report_progress(search.score)
+            if search.record:
+                snapshots.extend(search.snapshots)
+                search.snapshots.clear()
+            if budget is not None and not search.finished and not budget.proceed(search.iteration, search.score):
+                search.finished = True
+        searches += 1
+        if budget is not None:
+            if budget.decision is None:
+                # the search ended by itself (score 0 or its hard limit)
+                budget.proceed(search.iteration, search.score)
+            search_reports.append(budget.describe())
 
         # Track best result
-        if current_violation_score < best_score:
-            best_score = current_violation_score
-            best_groups = copy.deepcopy(groups)
-            best_snapshots = list(snapshots)
-        if best_score == 0:
+        if search.score < best_score:
+            best_score = search.score
+            best_groups = search.result()
+            if snapshot_mode == "replay":
+                best_snapshots = GroupDrawReplay(context, class_subset, amount_of_groups, retry_seed, search_settings, snapshot_count, checkpoints, initial_groups)
+            else:
+                best_snapshots = snapshots
+        if budget_settings is not None:
+            if not retry_budget.proceed(search.score):
+                break
+        elif best_score == 0:
             break  # Early exit if perfect solution found
 
+    if on_budget is not None and budget_settings is not None:
+        on_budget(f"{len(class_subset)} participants, {iterations_per_search} iterations per search "
+                  f"(lower bound {lower_bound}); {searches} search(es), stopped: {retry_budget.decision}; "
+                  + "searches: " + ", ".join(search_reports))
     if best_score > 0:
-        print(f"Warning: Could not achieve perfect group draw after {max_seed_retries} seed attempts. Best score: {best_score}")
-    
-    return best_groups, best_snapshots
\ No newline at end of file
+        print(f"Warning: Could not achieve perfect group draw after {searches} seed attempts. Best score: {best_score}")
+
+    return best_groups, best_snapshots
@@ -0,0 +1,105 @@
+"""Adaptive iteration budgets of the group and bracket searches.
+
+The configured budgets (max_iterations of the group search, max_attempts of the bracket search)
+are meant for a class of reference_class_size participants. With adaptive budgets, every search
+gets a budget scaled with the size of its class and is then steered by its own progress:
+
+- it stops as soon as its best score reaches a lower bound of the class (0 or a bound from the input),
+- it stops early once its best score did not improve within the last plateau window,
+- at the end of its budget it is extended by one window as long as its best score still improved
+  within the last window, up to max_budget_factor times the configured budget.
+
+Searches over further seeds stop after retry_patience of them brought no better result. All
+decisions only depend on the scores of the search, so seeded draws stay reproducible.
+"""
+import math
+from misc.config import config
+
+
+def read_budget_settings(section_name):
+    """Read the adaptive budget options of a draw section, None if adaptive budgets are disabled."""
+    if not config.has_section(section_name):
+        return None
+    section = config[section_name]
+    if not section.getboolean("adaptive_budget", fallback=False):
+        return None
+    return {
+        "reference_class_size": int(section.get("reference_class_size", 32)),
+        "min_budget_factor": float(section.get("min_budget_factor", 0.25)),
+        "max_budget_factor": float(section.get("max_budget_factor", 2)),
+        "plateau_share": float(section.get("plateau_share", 0.5)),
+        "retry_patience": int(section.get("retry_patience", 3)),
+    }
+
+
+def size_factor(class_size, budget_settings) -> float:
+    """Factor by which the configured budget is scaled for a class of class_size participants."""
+    factor = class_size / budget_settings["reference_class_size"]
+    return min(max(factor, budget_settings["min_budget_factor"]), budget_settings["max_budget_factor"])
+
+
+class SearchBudget:
+    """Iteration budget of a single search, updated with the score after every iteration."""
+    def __init__(self, configured, class_size, budget_settings, lower_bound=0):
+        self.budget = max(1, round(configured * size_factor(class_size, budget_settings)))
+        self.initial_budget = self.budget
+        self.limit = max(self.budget, round(configured * budget_settings["max_budget_factor"]))
+        self.window = max(1, round(self.budget * budget_settings["plateau_share"]))
+        self.lower_bound = lower_bound
+        self.best_score = math.inf
+        self.best_iteration = 0
+        self.iterations = 0
+        self.extensions = 0
+        self.decision = None
+
+    def proceed(self, iteration, score) -> bool:
+        """Record the score after the given iteration (counted from 1) and decide whether to go on."""
+        self.iterations = iteration
+        if score < self.best_score:
+            self.best_score = score
+            self.best_iteration = iteration
+        if self.best_score <= self.lower_bound:
+            self.decision = "lower bound reached"
+            return False
+        if iteration - self.best_iteration >= self.window:
+            self.decision = "plateau"
+            return False
+        if iteration >= self.budget:
+            # the best score improved within the last window, otherwise the plateau stopped the search
+            if self.budget >= self.limit:
+                self.decision = "budget exhausted"
+                return False
+            self.budget = min(self.budget + self.window, self.limit)
+            self.extensions += 1
+        return True
+
+    def describe(self) -> str:
+        """Short description of the decision, e.g. "plateau at 1200" or "budget exhausted at 9000 (extended 3x)"."""
+        extended = f" (extended {self.extensions}x)" if self.extensions else ""
+        return f"{self.decision or 'finished'} at {self.iterations}{extended}"
+
+
+class RetryBudget:
+    """Number of searches with new seeds: stops at the lower bound or after retry_patience searches without a better result."""
+    def __init__(self, configured, budget_settings, lower_bound=0):
+        self.limit = max(1, round(configured * budget_settings["max_budget_factor"]))
+        self.patience = budget_settings["retry_patience"]
+        self.lower_bound = lower_bound
+        self.best_score = math.inf
+        self.best_retry = 0
+        self.retries = 0
+        self.decision = None
+
+    def proceed(self, score) -> bool:
+        """Record the result of the search that just ended and decide whether to start another one."""
+        self.retries += 1
+        if score < self.best_score:
+            self.best_score = score
+            self.best_retry = self.retries
+        if self.best_score <= self.lower_bound:
+            self.decision = "lower bound reached"
+        elif self.retries - self.best_retry >= self.patience:
+            self.decision = "no better result"
+        elif self.retries >= self.limit:
+            self.decision = "retries exhausted"
+        return self.decision is None
@@ -0,0 +1,204 @@
+"""Module to compute group standings from group match results and derive the bracket input from them.
+
+Participants are ranked by match points (2 for a win, 1 for a played loss, 0 for a walkover loss).
+Participants with equal match points are separated using only the matches among themselves: by
+match points, then by the ratio of games won to lost, then by the ratio of points won to lost. As
+soon as a criterion separates some of them, every remaining tie is decided again from the first
+criterion, using only the matches among the participants that are still tied. Ties that cannot be
+separated this way are decided by seeding, then by start number.
+
+The results of all groups of all classes are held in one array sorted by group, so the totals of
+every participant are computed with a few array operations and a tie only looks at the matches of
+its own group.
+"""
+import numpy as np
+from models.draw_data import DrawDataRow
+from misc.config import config
+
+WIN_POINTS = 2
+LOSS_POINTS = 1
+WALKOVER_LOSS_POINTS = 0
+
+# columns of the match array
+GROUP, P1, P2, MATCH_POINTS_1, MATCH_POINTS_2, GAMES_1, GAMES_2, POINTS_1, POINTS_2 = range(9)
+
+
+class StandingsError(ValueError):
+    """Raised if group results do not fit the drawn groups, listing every offending result."""
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} group result(s) do not fit the drawn groups")
+
+    def __str__(self):
+        return "\n".join([super().__str__()] + [f"  {error}" for error in self.errors])
+
+
+def read_standings_settings():
+    """Read which group positions qualify for the main round and the consolation round."""
+    def positions(option, fallback):
+        value = config.get("standings", option, fallback=fallback)
+        return frozenset(int(position) for position in value.replace(",", " ").split())
+    return {
+        "main_round_positions": positions("main_round_positions", "1 2"),
+        "consolation_positions": positions("consolation_positions", "3 4"),
+    }
+
+
+def _ratio(won, lost):
+    """Won/lost ratio per participant; infinite if nothing was lost, 0 if nothing was played."""
+    ratio = np.where(won > 0, np.inf, 0.0)
+    np.divide(won, lost, out=ratio, where=lost > 0)
+    return ratio
+
+
+def _mini_table(tied, matches):
+    """Return the tie-break criteria (match points, games ratio, points ratio) of the tied participants.
+
+    Only matches between two of the tied participants count.
+    """
+    size = len(tied)
+    sorted_tied = np.sort(tied)
+    among = matches[np.isin(matches[:, P1], sorted_tied) & np.isin(matches[:, P2], sorted_tied)]
+    side_1 = np.searchsorted(sorted_tied, among[:, P1])
+    side_2 = np.searchsorted(sorted_tied, among[:, P2])
+    position = np.searchsorted(sorted_tied, tied)
+
+    def total(column_1, column_2):
+        summed = np.bincount(side_1, weights=among[:, column_1], minlength=size) + np.bincount(side_2, weights=among[:, column_2], minlength=size)
+        return summed[position]
+
+    return (
+        total(MATCH_POINTS_1, MATCH_POINTS_2),
+        _ratio(total(GAMES_1, GAMES_2), total(GAMES_2, GAMES_1)),
+        _ratio(total(POINTS_1, POINTS_2), total(POINTS_2, POINTS_1)),
+    )
+
+
+def _break_tie(tied, group_matches, fallback_rank):
+    """Order participants with equal match points, see the module docstring."""
+    if len(tied) < 2:
+        return tied
+    for criterion in _mini_table(tied, group_matches):
+        order = np.argsort(-criterion, kind="stable")
+        values = criterion[order]
+        if values[0] != values[-1]:
+            splits = np.flatnonzero(values[1:] != values[:-1]) + 1
+            return np.concatenate([_break_tie(part, group_matches, fallback_rank) for part in np.split(tied[order], splits)])
+    return tied[np.argsort(fallback_rank[tied], kind="stable")]
+
+
+def compute_standings(groups_by_class: dict, results):
+    """Rank the participants of every group.
+
+    `groups_by_class` maps (competition, competition class) to the groups of a group draw,
+    {group_no: [DrawDataRow, ...]}. A participant is identified in the results by any of its start
+    numbers. Returns (standings, incomplete_groups): standings has the same shape as groups_by_class
+    with the members of each group in ranking order, incomplete_groups lists
+    (competition, competition class, group_no, played matches, expected matches) for groups with
+    missing results. Raises StandingsError if a result does not fit the groups.
+    """
+    participants = []
+    group_keys = []
+    group_of = []
+    index_by_start_number = {}
+    for (competition, competition_class), groups in groups_by_class.items():
+        for group_no, members in groups.items():
+            group_id = len(group_keys)
+            group_keys.append((competition, competition_class, group_no))
+            for member in members:
+                if getattr(member, "start_number_a", None) in (None, "EMPTY"):
+                    continue
+                index_by_start_number[(competition, competition_class, member.start_number_a)] = len(participants)
+                if member.start_number_b is not None:
+                    index_by_start_number[(competition, competition_class, member.start_number_b)] = len(participants)
+                participants.append(member)
+                group_of.append(group_id)
+
+    rows = []
+    errors = []
+    played = set()
+    for result in results:
+        i = index_by_start_number.get((result.competition, result.competition_class, result.start_number_1))
+        j = index_by_start_number.get((result.competition, result.competition_class, result.start_number_2))
+        if i is None or j is None:
+            errors.append(f"{result}: participant is not in a drawn group")
+            continue
+        if i == j or group_of[i] != group_of[j] or group_keys[group_of[i]][2] != result.group_no:
+            errors.append(f"{result}: participants do not play each other in group {result.group_no}")
+            continue
+        pair = (min(i, j), max(i, j))
+        if pair in played:
+            errors.append(f"{result}: duplicate result")
+            continue
+        played.add(pair)
+        if result.absent is not None:
+            absent = index_by_start_number.get((result.competition, result.competition_class, result.absent))
+            if absent not in (i, j):
+                errors.append(f"{result}: absent participant {result.absent} does not play this match")
+                continue
+            match_points = (WALKOVER_LOSS_POINTS, WIN_POINTS) if absent == i else (WIN_POINTS, WALKOVER_LOSS_POINTS)
+            games = points = (0, 0)
+        else:
+            games = (sum(a > b for a, b in result.games), sum(a < b for a, b in result.games))
+            if games[0] == games[1]:
+                errors.append(f"{result}: result has no winner")
+                continue
+            points = (sum(a for a, _ in result.games), sum(b for _, b in result.games))
+            match_points = (WIN_POINTS, LOSS_POINTS) if games[0] > games[1] else (LOSS_POINTS, WIN_POINTS)
+        rows.append((group_of[i], i, j) + match_points + games + points)
+    if errors:
+        raise StandingsError(errors)
+
+    group_of = np.array(group_of, dtype=np.int64)
+    matches = np.array(rows, dtype=np.int64).reshape(-1, 9)
+    matches = matches[np.argsort(matches[:, GROUP], kind="stable")]
+    bounds = np.searchsorted(matches[:, GROUP], np.arange(len(group_keys) + 1))
+    group_sizes = np.bincount(group_of, minlength=len(group_keys))
+
+    size = len(participants)
+    match_points = (np.bincount(matches[:, P1], weights=matches[:, MATCH_POINTS_1], minlength=size)
+                    + np.bincount(matches[:, P2], weights=matches[:, MATCH_POINTS_2], minlength=size))
+    seeding = np.array([p.seeding if p.seeding is not None else -1 for p in participants], dtype=np.int64)
+    start_number = np.array([p.start_number_a for p in participants], dtype=np.int64)
+    fallback_rank = np.empty(size, dtype=np.int64)
+    fallback_rank[np.lexsort((start_number, -seeding))] = np.arange(size)
+
+    # all participants of all groups, by group and match points
+    order = np.lexsort((fallback_rank, -match_points, group_of))
+    sorted_groups = group_of[order]
+    sorted_points = match_points[order]
+    splits = np.flatnonzero((sorted_groups[1:] != sorted_groups[:-1]) | (sorted_points[1:] != sorted_points[:-1])) + 1
+
+    standings = {key: {} for key in groups_by_class}
+    for run in np.split(order, splits):
+        if len(run) == 0:
+            continue
+        group_id = group_of[run[0]]
+        if len(run) > 1:
+            run = _break_tie(run, matches[bounds[group_id]:bounds[group_id + 1]], fallback_rank)
+        competition, competition_class, group_no = group_keys[group_id]
+        standings[(competition, competition_class)].setdefault(group_no, []).extend(participants[p] for p in run)
+
+    incomplete_groups = []
+    for group_id, (competition, competition_class, group_no) in enumerate(group_keys):
+        expected = group_sizes[group_id] * (group_sizes[group_id] - 1) // 2
+        played_matches = bounds[group_id + 1] - bounds[group_id]
+        if played_matches < expected:
+            incomplete_groups.append((competition, competition_class, group_no, int(played_matches), int(expected)))
+    return standings, incomplete_groups
+
+
+def standings_to_bracket_rows(standings: dict, settings=None) -> list[DrawDataRow]:
+    """Return the bracket draw input rows for the ranked groups, one per participant."""
+    if settings is None:
+        settings = read_standings_settings()
+    rows = []
+    for (competition, competition_class), groups in standings.items():
+        for group_no, ranking in groups.items():
+            for group_pos, member in enumerate(ranking, start=1):
+                rows.append(DrawDataRow(
+                    competition, competition_class, member.seeding, member.amount_of_groups, group_no, group_pos,
+                    group_pos in settings["main_round_positions"], group_pos in settings["consolation_positions"],
+                    member.start_number_a, member.start_number_b,
+                ))
+    return rows
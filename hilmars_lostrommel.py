@@ -1,9 +1,14 @@
+import sys
+
+from misc.startup_profile import startup_profile
+if "--startup-time" in sys.argv:
+    # enabled before all other imports, so that they are measured too
+    startup_profile.enable()
+
+import argparse
 import logging
 import os
-import sys
 
-from misc.menu import show_main_menu
-from misc.initializer import initialize_data
 from misc.config import initialize_config
 from misc.startup_info import print_startup_info
 
@@ -17,18 +22,78 @@ def get_base_dir():
 
 BASE_DIR = get_base_dir()
 
+def parse_arguments():
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Create group draws and knock-out brackets for table tennis tournaments.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run, skipping classes that were already drawn")
+    parser.add_argument("--replay", action="store_true",
+                        help="only read the input and step through the snapshots of a previous run, without drawing")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print how long it took until the banner, the first spinner and the menu appeared, and the slowest imports")
+    parser.add_argument("--batch", action="store_true",
+                        help="draw without the interactive menu, write the output and summary.json and exit (0 if all classes were drawn, 1 otherwise)")
+    parser.add_argument("--fairness", type=int, metavar="RUNS",
+                        help="draw every class RUNS times with different seeds and report how often participants of the same country or base meet, without the interactive menu")
+    parser.add_argument("--input", metavar="FOLDER",
+                        help="batch mode: folder with players.csv, draw_input.csv and optionally group_results.csv (default: the configured files)")
+    parser.add_argument("--output", metavar="FOLDER",
+                        help="batch mode: folder for the output files and summary.json (default: the configured output file); "
+                             "fairness analysis: folder for the report (default: fairness next to the output file)")
+    args = parser.parse_args()
+    if (args.input or args.output) and not (args.batch or args.fairness):
+        parser.error("--input and --output can only be used with --batch or --fairness")
+    if (args.batch or args.fairness) and (args.resume or args.replay):
+        parser.error("--batch and --fairness cannot be combined with --resume or --replay")
+    if args.batch and args.fairness:
+        parser.error("--batch cannot be combined with --fairness")
+    if args.fairness is not None and args.fairness < 1:
+        parser.error("--fairness needs at least one run")
+    return args
+
 def main():
     """Main function to initialize and start the application."""
+    args = parse_arguments()
+    if args.batch:
+        # headless: only the draw pipeline is imported
+        from misc.batch import run_batch
+        sys.exit(run_batch(BASE_DIR, args.input, args.output))
+    if args.fairness:
+        from misc.fairness_analysis import run_fairness_analysis
+        sys.exit(run_fairness_analysis(BASE_DIR, args.fairness, args.input, args.output))
+
+    from models.tournament_context import TournamentContext
+    context = TournamentContext()
     try:
         print_startup_info()
+        startup_profile.mark("banner")
         initialize_config(BASE_DIR)
-        initialize_data()
+        # the draw pipeline, the menu and the viewers are imported once they are needed
+        from misc.initializer import initialize_data, load_input_tables
+        from misc.menu import show_main_menu, show_replay_menu
+        if args.replay:
+            context = load_input_tables() or context
+            startup_profile.mark("menu")
+            startup_profile.report()
+            show_replay_menu(context)
+        else:
+            context = initialize_data(resume=args.resume, background=True)
 
         print("")
-        show_main_menu()
+        startup_profile.mark("menu")
+        startup_profile.report()
+        show_main_menu(context)
     except Exception as e:
+        from misc.menu import show_main_menu
         logging.error(f"An unexpected error occurred: {e} - Returning to main menu\n")
-        show_main_menu()
+        from data_io.checkpoint import has_resumable_checkpoints
+        if not args.replay and has_resumable_checkpoints(context):
+            logging.info("Finished classes are checkpointed, start with --resume to continue the draw")
+        show_main_menu(context)
 
 if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        # the draw worker processes of a frozen executable start through this script
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
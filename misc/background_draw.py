@@ -0,0 +1,212 @@
+"""Background drawing: the menu can be used while the classes are still being drawn.
+
+The classes are drawn by a pool of worker processes. Every finished class is stored in the
+context right away, so that it can be viewed in the menu while the other classes are still
+being drawn, and the workers report the best score of their running draw, which the menu shows
+next to each class. The output files are written in the same order as by the sequential draw,
+so both produce identical files.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+from functools import partial
+
+from data_io.result_store import ResultStore
+from misc.config import config
+from misc.initializer import split_draw_data, draw_group_class, draw_bracket_class, store_class_result, add_standings_bracket_rows, export_results_database, group_violation_messages
+from models.draw_status import DrawStatus, PENDING, RUNNING, DONE, FAILED
+from models.tournament_context import COMPETITIONS
+
+# state of a worker process, set by _init_worker
+_worker_context = None
+_worker_queue = None
+
+
+def draw_worker_count() -> int:
+    """Number of worker processes: draw_workers of the settings, by default one less than the number of CPUs.
+
+    0 means that all classes are drawn before the menu is shown.
+    """
+    value = config["settings"].get("draw_workers", "").strip()
+    if value:
+        return max(0, int(value))
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _init_worker(config_state, context, queue):
+    global _worker_context, _worker_queue
+    # Ctrl+C and all output belong to the menu of the main process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    logging.getLogger().setLevel(logging.ERROR)
+    config.read_dict(config_state)
+    _worker_context = context
+    _worker_queue = queue
+
+
+def _draw_class(stage, competition, competition_class, class_subset):
+    """Draw one class in a worker process and return (result, reused, last reported score)."""
+    key = (stage, competition, competition_class)
+    scores = []
+
+    def report(score):
+        scores.append(score)
+        _worker_queue.put((key, score))
+
+    _worker_queue.put((key, None))
+    result_store_path = config["files"].get("result_store_path", "")
+    result_store = ResultStore(result_store_path) if result_store_path else None
+    draw_class = draw_group_class if stage == "groups" else draw_bracket_class
+    result, reused = draw_class(_worker_context, competition, competition_class, class_subset, result_store, on_progress=report)
+    return result, reused, scores[-1] if scores else None
+
+
+def class_subsets(stage, draw_data):
+    """Yield (key, class_subset) of every class of one stage, in the order of the sequential draw."""
+    for competition in COMPETITIONS:
+        rows = draw_data[competition]
+        for competition_class in sorted(set(data.competition_class for data in rows)):
+            yield (stage, competition, competition_class), [data for data in rows if data.competition_class == competition_class]
+
+
+class BackgroundDraw:
+    """Draws all classes of a context in worker processes and exports them in the background.
+
+    The status of every class is kept in `context.draw_status`.
+    """
+    def __init__(self, context, export_writer, checkpoint=None, workers=1):
+        self.context = context
+        self.export_writer = export_writer
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.failed = False
+        self.finished = threading.Event()
+        self._queue = multiprocessing.Queue()
+        self._pool = None
+
+    def start(self):
+        """Start the worker processes and return immediately."""
+        config_state = {section: dict(config.items(section, raw=True)) for section in config.sections()}
+        self._pool = multiprocessing.Pool(self.workers, _init_worker, (config_state, self.context, self._queue))
+        atexit.register(self.stop)
+        threading.Thread(target=self._listen, name="draw-progress", daemon=True).start()
+        threading.Thread(target=self._coordinate, name="draw-coordinator", daemon=True).start()
+
+    def stop(self):
+        """Stop all running draws, e.g. when the app is closed."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def wait(self, timeout=None) -> bool:
+        """Wait until all classes are drawn and exported, return False if drawing failed or timed out."""
+        return self.finished.wait(timeout) and not self.failed
+
+    def _listen(self):
+        for key, score in iter(self._queue.get, None):
+            status = self.context.draw_status.get(key)
+            if status is None or status.state not in (PENDING, RUNNING):
+                continue
+            status.state = RUNNING
+            if score is not None:
+                status.score = score
+
+    def _submit(self, stage, draw_data):
+        """Submit all classes of a stage that were not submitted yet, return key -> AsyncResult (None if resumed)."""
+        jobs = {}
+        for key, class_subset in class_subsets(stage, draw_data):
+            if key in self.context.draw_status:
+                continue
+            self.context.draw_status[key] = DrawStatus()
+            checkpointed = self.checkpoint.load(*key) if self.checkpoint else None
+            if checkpointed is not None:
+                self._class_done(key, (checkpointed, True, None), from_checkpoint=True)
+                jobs[key] = None
+            else:
+                jobs[key] = self._pool.apply_async(_draw_class, (*key, class_subset),
+                                                   callback=partial(self._class_done, key),
+                                                   error_callback=partial(self._class_failed, key))
+        return jobs
+
+    def _class_done(self, key, outcome, from_checkpoint=False):
+        """Make a finished class viewable at once (called by the result thread of the pool)."""
+        status = self.context.draw_status[key]
+        result, reused, score = outcome
+        try:
+            if self.checkpoint and not reused and not from_checkpoint:
+                self.checkpoint.save(*key, result)
+            store_class_result(self.context, *key, result)
+            stage, competition, competition_class = key
+            if stage == "groups":
+                # the same checks as the validation step of the sequential draw
+                status.violations = [message for _, messages in group_violation_messages(self.context, competition, competition_class, result["group"])
+                                     for message in messages]
+        except Exception as e:
+            self._class_failed(key, e)
+            return
+        status.reused = reused
+        if score is not None:
+            status.score = score
+        status.state = DONE
+
+    def _class_failed(self, key, error):
+        status = self.context.draw_status[key]
+        status.error = str(error)
+        status.state = FAILED
+
+    def _wait_for(self, key, job):
+        if job is not None:
+            job.wait()
+        status = self.context.draw_status[key]
+        if status.state != DONE:
+            raise RuntimeError(f"Drawing {' '.join(key)} failed: {status.error}")
+
+    def _coordinate(self):
+        try:
+            group_draw_data, bracket_draw_data = split_draw_data(self.context)
+            jobs = self._submit("groups", group_draw_data)
+            # brackets of the draw input do not depend on the groups
+            jobs.update(self._submit("bracket", bracket_draw_data))
+
+            for key, _ in class_subsets("groups", group_draw_data):
+                self._wait_for(key, jobs[key])
+                _, competition, competition_class = key
+                self.export_writer.add_groups(competition, competition_class, self.context.groups[competition][competition_class]["group"])
+
+            results_path = config["files"].get("group_results_path", "")
+            if results_path and os.path.exists(results_path):
+                add_standings_bracket_rows(self.context, results_path, bracket_draw_data)
+                jobs.update(self._submit("bracket", bracket_draw_data))
+
+            for key, _ in class_subsets("bracket", bracket_draw_data):
+                self._wait_for(key, jobs[key])
+                _, competition, competition_class = key
+                self.export_writer.add_bracket(competition, competition_class, self.context.brackets[competition][competition_class])
+
+            self.export_writer.close()
+            export_results_database(self.context)
+            if self.checkpoint:
+                self.checkpoint.clear()
+        except Exception as e:
+            self.failed = True
+            logging.error("Background draw stopped: %s", e)
+            try:
+                self.export_writer.close()
+            except Exception:
+                pass
+        finally:
+            self.finished.set()
+            self._queue.put(None)
+            if self._pool is not None:
+                self._pool.close()
+
+
+def start_background_draw(context, export_writer, checkpoint=None, workers=1) -> BackgroundDraw:
+    """Start drawing all classes of a loaded context in the background, see `BackgroundDraw`."""
+    background_draw = BackgroundDraw(context, export_writer, checkpoint, workers)
+    background_draw.start()
+    return background_draw
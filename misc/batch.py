@@ -0,0 +1,129 @@
+"""Headless batch mode: draw all classes of one input folder without the interactive menu.
+
+Only the draw pipeline is imported. Progress is logged instead of shown with spinners, no
+snapshots are recorded and the run ends with a machine-readable summary and an exit code, so
+draws can be started from scripts and several what-if runs can be scheduled in parallel.
+"""
+import json
+import logging
+import os
+import time
+
+from checks.group_checker import check_country_distribution, check_base_uniqueness, get_qttr_violations, check_team_country_distribution
+from checks.bracket_checker import check_half_group_separation, check_no_first_vs_first, check_country_balance_halves, check_base_conflicts_first_round
+from misc.config import config, initialize_config
+from misc.initializer import load_input_tables, draw_and_export
+from misc.progress import set_headless
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+SUMMARY_FILE = "summary.json"
+
+
+def configure_batch_run(input_dir=None, output_dir=None):
+    """Point the configured files to the input and output folder of a batch run and disable snapshots.
+
+    Without a folder, the configured files are used. Run checkpoints are disabled, so that parallel
+    batch runs do not share (and clear) the same checkpoint directory.
+    """
+    files = config["files"]
+    if input_dir:
+        files["players_path"] = os.path.join(input_dir, "players.csv")
+        files["draw_data_path"] = os.path.join(input_dir, "draw_input.csv")
+        files["group_results_path"] = os.path.join(input_dir, "group_results.csv")
+    if output_dir:
+        files["output_file_path"] = os.path.join(output_dir, "output.csv")
+        files["bracket_input_path"] = os.path.join(output_dir, "bracket_input.csv")
+        if files.get("results_database_path", ""):
+            files["results_database_path"] = os.path.join(output_dir, "results.sqlite")
+    files["snapshot_dir"] = ""
+    files["checkpoint_path"] = ""
+    config["settings"]["snapshot_mode"] = "off"
+
+
+def group_summary(context) -> list[dict]:
+    """Size and number of violations per rule of every drawn group class."""
+    summary = []
+    for competition, classes in context.groups.items():
+        for competition_class, result in sorted(classes.items()):
+            groups = result["group"]
+            summary.append({
+                "competition": competition,
+                "class": competition_class,
+                "groups": len(groups),
+                "participants": sum(len(members) for members in groups.values()),
+                "violations": {
+                    "country": len(check_country_distribution(context, competition, groups)),
+                    "base": len(check_base_uniqueness(context, groups)),
+                    "team_country": len(check_team_country_distribution(context, groups)) if competition in ('D', 'M') else 0,
+                    "qttr": len(get_qttr_violations(context, groups)) if competition == 'S' else 0,
+                },
+            })
+    return summary
+
+
+def bracket_summary(context) -> list[dict]:
+    """Size and number of violations per rule of every drawn main and consolation bracket."""
+    summary = []
+    for competition, classes in context.brackets.items():
+        for competition_class, result in sorted(classes.items()):
+            for bracket_type in ('main', 'consolation'):
+                matches = result[bracket_type]["matches"]
+                if not matches:
+                    continue
+                summary.append({
+                    "competition": competition,
+                    "class": competition_class,
+                    "bracket": bracket_type,
+                    "matches": len(matches),
+                    "byes": sum(1 for participants in matches.values() for p in participants if p == "BYE"),
+                    "violations": {
+                        "half_split": len(check_half_group_separation(matches, len(matches))),
+                        "first_vs_first": len(check_no_first_vs_first(matches)),
+                        "country_half": sum(v[3] for v in check_country_balance_halves(context, matches, len(matches))),
+                        "base_first": len(check_base_conflicts_first_round(context, matches)),
+                    },
+                })
+    return summary
+
+
+def results_database_files() -> list[str]:
+    """The results database, if one is configured."""
+    path = config["files"].get("results_database_path", "")
+    return [path] if path else []
+
+
+def run_batch(base_dir, input_dir=None, output_dir=None) -> int:
+    """Draw and export all classes without user interaction and write the summary.
+
+    The summary is written to summary.json next to the output file. Returns the exit code:
+    EXIT_OK if all classes were drawn and exported, EXIT_FAILED otherwise.
+    """
+    started = time.perf_counter()
+    initialize_config(base_dir)
+    configure_batch_run(input_dir, output_dir)
+    set_headless(True)
+
+    output_file_path = config["files"]["output_file_path"]
+    summary_dir = os.path.dirname(output_file_path)
+    if summary_dir:
+        os.makedirs(summary_dir, exist_ok=True)
+
+    context = load_input_tables()
+    export_writer = draw_and_export(context) if context is not None else None
+    summary = {
+        "status": "ok" if export_writer is not None else "failed",
+        "input_loaded": context is not None,
+        "players": len(context.players_list) if context is not None else 0,
+        "draw_data_rows": len(context.draw_data) if context is not None else 0,
+        "groups": group_summary(context) if context is not None else [],
+        "brackets": bracket_summary(context) if context is not None else [],
+        "output_files": [output_file_path] + export_writer.class_files + results_database_files() if export_writer is not None else [],
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+    summary_path = os.path.join(summary_dir, SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+    logging.info("Batch run %s, summary written to %s", summary["status"], summary_path)
+    return EXIT_OK if export_writer is not None else EXIT_FAILED
@@ -1,5 +1,6 @@
 """Module for configuration management."""
 import configparser
+import hashlib
 import random
 import os
 import logging
@@ -28,3 +29,15 @@ def initialize_config(base_dir):
         format="%(asctime)s [%(levelname)s] %(message)s",       # log format
         datefmt="%Y-%m-%d %H:%M:%S"                             # timestamp format
     )
+
+
+def derive_seed(*parts):
+    """Derive a stable seed for one purpose (e.g. one competition class) from the configured random seed.
+
+    Returns None if no random seed is configured.
+    """
+    random_seed = config["settings"].get("random_seed", "")
+    if random_seed == '':
+        return None
+    digest = hashlib.sha256("|".join([random_seed, *map(str, parts)]).encode()).digest()
+    return int.from_bytes(digest[:8], "big")
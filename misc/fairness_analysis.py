@@ -0,0 +1,285 @@
+"""Fairness analysis: how the draw behaves over thousands of seeds (started with --fairness RUNS).
+
+Every group class and every bracket of the draw input is drawn RUNS times with distinct seeds by
+a pool of worker processes, without snapshots. Per class, the runs are aggregated into NumPy
+arrays:
+
+- groups: how often each pair of participants shared a group (`together`), how often each
+  participant landed in each group (`group_counts`) and the violations per rule of every run
+- brackets: how often each pair met in the first round (`first_round`) or was drawn into the same
+  half (`same_half`), how often each participant got each slot (`slot_counts`) and the
+  violations per rule of every run
+
+The arrays are written to `<class>_<stage>.npz` files and summarized in fairness_report.txt,
+which compares e.g. how often participants of the same country or base meet with how often
+they would meet by chance. Brackets are analyzed for the bracket rows of the draw input.
+"""
+import contextlib
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import time
+
+from checks.group_checker import check_country_distribution, check_base_uniqueness, get_qttr_violations, check_team_country_distribution
+from checks.bracket_checker import check_half_group_separation, check_no_first_vs_first, check_country_balance_halves, check_base_conflicts_first_round
+from draw.group_drawer import draw_groups_monte_carlo
+from draw.bracket_drawer import draw_bracket
+from misc.batch import configure_batch_run, EXIT_OK, EXIT_FAILED
+from misc.config import config, initialize_config, derive_seed
+from misc.initializer import load_input_tables, split_draw_data
+from misc.progress import set_headless
+from models.tournament_context import COMPETITIONS
+
+GROUP_RULES = ("country", "base", "team_country", "qttr")
+BRACKET_RULES = ("half_split", "first_vs_first", "country_half", "base_first")
+REPORT_FILE = "fairness_report.txt"
+# chunks per worker, so that slow and fast classes are spread evenly
+CHUNKS_PER_WORKER = 4
+
+# context of a worker process, set by _init_worker
+_worker_context = None
+
+
+def _init_worker(config_state, context):
+    global _worker_context
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    config.read_dict(config_state)
+    _worker_context = context
+
+
+def participant_label(row) -> str:
+    return str(row.start_number_a) if row.start_number_b is None else f"{row.start_number_a}/{row.start_number_b}"
+
+
+def run_seeds(stage, competition, competition_class, runs):
+    """Distinct seeds of all runs of a class, derived from the configured random seed if there is one."""
+    base_seed = derive_seed("fairness", stage, competition, competition_class)
+    if base_seed is None:
+        base_seed = random.randrange(1 << 62)
+    return [base_seed + run for run in range(runs)]
+
+
+def _group_runs(context, competition, class_subset, seeds):
+    """Draw the groups of a class once per seed and return the partial sums of the chunk."""
+    import numpy as np
+    amount_of_groups = class_subset[0].amount_of_groups
+    index = {id(row): i for i, row in enumerate(class_subset)}
+    group_of = np.empty((len(seeds), len(class_subset)), dtype=np.intp)
+    violations = np.zeros((len(seeds), len(GROUP_RULES)), dtype=np.int32)
+    for run, seed in enumerate(seeds):
+        # the drawer prints a warning for every imperfect draw
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            groups, _ = draw_groups_monte_carlo(context, list(class_subset), amount_of_groups, seed=seed, snapshot_mode="off")
+        for group_no, members in groups.items():
+            for member in members:
+                group_of[run, index[id(member)]] = group_no - 1
+        violations[run] = (
+            len(check_country_distribution(context, competition, groups)),
+            len(check_base_uniqueness(context, groups)),
+            len(check_team_country_distribution(context, groups)) if competition in ('D', 'M') else 0,
+            len(get_qttr_violations(context, groups)) if competition == 'S' else 0,
+        )
+    one_hot = (group_of[:, :, None] == np.arange(amount_of_groups)).astype(np.float32)
+    return {
+        "together": np.einsum("rng,rmg->nm", one_hot, one_hot).astype(np.int32),
+        "group_counts": one_hot.sum(axis=0).astype(np.int32),
+        "violations": violations,
+    }
+
+
+def _bracket_runs(context, class_subset, seeds):
+    """Draw a bracket once per seed and return the partial sums of the chunk."""
+    import numpy as np
+    # the drawn bracket holds copies of the rows
+    index = {participant_label(row): i for i, row in enumerate(class_subset)}
+    slot_of = None
+    violations = np.zeros((len(seeds), len(BRACKET_RULES)), dtype=np.int32)
+    for run, seed in enumerate(seeds):
+        matches, _ = draw_bracket(context, list(class_subset), seed=seed, snapshot_mode="off")
+        if slot_of is None:
+            slot_of = np.empty((len(seeds), len(class_subset)), dtype=np.intp)
+        for match_no, participants in matches.items():
+            for side, participant in enumerate(participants):
+                if participant is not None and participant != "BYE":
+                    slot_of[run, index[participant_label(participant)]] = (match_no - 1) * 2 + side
+        number_of_matches = len(matches)
+        violations[run] = (
+            len(check_half_group_separation(matches, number_of_matches)),
+            len(check_no_first_vs_first(matches)),
+            sum(v[3] for v in check_country_balance_halves(context, matches, number_of_matches)),
+            len(check_base_conflicts_first_round(context, matches)),
+        )
+    slots = 2 * number_of_matches
+    slot_one_hot = (slot_of[:, :, None] == np.arange(slots)).astype(np.float32)
+    match_one_hot = slot_one_hot.reshape(len(seeds), len(class_subset), number_of_matches, 2).sum(axis=3)
+    half_one_hot = slot_one_hot.reshape(len(seeds), len(class_subset), 2, slots // 2).sum(axis=3)
+    return {
+        "first_round": np.einsum("rnm,rkm->nk", match_one_hot, match_one_hot).astype(np.int32),
+        "same_half": np.einsum("rnh,rkh->nk", half_one_hot, half_one_hot).astype(np.int32),
+        "slot_counts": slot_one_hot.sum(axis=0).astype(np.int32),
+        "violations": violations,
+    }
+
+
+def _analyze_chunk(stage, competition, class_subset, seeds):
+    if stage == "groups":
+        return _group_runs(_worker_context, competition, class_subset, seeds)
+    return _bracket_runs(_worker_context, class_subset, seeds)
+
+
+def analysis_jobs(context):
+    """Yield (stage, competition, class, bracket type, class subset) of everything that can be analyzed."""
+    group_draw_data, bracket_draw_data = split_draw_data(context)
+    for competition in COMPETITIONS:
+        for competition_class in sorted(set(data.competition_class for data in group_draw_data[competition])):
+            class_subset = [data for data in group_draw_data[competition] if data.competition_class == competition_class]
+            # in the order of the pots, as sorted by the group draw
+            yield "groups", competition, competition_class, None, sorted(class_subset, key=lambda d: d.seeding, reverse=True)
+        for competition_class in sorted(set(data.competition_class for data in bracket_draw_data[competition])):
+            class_subset = [data for data in bracket_draw_data[competition] if data.competition_class == competition_class]
+            for bracket_type, attribute in (("main", "main_round"), ("consolation", "consolation_round")):
+                participants = [data for data in class_subset if getattr(data, attribute)]
+                if len(participants) >= 2:
+                    yield "bracket", competition, competition_class, bracket_type, participants
+
+
+def shared_attribute_matrices(context, class_subset):
+    """Boolean matrices of the participant pairs sharing a country or a base (any player of a team)."""
+    import numpy as np
+    countries = []
+    bases = []
+    for row in class_subset:
+        players = [context.players_by_start_number[sn] for sn in (row.start_number_a, row.start_number_b) if sn is not None]
+        countries.append({player.country for player in players})
+        bases.append({player.base for player in players if player.base is not None})
+    n = len(class_subset)
+    same_country = np.array([[bool(countries[i] & countries[j]) for j in range(n)] for i in range(n)], dtype=bool)
+    same_base = np.array([[bool(bases[i] & bases[j]) for j in range(n)] for i in range(n)], dtype=bool)
+    np.fill_diagonal(same_country, False)
+    np.fill_diagonal(same_base, False)
+    return same_country, same_base
+
+
+def _pair_rate(matrix, mask, runs):
+    """Mean share of runs in which the pairs of the mask were counted in matrix, None without pairs."""
+    pairs = int(mask.sum())
+    return (matrix[mask].sum() / (pairs * runs), pairs // 2) if pairs else (None, 0)
+
+
+def _format_rate(rate, pairs, chance):
+    if rate is None:
+        return "no pairs"
+    return f"{rate:.1%} of runs ({pairs} pairs, {chance:.1%} by chance)"
+
+
+def group_report_lines(context, class_subset, arrays, runs):
+    """Summarize the aggregated group runs of one class."""
+    import numpy as np
+    amount_of_groups = class_subset[0].amount_of_groups
+    pots = np.arange(len(class_subset)) // amount_of_groups
+    same_country, same_base = shared_attribute_matrices(context, class_subset)
+    # participants of the same pot never share a group
+    different_pots = pots[:, None] != pots[None, :]
+    chance = 1 / amount_of_groups
+    lines = [
+        f"  same country in one group: {_format_rate(*_pair_rate(arrays['together'], same_country & different_pots, runs), chance)}",
+        f"  same base in one group:    {_format_rate(*_pair_rate(arrays['together'], same_base & different_pots, runs), chance)}",
+    ]
+    # the first pot is placed by seeding, all others should be spread evenly over the groups
+    shares = arrays["group_counts"][pots > 0] / runs
+    if len(shares):
+        deviation = np.abs(shares - chance).sum(axis=1) / 2
+        worst = int(np.argmax(deviation))
+        worst_row = [row for row, pot in zip(class_subset, pots) if pot > 0][worst]
+        lines.append(f"  group placement (pots 2+): mean distance from uniform {deviation.mean():.1%}, "
+                     f"largest {deviation[worst]:.1%} ({participant_label(worst_row)})")
+    return lines
+
+
+def bracket_report_lines(context, class_subset, arrays, runs):
+    """Summarize the aggregated bracket runs of one bracket."""
+    import numpy as np
+    n = len(class_subset)
+    slots = arrays["slot_counts"].shape[1]
+    same_country, same_base = shared_attribute_matrices(context, class_subset)
+    group_numbers = np.array([row.group_no if row.group_no is not None else -1 - i for i, row in enumerate(class_subset)])
+    same_group = (group_numbers[:, None] == group_numbers[None, :])
+    np.fill_diagonal(same_group, False)
+    first_round_chance = 1 / (slots - 1)
+    half_chance = (slots // 2 - 1) / (slots - 1)
+    lines = [
+        f"  same group in first round:   {_format_rate(*_pair_rate(arrays['first_round'], same_group, runs), first_round_chance)}",
+        f"  same group in same half:     {_format_rate(*_pair_rate(arrays['same_half'], same_group, runs), half_chance)}",
+        f"  same country in same half:   {_format_rate(*_pair_rate(arrays['same_half'], same_country, runs), half_chance)}",
+        f"  same base in first round:    {_format_rate(*_pair_rate(arrays['first_round'], same_base, runs), first_round_chance)}",
+    ]
+    seeded = sorted(range(n), key=lambda i: -(context.seeding_of(class_subset[i]) or 0))[:2]
+    for i in seeded:
+        counts = arrays["slot_counts"][i]
+        slot = int(np.argmax(counts))
+        lines.append(f"  seed {participant_label(class_subset[i])}: slot {slot + 1} in {counts[slot] / runs:.1%} of runs")
+    return lines
+
+
+def violation_lines(rules, violations):
+    runs = len(violations)
+    return [f"  {rule}: {int((violations[:, i] > 0).sum()) / runs:.1%} of runs, mean {violations[:, i].mean():.2f}"
+            for i, rule in enumerate(rules)]
+
+
+def run_fairness_analysis(base_dir, runs, input_dir=None, output_dir=None) -> int:
+    """Draw every class `runs` times and write the arrays and the report, see the module docstring.
+
+    The results are written to output_dir, by default the folder `fairness` next to the output
+    file. Returns the exit code.
+    """
+    import numpy as np
+    from misc.background_draw import draw_worker_count
+    started = time.perf_counter()
+    initialize_config(base_dir)
+    configure_batch_run(input_dir, None)
+    set_headless(True)
+    output_dir = output_dir or os.path.join(os.path.dirname(config["files"]["output_file_path"]), "fairness")
+    os.makedirs(output_dir, exist_ok=True)
+
+    context = load_input_tables()
+    if context is None:
+        return EXIT_FAILED
+    jobs = list(analysis_jobs(context))
+    if not jobs:
+        logging.error("The draw input contains no classes to analyze")
+        return EXIT_FAILED
+
+    workers = max(1, draw_worker_count())
+    chunk_size = max(1, -(-runs // (workers * CHUNKS_PER_WORKER)))
+    config_state = {section: dict(config.items(section, raw=True)) for section in config.sections()}
+    report = [f"Fairness analysis of {runs} draws per class", ""]
+    with multiprocessing.Pool(workers, _init_worker, (config_state, context)) as pool:
+        pending = []
+        for stage, competition, competition_class, bracket_type, class_subset in jobs:
+            seeds = run_seeds(stage, competition, competition_class + (f"_{bracket_type}" if bracket_type else ""), runs)
+            chunks = [pool.apply_async(_analyze_chunk, (stage, competition, class_subset, seeds[i:i + chunk_size]))
+                      for i in range(0, runs, chunk_size)]
+            pending.append((stage, competition, competition_class, bracket_type, class_subset, chunks))
+
+        for stage, competition, competition_class, bracket_type, class_subset, chunks in pending:
+            partials = [chunk.get() for chunk in chunks]
+            arrays = {name: (np.concatenate([p[name] for p in partials]) if name == "violations" else sum(p[name] for p in partials))
+                      for name in partials[0]}
+            name = f"{competition}_{competition_class}_{bracket_type or stage}"
+            np.savez_compressed(os.path.join(output_dir, f"{name}.npz"),
+                                participants=np.array([participant_label(row) for row in class_subset]), **arrays)
+            if stage == "groups":
+                lines = group_report_lines(context, class_subset, arrays, runs) + violation_lines(GROUP_RULES, arrays["violations"])
+            else:
+                lines = bracket_report_lines(context, class_subset, arrays, runs) + violation_lines(BRACKET_RULES, arrays["violations"])
+            report += [f"{competition} {competition_class} {bracket_type or stage} ({len(class_subset)} participants):", *lines, ""]
+            logging.info("Analyzed %s", name)
+
+    report.append(f"Elapsed: {time.perf_counter() - started:.1f} s with {workers} worker(s)")
+    with open(os.path.join(output_dir, REPORT_FILE), "w", encoding="utf-8") as file:
+        file.write("\n".join(report) + "\n")
+    print("\n".join(report))
+    return EXIT_OK
@@ -2,229 +2,573 @@
 Initializer module for setting up configuration, reading data, 
 performing draws, and exporting results.
 """
+import hashlib
 import logging
+import os
 import traceback
 
-from yaspin import yaspin
+from data_io.input_reader import read_players, read_draw_data, iter_group_results, read_group_assignments, InputFormatError
+from data_io.input_cache import input_fingerprint, load_input_cache, store_input_cache
+from data_io.result_store import ResultStore, class_fingerprint
+from data_io.checkpoint import RunCheckpoint, run_fingerprint
+from data_io.snapshot_file import SnapshotFile, KIND_GROUPS, KIND_BRACKET, write_group_snapshots, write_bracket_snapshots, write_replay_record
+from data_io.output_writer import ExportWriter, write_draw_input
 
-from data_io.input_reader import read_players, read_draw_data
-from data_io.output_writer import write_to_csv, prepare_export_from_group_draw, prepare_export_from_bracket_draw
-
-from draw.group_drawer import draw_groups_monte_carlo
+from draw.group_drawer import draw_groups_monte_carlo, previous_group
 from draw.bracket_drawer import draw_bracket
 
 from checks.validity_checker import check_all_players_only_exist_once, find_missing_players, find_players_not_in_draw_data, find_players_in_wrong_competition
 from checks.group_checker import check_country_distribution, check_base_uniqueness, get_qttr_violations, check_team_country_distribution
 
-export_data = []
+from models.tournament_context import TournamentContext, COMPETITIONS
+from misc.config import config, derive_seed
+from misc.progress import progress
+
+def input_cache_fingerprint():
+    """Key of the input cache: the input files, or the draw input and the players of the player database.
+
+    Returns None if the players are not available.
+    """
+    players_path, draw_data_path = config["files"]["players_path"], config["files"]["draw_data_path"]
+    database_path = config["files"].get("player_database_path", "")
+    if not database_path:
+        return input_fingerprint(players_path, draw_data_path)
+    from data_io.player_database import current_players_fingerprint
+    players_fingerprint = current_players_fingerprint(database_path, players_path)
+    if players_fingerprint is None:
+        return None
+    # only the players referenced by the draw input are read from the database
+    key = f"{input_fingerprint(draw_data_path)}|player_database:{os.path.abspath(database_path)}|players:{players_fingerprint}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def load_input_tables():
+    """Read and validate the input files, or restore them from the input cache if the files are unchanged.
+
+    Returns a new TournamentContext holding the players and draw data, or None if the input could not be used.
+    """
+    cache_path = config["files"].get("input_cache_path", "")
+    fingerprint = None
+    if cache_path:
+        try:
+            fingerprint = input_cache_fingerprint()
+        except FileNotFoundError:
+            pass  # reported by the readers below
 
-singles_groups = {}
-doubles_groups = {}
-mixed_groups = {}
+    tables = load_input_cache(cache_path, fingerprint) if fingerprint else None
+    if tables is not None:
+        context = tables["context"]
+        with progress("Loading cached input data...") as spinner:
+            spinner.text = f"Loaded {len(context.players_list)} players and {len(context.draw_data)} draw data objects from the input cache"
+            spinner.ok()
+        with progress("Restoring data validity check results...") as spinner:
+            report_validation_warnings(spinner, tables["players_not_in_draw_data"], tables["competition_errors"])
+        return refresh_player_ratings(context)
 
-singles_brackets = {}
-doubles_brackets = {}
-mixed_brackets = {}
+    context = TournamentContext()
 
-def initialize_data():
-    """Initialize data by reading players and draw data, performing draws, and preparing export."""
     ########################################################################################
-    with yaspin(text="Reading player data...", color="cyan") as spinner:
+    with progress("Reading player data...") as spinner:
         try:
-            players = read_players()
+            players = read_players(context)
             spinner.text = f"Successfully imported {len(players)} players"
             spinner.ok()
 
-        except FileNotFoundError:
-            spinner.text = "Players file not found"
+        except FileNotFoundError as e:
+            # with a player database, the draw input is read in this step as well
+            spinner.text = "Draw input file not found" if e.filename == config["files"]["draw_data_path"] else "Players file not found"
             spinner.fail()
-            return
+            return None
+
+        except InputFormatError as e:
+            file_name = "Draw input file" if e.file_path == config["files"]["draw_data_path"] else "Players file"
+            spinner.text = f"{file_name} contains {len(e.errors)} malformed row(s)"
+            spinner.fail()
+            for line_number, message in e.errors:
+                print(f">>>> {e.file_path}, line {line_number}: {message}")
+            return None
 
         except Exception:
             spinner.fail()
             logging.error("Exception occurred:\n%s", traceback.format_exc())
-            return
+            return None
 
     ########################################################################################
-    with yaspin(text="Reading draw data...", color="cyan") as spinner:
+    with progress("Reading draw data...") as spinner:
         try:
             # Read draw data from CSV file
-            draw_data = read_draw_data()
-            
-            # Filter out single draw data
-            singles_draw_data = [data for data in draw_data if data.competition == 'S']
-            singles_group_draw_data = [data for data in singles_draw_data if data.group_pos is None]
-            singles_bracket_draw_data = [data for data in singles_draw_data if data.group_pos is not None]
-
-            # Filter out doubles draw data
-            doubles_draw_data = [data for data in draw_data if data.competition == 'D']
-            doubles_group_draw_data = [data for data in doubles_draw_data if data.group_pos is None]
-            doubles_bracket_draw_data = [data for data in doubles_draw_data if data.group_pos is not None]
-
-            # Filter out mixed draw data
-            mixed_draw_data = [data for data in draw_data if data.competition == 'M']
-            mixed_group_draw_data = [data for data in mixed_draw_data if data.group_pos is None]
-            mixed_bracket_draw_data = [data for data in mixed_draw_data if data.group_pos is not None]
-
-
-            spinner.text = f"Successfully imported {len(draw_data)} ({len(singles_draw_data)} single, {len(doubles_draw_data)} double, {len(mixed_draw_data)} mixed) draw data objects"
+            draw_data = read_draw_data(context)
+            counts = {competition: sum(1 for data in draw_data if data.competition == competition) for competition in ('S', 'D', 'M')}
+            spinner.text = f"Successfully imported {len(draw_data)} ({counts['S']} single, {counts['D']} double, {counts['M']} mixed) draw data objects"
             spinner.ok()
 
         except FileNotFoundError:
             spinner.text = "Draw input file not found"
             spinner.fail()
-            return
+            return None
+
+        except InputFormatError as e:
+            spinner.text = f"Draw input file contains {len(e.errors)} malformed row(s)"
+            spinner.fail()
+            for line_number, message in e.errors:
+                print(f">>>> {e.file_path}, line {line_number}: {message}")
+            return None
 
         except Exception:
             spinner.fail()
             logging.error("Exception occurred:\n%s", traceback.format_exc())
-            return
+            return None
 
     ########################################################################################
-    with yaspin(text="Performing data validity checks...", color="cyan") as spinner:
+    with progress("Performing data validity checks...") as spinner:
         try:
-            wrongful_player_data = check_all_players_only_exist_once()
+            wrongful_player_data = check_all_players_only_exist_once(context)
             if wrongful_player_data:
                 spinner.text = "There were multiple player entries found"
                 spinner.fail()
                 print(f">>>> Multiple player entries for start number(s): {wrongful_player_data}")
-                return
+                return None
 
-            missing_players = find_missing_players(draw_data)
+            missing_players = find_missing_players(context, draw_data)
             if missing_players:
                 spinner.text = "The draw data contains references to players that are missing from the import"
                 spinner.fail()
                 print(f">>>> Missing player(s): {missing_players}")
-                return
+                return None
 
-            players_not_in_draw_data = find_players_not_in_draw_data(draw_data)
-            if players_not_in_draw_data:
-                spinner.text = f"There were players imported that are not partaking in any competition: {players_not_in_draw_data}"
-                spinner.ok("WARN")    
+            # all referenced players exist, register teams and seedings once
+            context.index_draw_data()
 
-            errors = find_players_in_wrong_competition(draw_data)
-            if errors:
-                spinner.text = "Competition integrity problems detected"
-                spinner.fail()
-                print("")
-                for e in errors:
-                    print("   ", e)
-                #return
-            else:
-                spinner.text = "The imported data seems valid"
-                spinner.ok()
-                
+            players_not_in_draw_data = find_players_not_in_draw_data(context, draw_data)
+            errors = find_players_in_wrong_competition(context, draw_data)
+            report_validation_warnings(spinner, players_not_in_draw_data, errors)
 
         except Exception:
             spinner.fail()
             logging.error("Exception occurred:\n%s", traceback.format_exc())
-            return
-
+            return None
 
-    ########################################################################################
-    with yaspin(text="Drawing singles groups...", color="cyan") as spinner:
+    if fingerprint:
+        try:
+            store_input_cache(cache_path, fingerprint, {
+                "context": context,
+                "players_not_in_draw_data": players_not_in_draw_data,
+                "competition_errors": errors,
+            })
+        except OSError as e:
+            logging.warning("Could not write input cache %s: %s", cache_path, e)
+
+    return refresh_player_ratings(context)
+
+def refresh_player_ratings(context):
+    """Refresh the QTTR ratings of the players from the configured endpoint ([ratings] in config.ini).
+
+    The input cache keeps the ratings of the players file, so the refresh runs on every start and
+    is answered from the ratings cache while it is fresh. Returns the context.
+    """
+    from data_io.ratings_sync import read_ratings_settings, refresh_ratings
+    settings = read_ratings_settings()
+    if settings is None:
+        return context
+    with progress("Refreshing QTTR ratings...") as spinner:
         try:
-            if not singles_group_draw_data:
-                spinner.text = "No singles group draw data found - no groups created"
-                spinner.fail("INFO")
+            report = refresh_ratings(context, settings)
+            spinner.text = (f"Refreshed QTTR ratings: {report['fetched']} fetched, {report['cached']} from the cache, "
+                            f"{report['changed']} changed")
+            if report["not_refreshed"]:
+                spinner.text += f", {report['not_refreshed']} kept from the players file"
+                spinner.ok("WARN")
             else:
-                # Create data subsets for each distinct competition class
-                singles_competition_classes = sorted(set(data.competition_class for data in singles_group_draw_data))
-                for competition_class in singles_competition_classes:
-                    class_subset = [data for data in singles_group_draw_data if data.competition_class == competition_class]
-                    group, snapshots = draw_groups_monte_carlo(class_subset=class_subset, amount_of_groups=class_subset[0].amount_of_groups)
-                    singles_groups[competition_class] = {"group": group, "snapshots": snapshots, "original_data": class_subset}
-
-                competition_classes_list = list(singles_competition_classes)
-                spinner.text = f"Successfully created singles groups for competition classes {competition_classes_list}"
                 spinner.ok()
-
-        except Exception as e:
+        except Exception:
+            spinner.text = "QTTR ratings could not be refreshed, using the players file"
+            spinner.ok("WARN")
+            logging.error("Exception occurred:\n%s", traceback.format_exc())
+    return context
+
+def report_validation_warnings(spinner, players_not_in_draw_data, errors):
+    """Report the non-blocking results of the data validity checks."""
+    if players_not_in_draw_data:
+        spinner.text = f"There were players imported that are not partaking in any competition: {players_not_in_draw_data}"
+        spinner.ok("WARN")
+
+    if errors:
+        spinner.text = "Competition integrity problems detected"
+        spinner.fail()
+        print("")
+        for e in errors:
+            print("   ", e)
+    else:
+        spinner.text = "The imported data seems valid"
+        spinner.ok()
+
+def origin_note(reused_classes, resumed_classes):
+    """Spinner suffix naming the classes that were not drawn in this run."""
+    notes = []
+    if reused_classes:
+        notes.append(f"unchanged, reused: {reused_classes}")
+    if resumed_classes:
+        notes.append(f"resumed from checkpoint: {resumed_classes}")
+    return f" ({'; '.join(notes)})" if notes else ""
+
+def replay_only(snapshots):
+    """Keep replayable snapshots (seed and checkpoints) for storing, drop fully recorded lists."""
+    return [] if isinstance(snapshots, list) else snapshots
+
+def draw_group_class(context, competition, competition_class, class_subset, result_store, on_progress=None):
+    """Draw the groups of one competition class, reusing the stored result if its input did not change.
+
+    Returns the result and whether it was reused. Stored results only keep snapshots in replay form.
+    on_progress is called with the best score found so far, see draw_groups_monte_carlo.
+    """
+    seed = derive_seed("groups", competition, competition_class)
+    initial_groups = warm_start_groups(context, competition, competition_class, class_subset)
+    fingerprint = None
+    if result_store is not None and seed is not None:
+        fingerprint = class_fingerprint(context, "groups", competition, competition_class, class_subset, seed, initial_groups)
+        stored = result_store.load("groups", competition, competition_class, fingerprint)
+        if stored is not None:
+            return stored, True
+
+    group, snapshots = draw_groups_monte_carlo(context, class_subset=class_subset, amount_of_groups=class_subset[0].amount_of_groups, seed=seed,
+                                               on_progress=on_progress, initial_groups=initial_groups,
+                                               on_budget=lambda report: logging.info("%s %s groups: %s", competition, competition_class, report))
+    if initial_groups:
+        kept = sum(1 for group_no, members in group.items() for member in members if previous_group(initial_groups, member) == group_no)
+        logging.info("%s %s: %d of %d participants kept their previous group", competition, competition_class, kept, len(class_subset))
+    if fingerprint is not None:
+        result_store.store("groups", competition, competition_class, fingerprint, {"group": group, "snapshots": replay_only(snapshots)})
+    return {"group": group, "snapshots": snapshots}, False
+
+def warm_start_groups(context, competition, competition_class, class_subset):
+    """Group assignment to start the group draw of a class from, None to draw from scratch.
+
+    Group numbers filled in the draw input (a manual draft) take precedence over the groups of
+    the previous draw (previous_draw_path).
+    """
+    draft = {(row.start_number_a, row.start_number_b): row.group_no for row in class_subset if row.group_no is not None}
+    return draft or context.previous_groups.get((competition, competition_class))
+
+def load_previous_groups(context):
+    """Read the group assignments of previous_draw_path into the context (before the output is overwritten)."""
+    path = config["files"].get("previous_draw_path", "")
+    context.previous_groups = {}
+    if not path:
+        return
+    try:
+        context.previous_groups = read_group_assignments(path)
+    except FileNotFoundError:
+        logging.info("No previous draw found at %s, drawing the groups from scratch", path)
+    except InputFormatError as e:
+        logging.warning("Ignoring the previous draw: %s", e)
+
+def draw_bracket_class(context, competition, competition_class, class_subset, result_store, on_progress=None):
+    """Draw the main and consolation bracket of one competition class, reusing the stored result if its input did not change.
+
+    Returns the result and whether it was reused. Stored results only keep snapshots in replay form.
+    on_progress is called with the best score of the bracket being drawn, see draw_bracket.
+    """
+    seed = derive_seed("bracket", competition, competition_class)
+    fingerprint = None
+    if result_store is not None and seed is not None:
+        fingerprint = class_fingerprint(context, "bracket", competition, competition_class, class_subset, seed)
+        stored = result_store.load("bracket", competition, competition_class, fingerprint)
+        if stored is not None:
+            return stored, True
+
+    main_round_participants = [data for data in class_subset if data.main_round == True]
+    consolation_round_participants = [data for data in class_subset if data.consolation_round == True]
+
+    def budget_logger(bracket_type):
+        return lambda report: logging.info("%s %s %s bracket: %s", competition, competition_class, bracket_type, report)
+
+    main_bracket, main_snapshots = draw_bracket(context, class_subset=main_round_participants, seed=derive_seed("bracket", competition, competition_class, "main"),
+                                                on_progress=on_progress, on_budget=budget_logger("main"))
+    consolation_bracket, consolation_snapshots = draw_bracket(context, class_subset=consolation_round_participants, seed=derive_seed("bracket", competition, competition_class, "consolation"),
+                                                              on_progress=on_progress, on_budget=budget_logger("consolation"))
+    if fingerprint is not None:
+        result_store.store("bracket", competition, competition_class, fingerprint, {
+            'main': {'matches': main_bracket, 'snapshots': replay_only(main_snapshots)},
+            'consolation': {'matches': consolation_bracket, 'snapshots': replay_only(consolation_snapshots)}
+        })
+    return {
+        'main': {'matches': main_bracket, 'snapshots': main_snapshots},
+        'consolation': {'matches': consolation_bracket, 'snapshots': consolation_snapshots}
+    }, False
+
+def persist_snapshots(context, stage, competition, competition_class, result):
+    """Move the snapshots of a drawn class into snapshot files and replace them by memory-mapped views.
+
+    Replayable snapshots are kept in memory and written as replay records, which re-simulate the
+    snapshots when viewed. Both are tagged with the snapshot fingerprint of the class.
+    """
+    snapshot_dir = config["files"].get("snapshot_dir", "")
+    if not snapshot_dir:
+        return
+    if stage == "groups":
+        sections = [("groups", result, write_group_snapshots)]
+    else:
+        sections = [(bracket_type, result[bracket_type], write_bracket_snapshots) for bracket_type in ('main', 'consolation') if result.get(bracket_type)]
+    fingerprint = snapshot_fingerprint(context, stage, competition, competition_class)
+    kind = KIND_GROUPS if stage == "groups" else KIND_BRACKET
+    for name, section, write_snapshots in sections:
+        snapshots = section.get("snapshots")
+        if not snapshots:
+            continue
+        path = os.path.join(snapshot_dir, f"{competition}_{competition_class}_{name}")
+        if isinstance(snapshots, list):
+            write_snapshots(path + ".snap", competition, competition_class, snapshots, fingerprint)
+            section["snapshots"] = SnapshotFile(path + ".snap", competition, competition_class)
+            stale_path = path + ".replay"
+        else:
+            write_replay_record(path + ".replay", kind, competition, competition_class, snapshots, fingerprint)
+            stale_path = path + ".snap"
+        # a file of the other snapshot mode would show an older draw of the class
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+def snapshot_fingerprint(context, stage, competition, competition_class):
+    """Fingerprint of the current input of a class, snapshot files of another input are not replayed.
+
+    Brackets drawn from the group standings have no rows in the draw input, they follow the group results instead.
+    """
+    group_draw_data, bracket_draw_data = split_draw_data(context)
+    draw_data = group_draw_data if stage == "groups" else bracket_draw_data
+    class_subset = [row for row in draw_data[competition] if row.competition_class == competition_class]
+    fingerprint = class_fingerprint(context, stage, competition, competition_class, class_subset, derive_seed(stage, competition, competition_class))
+    results_path = config["files"].get("group_results_path", "")
+    if stage == "bracket" and not class_subset and results_path and os.path.exists(results_path):
+        fingerprint = hashlib.sha256(f"{fingerprint}|group_results:{input_fingerprint(results_path)}".encode()).hexdigest()
+    return fingerprint
+
+def split_draw_data(context):
+    """Split the draw data into the rows of the group draws and of the bracket draws, per competition."""
+    group_draw_data = {competition: [] for competition in COMPETITIONS}
+    bracket_draw_data = {competition: [] for competition in COMPETITIONS}
+    for data in context.draw_data:
+        if data.group_pos is None:
+            group_draw_data[data.competition].append(data)
+        else:
+            bracket_draw_data[data.competition].append(data)
+    return group_draw_data, bracket_draw_data
+
+def store_class_result(context, stage, competition, competition_class, result):
+    """Make the result of a drawn class available in the context, writing its snapshots to snapshot files."""
+    persist_snapshots(context, stage, competition, competition_class, result)
+    if stage == "groups":
+        context.groups[competition][competition_class] = result
+    else:
+        context.brackets[competition][competition_class] = result
+
+def add_standings_bracket_rows(context, results_path, bracket_draw_data):
+    """Compute the group standings and write them as bracket input.
+
+    Classes without bracket rows in the draw input and without missing results are added to
+    bracket_draw_data, so that their brackets are drawn right away.
+    Returns (bracket input rows of the standings, incomplete groups).
+    """
+    standings_rows, incomplete_groups = group_standings_rows(context, results_path)
+    bracket_input_path = config["files"].get("bracket_input_path", "")
+    if bracket_input_path:
+        write_draw_input(bracket_input_path, standings_rows)
+    incomplete_classes = {(competition, competition_class) for competition, competition_class, _, _, _ in incomplete_groups}
+    input_classes = {(data.competition, data.competition_class) for rows in bracket_draw_data.values() for data in rows}
+    for row in standings_rows:
+        key = (row.competition, row.competition_class)
+        if key not in input_classes and key not in incomplete_classes:
+            bracket_draw_data[row.competition].append(row)
+    return standings_rows, incomplete_groups
+
+def group_standings_rows(context, results_path):
+    """Rank the drawn groups by the group match results and return (bracket input rows, incomplete groups).
+
+    Only classes with at least one result are ranked.
+    """
+    # numpy is only imported when group results are used
+    from draw.standings import compute_standings, standings_to_bracket_rows
+    results = list(iter_group_results(results_path))
+    classes_with_results = {(result.competition, result.competition_class) for result in results}
+    groups_by_class = {
+        (competition, competition_class): result["group"]
+        for competition, classes in context.groups.items()
+        for competition_class, result in classes.items()
+        if (competition, competition_class) in classes_with_results
+    }
+    standings, incomplete_groups = compute_standings(groups_by_class, results)
+    return standings_to_bracket_rows(standings), incomplete_groups
+
+def initialize_data(resume=False, background=False):
+    """Initialize data by reading players and draw data, performing draws, and exporting the results.
+
+    With resume=True, classes that were already finished by an interrupted run with identical
+    input and configuration are taken from its checkpoints instead of being drawn again.
+    With background=True, the classes are drawn by the configured number of worker processes
+    (draw_workers) and this function returns as soon as the input is loaded.
+    Returns the TournamentContext of the run (empty if the input could not be loaded).
+    """
+    context = load_input_tables()
+    if context is None:
+        return TournamentContext()
+    if background:
+        from misc.background_draw import draw_worker_count
+        workers = draw_worker_count()
+        if workers:
+            start_draw_in_background(context, workers, resume=resume)
+            return context
+    draw_and_export(context, resume=resume)
+    return context
+
+def open_run(context, resume=False):
+    """Return (checkpoint or None, ExportWriter) of a new run, raises OSError if the output file cannot be created."""
+    checkpoint_path = config["files"].get("checkpoint_path", "")
+    checkpoint = RunCheckpoint(checkpoint_path, run_fingerprint(context), resume=resume) if checkpoint_path else None
+    load_previous_groups(context)
+    return checkpoint, ExportWriter(context, config["files"]["output_file_path"])
+
+def start_draw_in_background(context, workers, resume=False):
+    """Start drawing all classes with a pool of worker processes, see misc.background_draw.
+
+    Returns the BackgroundDraw, or None if the output file could not be created.
+    """
+    from misc.background_draw import start_background_draw
+    with progress("Starting background draw...") as spinner:
+        try:
+            checkpoint, export_writer = open_run(context, resume)
+        except OSError as e:
             spinner.fail()
-            print("An error occurred:", e)
-            return
+            logging.error("Could not create output file: %s", e)
+            return None
+        background_draw = start_background_draw(context, export_writer, checkpoint, workers)
+        spinner.text = f"Drawing all classes in the background with {workers} worker process(es) - finished classes can be viewed right away"
+        spinner.ok()
+    return background_draw
+
+def draw_and_export(context, resume=False):
+    """Draw all classes of a loaded context and export the results, see `initialize_data`.
+
+    Returns the closed ExportWriter, or None if drawing or exporting failed.
+    """
+    try:
+        checkpoint, export_writer = open_run(context, resume)
+    except OSError as e:
+        logging.error("Could not create output file: %s", e)
+        return None
+
+    if not draw_all_classes(context, export_writer, checkpoint):
+        try:
+            export_writer.close()
+        except Exception as e:
+            logging.error("An error occurred: %s", e)
+        return None
 
     ########################################################################################
-    with yaspin(text="Drawing doubles groups...", color="cyan") as spinner:
+    with progress("Exporting draws to file...") as spinner:
         try:
-            if not doubles_group_draw_data:
-                spinner.text = "No doubles group draw data found - no groups created"
-                spinner.fail("INFO")
-            else:
-                # Create data subsets for each distinct competition class
-                doubles_competition_classes = sorted(set(data.competition_class for data in doubles_group_draw_data))
-                for competition_class in doubles_competition_classes:
-                    class_subset = [data for data in doubles_group_draw_data if data.competition_class == competition_class]
-                    group, snapshots = draw_groups_monte_carlo(class_subset=class_subset, amount_of_groups=class_subset[0].amount_of_groups)
-                    doubles_groups[competition_class] = {"group": group, "snapshots": snapshots}
-
-                competition_classes_list = list(doubles_competition_classes)
-                spinner.text = f"Successfully created doubles groups for competition classes {competition_classes_list}"
-                spinner.ok()
+            export_writer.close()
+            results_database_path = export_results_database(context)
+
+            spinner.text = f"Successfully created output file and {len(export_writer.class_files)} class files"
+            if results_database_path:
+                spinner.text += f" and the results database {results_database_path}"
+            spinner.ok()
+
+            if checkpoint:
+                checkpoint.clear()
 
         except Exception as e:
             spinner.fail()
-            print("An error occurred:", e)
-            return
-
+            logging.error("An error occurred: %s", e)
+            return None
+
+    return export_writer
+
+def export_results_database(context):
+    """Write the results database if one is configured and return its path (None otherwise)."""
+    path = config["files"].get("results_database_path", "")
+    if not path:
+        return None
+    # sqlite3 is only imported when the database is written
+    from data_io.results_database import write_results_database
+    write_results_database(context, path, {
+        "random_seed": config["settings"].get("random_seed", ""),
+        "run_fingerprint": run_fingerprint(context),
+        "output_file": config["files"]["output_file_path"],
+    })
+    return path
+
+def group_violation_messages(context, group_type, competition_class, groups):
+    """Run the group checks of one drawn class and return [(rule, [message, ...]), ...] for every violated rule."""
+    country_violations = check_country_distribution(context, group_type, groups)
+    base_violations = check_base_uniqueness(context, groups)
+    team_country_violations = check_team_country_distribution(context, groups) if group_type in ('D', 'M') else []
+    qttr_violations = get_qttr_violations(context, groups) if group_type == 'S' else []
+    found = [
+        ("Country distribution", [f"Country distribution violation in {group_type}: class={competition_class}, country={v[0]}, max={v[1]}, min={v[2]}, group_counts={v[3]}" for v in country_violations]),
+        ("Base uniqueness", [f"Base uniqueness violation in {group_type}: class={competition_class}, group={v[0]}, base={v[1]}, count={v[2]}" for v in base_violations]),
+        ("Team country distribution", [f"Team country distribution violation in {group_type}: class={competition_class}, team_type={v[0]}, country={v[1]}, max={v[3]}, min={v[2]}, group_counts={v[4]}" for v in team_country_violations]),
+        ("QTTR distribution", [f"Distribution of players without QTTR rating in {group_type}: class={competition_class}, group={v[0]} - {v[1]} players without QTTR. Distribution: {v[2]}" for v in qttr_violations]),
+    ]
+    return [(rule, messages) for rule, messages in found if messages]
+
+def draw_all_classes(context, export_writer, checkpoint):
+    """Draw groups and brackets of all competition classes, handing each finished class to the export writer.
+
+    Results are stored in the groups and brackets of the context.
+    Returns False if drawing was aborted because of an error.
+    """
+    group_draw_data, bracket_draw_data = split_draw_data(context)
+
+    result_store_path = config["files"].get("result_store_path", "")
+    result_store = ResultStore(result_store_path) if result_store_path else None
 
     ########################################################################################
-    with yaspin(text="Drawing mixed groups...", color="cyan") as spinner:
-        try:
-            if not mixed_group_draw_data:
-                spinner.text = "No mixed draw group data found - no groups created"
-                spinner.fail("INFO")
-            else:
+    for competition, name in (('S', 'singles'), ('D', 'doubles'), ('M', 'mixed')):
+        with progress(f"Drawing {name} groups...") as spinner:
+            try:
+                if not group_draw_data[competition]:
+                    spinner.text = f"No {name} group draw data found - no groups created"
+                    spinner.fail("INFO")
+                    continue
+
                 # Create data subsets for each distinct competition class
-                mixed_competition_classes = sorted(set(data.competition_class for data in mixed_group_draw_data))
-                for competition_class in mixed_competition_classes:
-                    class_subset = [data for data in mixed_group_draw_data if data.competition_class == competition_class]
-                    group, snapshots = draw_groups_monte_carlo(class_subset=class_subset, amount_of_groups=class_subset[0].amount_of_groups)
-                    mixed_groups[competition_class] = {"group": group, "snapshots": snapshots}
-
-                competition_classes_list = list(mixed_competition_classes)
-                spinner.text = f"Successfully created mixed groups for competition classes {competition_classes_list}"
+                competition_classes = sorted(set(data.competition_class for data in group_draw_data[competition]))
+                reused_classes = []
+                resumed_classes = []
+                for competition_class in competition_classes:
+                    class_subset = [data for data in group_draw_data[competition] if data.competition_class == competition_class]
+                    result = checkpoint.load("groups", competition, competition_class) if checkpoint else None
+                    if result is not None:
+                        resumed_classes.append(competition_class)
+                    else:
+                        result, reused = draw_group_class(context, competition, competition_class, class_subset, result_store)
+                        if reused:
+                            reused_classes.append(competition_class)
+                        elif checkpoint:
+                            checkpoint.save("groups", competition, competition_class, result)
+                    store_class_result(context, "groups", competition, competition_class, result)
+                    export_writer.add_groups(competition, competition_class, result["group"])
+
+                spinner.text = f"Successfully created {name} groups for competition classes {competition_classes}" + origin_note(reused_classes, resumed_classes)
                 spinner.ok()
 
-        except Exception as e:
-            spinner.fail()
-            print("An error occurred:", e)
-            return
+            except Exception as e:
+                spinner.fail()
+                print("An error occurred:", e)
+                return False
 
     ########################################################################################
-    with yaspin(text="Validating group draws...", color="cyan") as spinner:
+    with progress("Validating group draws...") as spinner:
         try:
             invalid_groups = []
-            for group_type, group_dict in [('S', singles_groups), ('D', doubles_groups), ('M', mixed_groups)]:
+            for group_type, group_dict in context.groups.items():
                 for competition_class, group_data in group_dict.items():
-                    country_violations = check_country_distribution(group_type, group_data["group"])
-                    base_violations = check_base_uniqueness(group_data["group"])
-                    team_country_violations = check_team_country_distribution(group_data["group"]) if group_type in ('D', 'M') else []
-                    qttr_violations = get_qttr_violations(group_data["group"]) if group_type == 'S' else []
-
-                    if country_violations or base_violations or team_country_violations or qttr_violations:
+                    violations = group_violation_messages(context, group_type, competition_class, group_data["group"])
+                    if violations:
                         invalid_groups.append((group_type, competition_class, group_data["group"]))
-
-                    if country_violations:
-                        spinner.text = f"Country distribution violations detected in {group_type}!"
+                    for rule, messages in violations:
+                        spinner.text = f"{rule} violations detected in {group_type}!"
                         spinner.fail("WARN")
-                        for v in country_violations:
-                            print(f"Country distribution violation in {group_type}: class={competition_class}, country={v[0]}, max={v[1]}, min={v[2]}, group_counts={v[3]}")
-                    if base_violations:
-                        spinner.text = f"Base uniqueness violations detected in {group_type}!"
-                        spinner.fail("WARN")
-                        for v in base_violations:
-                            print(f"Base uniqueness violation in {group_type}: class={competition_class}, group={v[0]}, base={v[1]}, count={v[2]}")
-                    if team_country_violations:
-                        spinner.text = f"Team country distribution violations detected in {group_type}!"
-                        spinner.fail("WARN")
-                        for v in team_country_violations:
-                            print(f"Team country distribution violation in {group_type}: class={competition_class}, team_type={v[0]}, country={v[1]}, max={v[3]}, min={v[2]}, group_counts={v[4]}")
-                    if qttr_violations:
-                        spinner.text = f"QTTR distribution violations detected in {group_type}!"
-                        spinner.fail("WARN")
-                        for v in qttr_violations:
-                            print(f"Distribution of players without QTTR rating in {group_type}: class={competition_class}, group={v[0]} - {v[1]} players without QTTR. Distribution: {v[2]}")
+                        for message in messages:
+                            print(message)
 
             if not invalid_groups:
                 spinner.text = "All group draws passed validation checks."
@@ -232,125 +576,63 @@ def initialize_data():
         except Exception as e:
             spinner.fail()
             print("An error occurred during group validation:", e)
-            return
-
-    ########################################################################################
-    with yaspin(text="Drawing singles bracket...", color="cyan") as spinner:
-        try:
-            if not singles_bracket_draw_data:
-                spinner.text = "No singles bracket draw data found - no bracket created"
-                spinner.fail("INFO")
-            else:
-                # Create data subsets for each distinct competition class
-                singles_competition_classes = sorted(set(data.competition_class for data in singles_bracket_draw_data))
-                for competition_class in singles_competition_classes:
-                    class_subset = [data for data in singles_bracket_draw_data if data.competition_class == competition_class]
-                    main_round_participants = [data for data in class_subset if data.main_round == True]
-                    consolation_round_participants = [data for data in class_subset if data.consolation_round == True]
-
-                    main_bracket, main_snapshots = draw_bracket(class_subset=main_round_participants)
-                    consolation_bracket, consolation_snapshots = draw_bracket(class_subset=consolation_round_participants)
-                    singles_brackets[competition_class] = {
-                        'main': {'matches': main_bracket, 'snapshots': main_snapshots},
-                        'consolation': {'matches': consolation_bracket, 'snapshots': consolation_snapshots}
-                    }
-
-                competition_classes_list = list(singles_competition_classes)
-                spinner.text = f"Successfully created singles bracket for competition classes {competition_classes_list}"
-                spinner.ok()
-
-        except Exception as e:
-            spinner.fail()
-            logging.error("An error occurred: %s", e)
-            return
+            return False
 
     ########################################################################################
-    with yaspin(text="Drawing doubles bracket...", color="cyan") as spinner:
-        try:
-            if not doubles_bracket_draw_data:
-                spinner.text = "No doubles bracket draw data found - no bracket created"
-                spinner.fail("INFO")
-            else:
-                doubles_competition_classes = sorted(set(data.competition_class for data in doubles_bracket_draw_data))
-                for competition_class in doubles_competition_classes:
-                    class_subset = [data for data in doubles_bracket_draw_data if data.competition_class == competition_class]
-                    main_round_participants = [data for data in class_subset if data.main_round == True]
-                    consolation_round_participants = [data for data in class_subset if data.consolation_round == True]
-                    
-                    main_bracket, main_snapshots = draw_bracket(class_subset=main_round_participants)
-                    consolation_bracket, consolation_snapshots = draw_bracket(class_subset=consolation_round_participants)
-                    doubles_brackets[competition_class] = {
-                        'main': {'matches': main_bracket, 'snapshots': main_snapshots},
-                        'consolation': {'matches': consolation_bracket, 'snapshots': consolation_snapshots}
-                    }
-
-                competition_classes_list = list(doubles_competition_classes)
-                spinner.text = f"Successfully created doubles bracket for competition classes {competition_classes_list}"
-                spinner.ok()
+    results_path = config["files"].get("group_results_path", "")
+    if results_path and os.path.exists(results_path):
+        from draw.standings import StandingsError
+        with progress("Computing group standings...") as spinner:
+            try:
+                standings_rows, incomplete_groups = add_standings_bracket_rows(context, results_path, bracket_draw_data)
+
+                if incomplete_groups:
+                    spinner.text = f"Computed group standings of {len(standings_rows)} participants, {len(incomplete_groups)} group(s) are missing results"
+                    spinner.ok("WARN")
+                    for competition, competition_class, group_no, played, expected in incomplete_groups:
+                        print(f">>>> {competition} {competition_class} group {group_no}: {played} of {expected} matches played")
+                else:
+                    spinner.text = f"Computed group standings of {len(standings_rows)} participants"
+                    spinner.ok()
+
+            except (InputFormatError, StandingsError) as e:
+                spinner.text = "Group results could not be used"
+                spinner.fail()
+                print(e)
+                return False
 
-        except Exception as e:
-            spinner.fail()
-            logging.error("An error occurred: %s", e)
-            return
+    for competition, name in (('S', 'singles'), ('D', 'doubles'), ('M', 'mixed')):
+        with progress(f"Drawing {name} bracket...") as spinner:
+            try:
+                if not bracket_draw_data[competition]:
+                    spinner.text = f"No {name} bracket draw data found - no bracket created"
+                    spinner.fail("INFO")
+                    continue
 
-    ########################################################################################
-    with yaspin(text="Drawing mixed bracket...", color="cyan") as spinner:
-        try:
-            if not mixed_bracket_draw_data:
-                spinner.text = "No mixed bracket draw data found - no bracket created"
-                spinner.fail("INFO")
-            else:
-                mixed_competition_classes = sorted(set(data.competition_class for data in mixed_bracket_draw_data))
-                for competition_class in mixed_competition_classes:
-                    class_subset = [data for data in mixed_bracket_draw_data if data.competition_class == competition_class]
-                    main_round_participants = [data for data in class_subset if data.main_round == True]
-                    consolation_round_participants = [data for data in class_subset if data.consolation_round == True]
-
-                    main_bracket, main_snapshots = draw_bracket(class_subset=main_round_participants)
-                    consolation_bracket, consolation_snapshots = draw_bracket(class_subset=consolation_round_participants)
-                    mixed_brackets[competition_class] = {
-                        'main': {'matches': main_bracket, 'snapshots': main_snapshots},
-                        'consolation': {'matches': consolation_bracket, 'snapshots': consolation_snapshots}
-                    }
-
-                competition_classes_list = list(mixed_competition_classes)
-                spinner.text = f"Successfully created mixed bracket for competition classes {competition_classes_list}"
+                # Create data subsets for each distinct competition class
+                competition_classes = sorted(set(data.competition_class for data in bracket_draw_data[competition]))
+                reused_classes = []
+                resumed_classes = []
+                for competition_class in competition_classes:
+                    class_subset = [data for data in bracket_draw_data[competition] if data.competition_class == competition_class]
+                    result = checkpoint.load("bracket", competition, competition_class) if checkpoint else None
+                    if result is not None:
+                        resumed_classes.append(competition_class)
+                    else:
+                        result, reused = draw_bracket_class(context, competition, competition_class, class_subset, result_store)
+                        if reused:
+                            reused_classes.append(competition_class)
+                        elif checkpoint:
+                            checkpoint.save("bracket", competition, competition_class, result)
+                    store_class_result(context, "bracket", competition, competition_class, result)
+                    export_writer.add_bracket(competition, competition_class, result)
+
+                spinner.text = f"Successfully created {name} bracket for competition classes {competition_classes}" + origin_note(reused_classes, resumed_classes)
                 spinner.ok()
 
-        except Exception as e:
-            spinner.fail()
-            logging.error("An error occurred: %s", e)
-            return
-
-    ########################################################################################
-    with yaspin(text="Preparing data for export...", color="cyan") as spinner:
-        try:
-            groups = {'S': singles_groups, 'D': doubles_groups, 'M': mixed_groups}
-            bracket_payload = {
-                'S': singles_brackets,
-                'D': doubles_brackets,
-                'M': mixed_brackets,
-            }
-            export_data.extend(prepare_export_from_group_draw(groups))
-            export_data.extend(prepare_export_from_bracket_draw(bracket_payload))
-
-            spinner.text = "Export successfully prepared"
-            spinner.ok()
-
-        except Exception as e:
-            spinner.fail()
-            logging.error("An error occurred: %s", e)
-            return
-
-    ########################################################################################
-    with yaspin(text="Exporting draws to file...", color="cyan") as spinner:
-        try:
-            write_to_csv(export_data)
-
-            spinner.text = "Successfully created output file"
-            spinner.ok()
+            except Exception as e:
+                spinner.fail()
+                logging.error("An error occurred: %s", e)
+                return False
 
-        except Exception as e:
-            spinner.fail()
-            logging.error("An error occurred: %s", e)
-            return
\ No newline at end of file
+    return True
@@ -1,105 +1,181 @@
+"""Interactive menu of the app.
+
+inquirer, tabulate and the viewers are imported when a menu or view is first shown, so that
+they do not slow down the start of the program.
+"""
+import logging
+import os
 import sys
-import inquirer
-from viewer.group_viewer import show_groups
-from viewer.player_viewer import show_players_table
-from viewer.bracket_viewer import show_bracket
-from misc.initializer import singles_groups, doubles_groups, mixed_groups, singles_brackets, doubles_brackets, mixed_brackets
+from misc.config import config
 
 TO_SHOW = ""
 
-def show_main_menu():
+def list_input(message, choices):
+    """Let the user pick one of the choices."""
+    import inquirer
+    return inquirer.list_input(message, choices=choices)
+
+def show_main_menu(context):
     """Display the main menu and handle user choices."""
     global TO_SHOW
     TO_SHOW = ""
-    action = inquirer.list_input("Choose what to do", choices=['View', 'Exit'])
+    actions = ['View', 'Draw status', 'Replay previous run', 'Exit'] if context.draw_status else ['View', 'Replay previous run', 'Exit']
+    action = list_input("Choose what to do", actions)
     match (action):
         case 'View':
-            view_choice()
+            view_choice(context)
+        case 'Draw status':
+            show_draw_status(context)
+        case 'Replay previous run':
+            show_replay_menu(context)
         case 'Exit':
+            if any(not status.done for status in context.draw_status.values()):
+                print("Drawing was stopped, start with --resume to continue with the classes that are not finished yet")
             sys.exit()
-    show_main_menu()
+    show_main_menu(context)
 
-def view_choice():
+def view_choice(context):
     """Choose what to view: Players, Groups, Bracket, Back to main menu"""
     global TO_SHOW
-    what_to_view = inquirer.list_input("Choose what to view", choices=['Groups', 'Bracket', 'Players', 'Back'])
+    what_to_view = list_input("Choose what to view", ['Groups', 'Bracket', 'Players', 'Back'])
     match (what_to_view):
         case 'Players':
-            show_players_table()
+            from viewer.player_viewer import show_players_table
+            show_players_table(context)
         case 'Groups':
             TO_SHOW = "Groups"
-            singles_doubles_mixed_choice()
+            singles_doubles_mixed_choice(context)
         case 'Bracket':
             TO_SHOW = "Bracket"
-            singles_doubles_mixed_choice()
+            singles_doubles_mixed_choice(context)
         case 'Back':
-            show_main_menu()
+            show_main_menu(context)
 
-def singles_doubles_mixed_choice():
+def singles_doubles_mixed_choice(context):
     """Choose between Singles, Doubles, Mixed, Back to previous menu"""
-    s_d_m = inquirer.list_input("Choose what to view", choices=['Singles', 'Doubles', 'Mixed'])
+    s_d_m = list_input("Choose what to view", ['Singles', 'Doubles', 'Mixed'])
     match (s_d_m):
         case 'Singles':
-            choices = list(singles_groups.keys())
-            groups_choice('S', choices)
+            groups_choice(context, 'S', class_choices(context, 'S'))
         case 'Doubles':
-            choices = list(doubles_groups.keys())
-            groups_choice('D', choices)
+            groups_choice(context, 'D', class_choices(context, 'D'))
         case 'Mixed':
-            choices = list(mixed_groups.keys())
-            groups_choice('M', choices)
+            groups_choice(context, 'M', class_choices(context, 'M'))
         case 'Back':
-            view_choice()
+            view_choice(context)
+
+def class_choices(context, s_d_m):
+    """Competition classes of a competition, including the classes that are still being drawn in the background."""
+    stage = "groups" if TO_SHOW == "Groups" else "bracket"
+    classes = set(context.groups[s_d_m].keys())
+    classes.update(competition_class for (status_stage, competition, competition_class) in list(context.draw_status) if status_stage == stage and competition == s_d_m)
+    return sorted(classes)
 
-def groups_choice(s_d_m, choices):
+def groups_choice(context, s_d_m, choices):
     """Choose competition class to view groups or bracket, or go back"""
     global TO_SHOW
-    choices.sort()
-    choices.append('Back')
-    competition_class = inquirer.list_input("Choose a competition class", choices=choices)
+    stage = "groups" if TO_SHOW == "Groups" else "bracket"
+    labels = []
+    for competition_class in choices:
+        status = context.draw_status.get((stage, s_d_m, competition_class))
+        labels.append((f"{competition_class} ({status.label()})", competition_class) if status is not None else competition_class)
+    competition_class = list_input("Choose a competition class", labels + ['Back'])
+    status = context.draw_status.get((stage, s_d_m, competition_class))
+    if status is not None and not status.done:
+        print(f"{competition_class} is still being drawn ({status.label()}), choose a finished class or try again later")
+        groups_choice(context, s_d_m, class_choices(context, s_d_m))
+        return
     match (competition_class):
         case 'Back':
-            view_choice()
+            view_choice(context)
         case _:
-            match(s_d_m, TO_SHOW):
-                case ('S', "Groups"):
+            match TO_SHOW:
+                case "Groups":
+                    from viewer.group_viewer import show_groups
                     show_groups(
+                        context,
                         competition=s_d_m,
                         competition_class=competition_class,
-                        groups=singles_groups[competition_class]["group"],
-                        snapshots= singles_groups[competition_class]["snapshots"]
-                        )
-                case ('S', "Bracket"):
-                    show_bracket(
-                        competition=s_d_m,
-                        competition_class=competition_class,
-                        bracket=singles_brackets.get(competition_class, {}),
+                        groups=context.groups[s_d_m][competition_class]["group"],
+                        snapshots=context.groups[s_d_m][competition_class]["snapshots"]
                     )
-                case ('D', "Groups"):
-                    show_groups(
-                        competition=s_d_m,
-                        competition_class=competition_class,
-                        groups=doubles_groups[competition_class]["group"],
-                        snapshots=doubles_groups[competition_class]["snapshots"]
-                    )
-                case ('D', "Bracket"):
+                case "Bracket":
+                    from viewer.bracket_viewer import show_bracket
                     show_bracket(
+                        context,
                         competition=s_d_m,
                         competition_class=competition_class,
-                        bracket=doubles_brackets.get(competition_class, {}),
-                    )
-                case ('M', "Groups"):
-                    show_groups(
-                        competition=s_d_m,
-                        competition_class=competition_class,
-                        groups=mixed_groups[competition_class]["group"],
-                        snapshots=mixed_groups[competition_class]["snapshots"]
-                    )
-                case ('M', "Bracket"):
-                    show_bracket(
-                        competition=s_d_m,
-                        competition_class=competition_class,
-                        bracket=mixed_brackets.get(competition_class, {}),
+                        bracket=context.brackets[s_d_m].get(competition_class, {}),
                     )
                 case _:
-                    return
\ No newline at end of file
+                    return
+
+def show_draw_status(context):
+    """Print the status of every class that is drawn in the background."""
+    statuses = sorted(context.draw_status.items())
+    finished = sum(1 for _, status in statuses if status.done)
+    print(f"{finished} of {len(statuses)} draws finished")
+    for (stage, competition, competition_class), status in statuses:
+        print(f"  {competition} {competition_class:<10} {stage:<8} {status.label()}")
+        for message in status.violations:
+            print(f"    >>>> {message}")
+
+def show_replay_menu(context):
+    """Choose a draw of a previous run and step through its snapshots without drawing again.
+
+    Snapshot files and replay records whose class input changed since they were written are skipped.
+    """
+    from data_io.snapshot_file import SnapshotFile, ReplayRecord, KIND_GROUPS
+    from misc.initializer import snapshot_fingerprint
+    snapshot_dir = config["files"].get("snapshot_dir", "")
+    file_names = sorted(f for f in os.listdir(snapshot_dir) if f.endswith((".snap", ".replay"))) if snapshot_dir and os.path.isdir(snapshot_dir) else []
+    replays = {}
+    skipped = 0
+    for file_name in file_names:
+        path = os.path.join(snapshot_dir, file_name)
+        try:
+            source = SnapshotFile(path) if file_name.endswith(".snap") else ReplayRecord(path)
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring snapshot file %s: %s", path, e)
+            skipped += 1
+            continue
+        stage = "groups" if source.kind == KIND_GROUPS else "bracket"
+        try:
+            current = snapshot_fingerprint(context, stage, source.competition, source.competition_class)
+        except KeyError:
+            current = None
+        if source.fingerprint is None or source.fingerprint != current:
+            skipped += 1
+        else:
+            replays[file_name.rsplit(".", 1)[0].replace("_", " ")] = (file_name, source)
+        if isinstance(source, SnapshotFile):
+            source.close()
+    if skipped:
+        print(f"{skipped} snapshot file(s) of an older input or configuration were skipped.")
+    if not replays:
+        print("No snapshot files of a previous run found.")
+        return
+    choice = list_input("Choose a draw to replay", list(replays) + ['Back'])
+    if choice == 'Back':
+        return
+    from viewer.group_viewer import show_snapshot_viewer
+    from viewer.bracket_viewer import show_bracket_menu
+    file_name, source = replays[choice]
+    snapshots = source.snapshots if isinstance(source, ReplayRecord) else None
+    if snapshots is None:
+        try:
+            snapshots = SnapshotFile(os.path.join(snapshot_dir, file_name), source.competition, source.competition_class)
+        except (OSError, ValueError) as e:
+            print(f"The snapshot file cannot be replayed: {e}")
+            return
+    try:
+        if source.kind == KIND_GROUPS:
+            show_snapshot_viewer(context, source.competition, source.competition_class, snapshots)
+        else:
+            bracket_type = file_name.rsplit(".", 1)[0].rsplit("_", 1)[1]
+            final_matches = snapshots[len(snapshots) - 1].initial_groups
+            show_bracket_menu(context, source.competition, source.competition_class,
+                              {bracket_type: {'matches': final_matches, 'snapshots': snapshots}})
+    finally:
+        if isinstance(snapshots, SnapshotFile):
+            snapshots.close()
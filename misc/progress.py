@@ -0,0 +1,43 @@
+"""Progress display of the draw pipeline.
+
+The interactive app shows a yaspin spinner per step. In headless (batch) mode, steps are
+logged instead and yaspin is never imported.
+"""
+import logging
+from misc.startup_profile import startup_profile
+
+_headless = False
+
+
+def set_headless(headless: bool):
+    """Switch between spinners (interactive app) and log lines (batch mode)."""
+    global _headless
+    _headless = headless
+
+
+class LogSpinner:
+    """Stand-in for a yaspin spinner that logs the final text of a step."""
+    def __init__(self, text):
+        self.text = text
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def ok(self, label="OK"):
+        logging.info("%s %s", label, self.text)
+
+    def fail(self, label="FAIL"):
+        logging.warning("%s %s", label, self.text)
+
+
+def progress(text):
+    """Return a spinner for one step of the pipeline, to be used as a context manager."""
+    if _headless:
+        return LogSpinner(text)
+    from yaspin import yaspin
+    spinner = yaspin(text=text, color="cyan")
+    startup_profile.mark("first spinner")
+    return spinner
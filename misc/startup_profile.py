@@ -0,0 +1,73 @@
+"""Startup-time profile of the interactive app, shown with --startup-time.
+
+Records when the banner, the first spinner and the menu appear, measured from the start of the
+main script (the start-up of the interpreter itself, or the unpacking of a frozen executable, is
+not included). Like `python -X importtime`, it also records the self and cumulative time of every
+module imported after the profile was enabled, so that slow imports can be found on the machines
+the app is run on, including the frozen executable.
+"""
+import builtins
+import sys
+import time
+
+# the banner and the first spinner should appear within this time
+STARTUP_BUDGET_MS = 100
+BUDGET_MILESTONES = ("banner", "first spinner")
+
+
+class StartupProfile:
+    """Milestones and module import times of the current process."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.enabled = False
+        self.milestones = {}  # name -> seconds since start
+        self.imports = []  # (module, self seconds, cumulative seconds, nesting depth) in completion order
+        self._children = []  # cumulative import time of the nested imports, per open import
+        self._original_import = None
+        self._reported = False
+
+    def enable(self):
+        """Start recording milestones and imports."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = self._children.pop()
+            if self._children:
+                self._children[-1] += cumulative
+            self.imports.append((name, cumulative - nested, cumulative, len(self._children)))
+
+    def mark(self, milestone):
+        """Remember when a milestone was first reached."""
+        if self.enabled and milestone not in self.milestones:
+            self.milestones[milestone] = time.perf_counter() - self.started
+
+    def report(self, top=20):
+        """Print the milestones and the slowest top-level imports (once)."""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        print("Startup time (since the start of the program):")
+        for milestone, seconds in self.milestones.items():
+            note = ""
+            if milestone in BUDGET_MILESTONES:
+                note = " (within budget)" if seconds * 1000 <= STARTUP_BUDGET_MS else f" (over the budget of {STARTUP_BUDGET_MS} ms)"
+            print(f"  {milestone:<16} {seconds * 1000:8.1f} ms{note}")
+        top_level = sorted((entry for entry in self.imports if entry[3] == 0), key=lambda entry: -entry[2])[:top]
+        print("Slowest imports (self | cumulative [ms]):")
+        for name, self_seconds, cumulative, _ in top_level:
+            print(f"  {self_seconds * 1000:8.1f} | {cumulative * 1000:8.1f} | {name}")
+
+
+startup_profile = StartupProfile()
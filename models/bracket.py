@@ -1,5 +1,167 @@
+"""Complete single-elimination bracket stored as flat, heap-indexed arrays.
+
+Matches are numbered like a binary heap: node 1 is the final, the children of node i are
+2i and 2i + 1 and its parent is i // 2. The first round occupies the nodes
+number_of_matches .. 2 * number_of_matches - 1, so first-round match k (as returned by
+`draw_bracket`) is node number_of_matches + k - 1. Every operation walks at most one path
+between a first-round match and the final, i.e. it takes O(log n) steps.
+"""
 from models.match import Match
 
+BYE = "BYE"
+
+
+def participant_key(participant):
+    """Identity of a participant across copies of its draw data row."""
+    return (participant.start_number_a, participant.start_number_b)
+
+
+def _is_bye(participant) -> bool:
+    return participant is None or participant == BYE
+
+
 class Bracket:
-    def __init__(self, bracket_size):
-        self.matches = [None] * bracket_size
\ No newline at end of file
+    """Bracket tree with result entry, winner propagation and bye/walkover auto-advance."""
+    __slots__ = ("number_of_matches", "rounds", "slot_a", "slot_b", "winner", "leaf_by_participant")
+
+    def __init__(self, number_of_matches: int):
+        if number_of_matches < 1 or number_of_matches & (number_of_matches - 1):
+            raise ValueError("number_of_matches must be a power of two >= 1")
+        self.number_of_matches = number_of_matches
+        self.rounds = number_of_matches.bit_length()
+        size = 2 * number_of_matches
+        # index 0 is unused
+        self.slot_a = [None] * size
+        self.slot_b = [None] * size
+        self.winner = [None] * size
+        # participant key -> leaf position (0 .. 2 * number_of_matches - 1) in the first round
+        self.leaf_by_participant = {}
+
+    @classmethod
+    def from_first_round(cls, matches: dict) -> "Bracket":
+        """Build the tree from the first-round matches of `draw_bracket` and advance all byes."""
+        bracket = cls(len(matches))
+        for match_idx, participants in matches.items():
+            node = bracket.node_of_match(match_idx)
+            a = participants[0] if len(participants) > 0 else None
+            b = participants[1] if len(participants) > 1 else None
+            bracket.slot_a[node], bracket.slot_b[node] = a, b
+            for side, participant in enumerate((a, b)):
+                if not _is_bye(participant):
+                    bracket.leaf_by_participant[participant_key(participant)] = 2 * (match_idx - 1) + side
+        for node in range(bracket.number_of_matches, 2 * bracket.number_of_matches):
+            bracket.winner[node] = bracket._bye_winner(node)
+            bracket._propagate(node, None)
+        return bracket
+
+    def node_of_match(self, match_idx: int) -> int:
+        """Node of first-round match match_idx (1-based, as in the draw output)."""
+        return self.number_of_matches + match_idx - 1
+
+    def round_of(self, node: int) -> int:
+        """Round of a node, 1 for the first round and self.rounds for the final."""
+        return self.rounds - node.bit_length() + 1
+
+    def match(self, node: int) -> Match:
+        """Return a Match view of a node, with next_match pointing to the parent node."""
+        match = Match(self.slot_a[node], self.slot_b[node])
+        match.winner = self.winner[node]
+        match.next_match = node // 2 if node > 1 else None
+        return match
+
+    def set_winner(self, node: int, winner):
+        """Enter the result of a match and move the winner on.
+
+        Correcting a result clears every later result on the path of the changed winner.
+        """
+        if winner is not BYE and participant_key(winner) not in {participant_key(p) for p in (self.slot_a[node], self.slot_b[node]) if not _is_bye(p)}:
+            raise ValueError(f"{winner} does not play in match {node}")
+        previous = self.winner[node]
+        self.winner[node] = winner
+        self._propagate(node, previous)
+
+    def walkover(self, node: int, absent):
+        """The absent participant does not show up, the opponent advances."""
+        a, b = self.slot_a[node], self.slot_b[node]
+        if not _is_bye(a) and participant_key(a) == participant_key(absent):
+            self.set_winner(node, b if not _is_bye(b) else BYE)
+        elif not _is_bye(b) and participant_key(b) == participant_key(absent):
+            self.set_winner(node, a if not _is_bye(a) else BYE)
+        else:
+            raise ValueError(f"{absent} does not play in match {node}")
+
+    def _propagate(self, node: int, previous):
+        """Place the winner of node into its parent and walk up while the parents change.
+
+        A later match whose line-up changed is void, its result is cleared unless a bye decides it.
+        """
+        while node > 1:
+            parent = node // 2
+            winner = self.winner[node]
+            if node % 2 == 0:
+                self.slot_a[parent] = winner
+            else:
+                self.slot_b[parent] = winner
+            if winner is previous:
+                break
+            previous = self.winner[parent]
+            self.winner[parent] = self._bye_winner(parent)
+            node = parent
+
+    def _bye_winner(self, node: int):
+        """Winner of a match that is decided by a bye, None if it has to be played."""
+        a, b = self.slot_a[node], self.slot_b[node]
+        if node >= self.number_of_matches:
+            # first round: an empty slot is a bye
+            a_bye, b_bye = _is_bye(a), _is_bye(b)
+        else:
+            # later rounds: only a decided bye counts, an empty slot is still open
+            a_bye, b_bye = a == BYE, b == BYE
+        if a_bye and b_bye:
+            return BYE
+        if b_bye and a is not None:
+            return a
+        if a_bye and b is not None:
+            return b
+        return None
+
+    def current_match(self, participant):
+        """Node of the next open match of a participant, None if eliminated or champion."""
+        leaf = self.leaf_by_participant[participant_key(participant)]
+        node = self.number_of_matches + leaf // 2
+        key = participant_key(participant)
+        while node >= 1:
+            winner = self.winner[node]
+            if winner is None:
+                return node
+            if _is_bye(winner) or participant_key(winner) != key:
+                return None
+            node //= 2
+        return None
+
+    def is_alive(self, participant) -> bool:
+        """True while the participant has not lost a match."""
+        if self.current_match(participant) is not None:
+            return True
+        champion = self.champion()
+        return not _is_bye(champion) and participant_key(champion) == participant_key(participant)
+
+    def meeting_round(self, participant, other) -> int:
+        """Round in which two participants would meet if both keep winning."""
+        leaf_a = self.leaf_by_participant[participant_key(participant)]
+        leaf_b = self.leaf_by_participant[participant_key(other)]
+        if leaf_a == leaf_b:
+            raise ValueError("a participant cannot meet itself")
+        return (leaf_a ^ leaf_b).bit_length()
+
+    def can_meet(self, participant, other) -> bool:
+        """True if both participants are still alive, i.e. their meeting can still happen."""
+        return self.is_alive(participant) and self.is_alive(other)
+
+    def champion(self):
+        return self.winner[1]
+
+    def matches_of_round(self, round_number: int) -> dict:
+        """Return {match number within the round: Match} for one round."""
+        first = 1 << (self.rounds - round_number)
+        return {node - first + 1: self.match(node) for node in range(first, 2 * first)}
@@ -0,0 +1,37 @@
+"""Draw status of a competition class while the classes are drawn in the background."""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class DrawStatus:
+    """State of the draw of one class and the best (lowest) violation score found so far.
+
+    violations lists the messages of the group checks of a finished group class.
+    """
+    __slots__ = ("state", "score", "reused", "error", "violations")
+
+    def __init__(self, state=PENDING):
+        self.state = state
+        self.score = None
+        self.reused = False
+        self.error = None
+        self.violations = []
+
+    @property
+    def done(self):
+        return self.state == DONE
+
+    def label(self):
+        """Short description for menus, e.g. 'running, best score 3'."""
+        if self.state == FAILED:
+            return f"{FAILED}: {self.error}" if self.error else FAILED
+        if self.state == DONE and self.violations:
+            return f"{DONE}{', reused' if self.reused else ''}, {len(self.violations)} violation(s)"
+        if self.state == DONE and self.reused:
+            return f"{DONE}, reused"
+        if self.score is None:
+            return self.state
+        return f"{self.state}, {'score' if self.state == DONE else 'best score'} {self.score:g}"
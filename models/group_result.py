@@ -0,0 +1,24 @@
+"""Data structure for the result of a group match."""
+import sys
+
+
+class GroupMatchResult:
+    """Result of one group match between two participants, given by a start number of each.
+
+    `games` is a tuple of (points of participant 1, points of participant 2) per game, empty for a
+    walkover. For a walkover, `absent` is the start number of the participant that did not appear.
+    """
+    __slots__ = ("competition", "competition_class", "group_no", "start_number_1", "start_number_2", "games", "absent")
+
+    def __init__(self, competition, competition_class, group_no: int, start_number_1: int, start_number_2: int, games=(), absent=None):
+        self.competition = sys.intern(competition)
+        self.competition_class = sys.intern(competition_class)
+        self.group_no = int(group_no)
+        self.start_number_1 = int(start_number_1)
+        self.start_number_2 = int(start_number_2)
+        self.games = tuple(games)
+        self.absent = absent
+
+    def __repr__(self):
+        result = f"w/o {self.absent}" if self.absent is not None else " ".join(f"{a}:{b}" for a, b in self.games)
+        return f"{self.competition} {self.competition_class} group {self.group_no}: {self.start_number_1} vs {self.start_number_2} ({result})"
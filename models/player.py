@@ -1,19 +1,51 @@
-"""Module defining the Player class and managing player instances."""
-# for validation
-players_list = []
-players_by_start_number = {}
+"""Module defining the Player class."""
+import sys
+
+
+class SymbolTable:
+    """Interns repeated string values to small integer ids, with a reverse table for display."""
+    __slots__ = ("names", "ids")
+
+    def __init__(self, names=()):
+        self.names = [sys.intern(name) for name in names]
+        self.ids = {name: index for index, name in enumerate(self.names)}
+
+    def intern(self, name) -> int:
+        """Return the id of name, assigning the next free id to unknown values."""
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            symbol_id = len(self.names)
+            self.names.append(sys.intern(name))
+            self.ids[name] = symbol_id
+        return symbol_id
+
+    def name(self, symbol_id):
+        return self.names[symbol_id] if symbol_id is not None else None
+
+    def __len__(self):
+        return len(self.names)
+
 
 class Player:
-    """Class representing a player."""
-    def __init__(self, start_number: int, first_name, last_name, country, base, gender, qttr):
+    """Class representing a player of a tournament.
+
+    Country and base are interned in the symbol tables of the tournament context: checks
+    compare the integer `country_id`/`base_id`, `country` and `base` hold the shared strings
+    for display. New players are registered in the context's player list for validation.
+    """
+    __slots__ = ("start_number", "first_name", "last_name", "country", "country_id", "base", "base_id", "gender", "qttr")
+
+    def __init__(self, start_number: int, first_name, last_name, country, base, gender, qttr, context):
         self.start_number = int(start_number)
         self.first_name = first_name
         self.last_name = last_name
-        self.country = country
-        self.base = base if base != '' else None
-        self.gender = gender
+        self.country_id = context.countries.intern(country)
+        self.country = context.countries.names[self.country_id]
+        self.base_id = context.bases.intern(base) if base not in (None, '', "None") else None
+        self.base = context.bases.name(self.base_id)
+        self.gender = sys.intern(gender)
         self.qttr = int(qttr) if qttr not in (None, '') else None
-        players_list.append(self)   
+        context.players_list.append(self)
 
     def __repr__(self):
         return f"[{self.start_number}] {self.first_name} {self.last_name} ({self.country}, {self.base if self.base is not None else 'No base'})"
@@ -0,0 +1,111 @@
+"""Search indexes over the players of a tournament, used by the player browser.
+
+The indexes are built once from the context: start numbers and last names are kept sorted for
+range and prefix lookups, country, base, gender and entered competition classes map to the start
+numbers having them. A reverse index maps every start number to the groups and bracket matches
+the player was drawn into; it is extended with the classes finished since it was last refreshed,
+so classes drawn in the background show up without scanning all results for every player.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class PlayerIndex:
+    """Indexes of the players and draw results of one tournament context."""
+    def __init__(self, context):
+        self.context = context
+        self.start_numbers = sorted(context.players_by_start_number)
+        self.start_number_keys = sorted((str(start_number), start_number) for start_number in self.start_numbers)
+        self.last_names = sorted((player.last_name.casefold(), player.start_number) for player in context.players_by_start_number.values())
+        self.by_country = {}
+        self.by_base = {}
+        self.by_gender = {}
+        for start_number in self.start_numbers:
+            player = context.players_by_start_number[start_number]
+            self.by_country.setdefault(player.country.casefold(), []).append(start_number)
+            if player.base is not None:
+                self.by_base.setdefault(player.base.casefold(), []).append(start_number)
+            self.by_gender.setdefault(player.gender.casefold(), []).append(start_number)
+        self.by_competition = {}  # "S M1" -> start numbers entered into the class
+        self.competitions_of = {}  # start number -> ["S M1", ...]
+        for row in context.draw_data:
+            name = f"{row.competition} {row.competition_class}"
+            for start_number in (row.start_number_a, row.start_number_b):
+                if start_number is None:
+                    continue
+                entered = self.by_competition.setdefault(name.casefold(), set())
+                if start_number not in entered:
+                    entered.add(start_number)
+                    self.competitions_of.setdefault(start_number, []).append(name)
+        self.placements = {}  # start number -> ["S M1 group 3", "S M1 main match 2", ...]
+        self._indexed_results = set()
+
+    def refresh(self):
+        """Add the placements of the classes that were drawn since the last refresh."""
+        for stage, results in (("groups", self.context.groups), ("bracket", self.context.brackets)):
+            for competition, classes in results.items():
+                for competition_class, result in list(classes.items()):
+                    key = (stage, competition, competition_class, id(result))
+                    if key in self._indexed_results:
+                        continue
+                    self._indexed_results.add(key)
+                    if stage == "groups":
+                        for group_no, members in result["group"].items():
+                            self._place(members, f"{competition} {competition_class} group {group_no}")
+                    else:
+                        for bracket_type in ('main', 'consolation'):
+                            for match_idx, participants in ((result.get(bracket_type) or {}).get('matches') or {}).items():
+                                self._place(participants, f"{competition} {competition_class} {bracket_type} match {match_idx}")
+
+    def _place(self, participants, placement):
+        for participant in participants:
+            for start_number in (getattr(participant, 'start_number_a', None), getattr(participant, 'start_number_b', None)):
+                if isinstance(start_number, int):
+                    self.placements.setdefault(start_number, []).append(placement)
+
+    def with_start_number_prefix(self, prefix):
+        """Start numbers whose digits begin with the given prefix, e.g. "12" matches 12, 120-129, 1200-1299, ...
+
+        The prefix is compared as text, so "0" or "007" only match start numbers written that way (none).
+        """
+        prefix = str(prefix)
+        first = bisect_left(self.start_number_keys, (prefix,))
+        last = bisect_right(self.start_number_keys, (prefix + "\U0010ffff",))
+        return sorted(start_number for _, start_number in self.start_number_keys[first:last])
+
+    def with_last_name_prefix(self, prefix):
+        """Start numbers of the players whose last name starts with prefix (case-insensitive)."""
+        prefix = prefix.casefold()
+        first = bisect_left(self.last_names, (prefix,))
+        last = bisect_right(self.last_names, (prefix + "\U0010ffff",))
+        return sorted(start_number for _, start_number in self.last_names[first:last])
+
+    def search(self, start_number=None, last_name=None, country=None, base=None, gender=None, competition=None):
+        """Start numbers of all players matching every given filter, in ascending order.
+
+        start_number and last_name match prefixes, the other filters exact values (case-insensitive);
+        competition is a class like "S M1".
+        """
+        candidates = []
+        if start_number is not None:
+            candidates.append(self.with_start_number_prefix(start_number))
+        if last_name:
+            candidates.append(self.with_last_name_prefix(last_name))
+        if country:
+            candidates.append(self.by_country.get(country.casefold(), []))
+        if base:
+            candidates.append(self.by_base.get(base.casefold(), []))
+        if gender:
+            candidates.append(self.by_gender.get(gender.casefold(), []))
+        if competition:
+            candidates.append(sorted(self.by_competition.get(" ".join(competition.split()).casefold(), ())))
+        if not candidates:
+            return self.start_numbers
+        # intersect starting with the most selective filter
+        candidates.sort(key=len)
+        result = candidates[0]
+        for other in candidates[1:]:
+            if not result:
+                break
+            other = set(other)
+            result = [start_number for start_number in result if start_number in other]
+        return result
@@ -1,11 +1,37 @@
+"""Module defining the Team class for doubles and mixed pairs."""
 from models.player import Player
 
+FULL_COUNTRY = "full-country"
+HALF_COUNTRY = "half-country"
+
+
+def team_key(start_number_a: int, start_number_b: int) -> tuple:
+    """Canonical key of a pair, independent of the order of its start numbers."""
+    return (start_number_a, start_number_b) if start_number_a < start_number_b else (start_number_b, start_number_a)
+
+
 class Team:
-    def __init__(self, rank, group, player_a: Player, player_b: Player):
-        self.rank = rank
-        self.group = group
+    """A doubles or mixed pair, registered once per tournament under its canonical key.
+
+    Everything the draws and viewers need about a pair is derived once when the team is
+    registered: its type (both players from the same country or not), the country and base
+    ids of its players and their QTTR values. The seeding is set from the draw data.
+    """
+    __slots__ = ("key", "player_a", "player_b", "seeding", "team_type", "country_ids", "base_ids", "qttr")
+
+    def __init__(self, player_a: Player, player_b: Player, seeding=None):
+        self.key = team_key(player_a.start_number, player_b.start_number)
         self.player_a = player_a
         self.player_b = player_b
+        self.seeding = seeding
+        if player_a.country_id == player_b.country_id:
+            self.team_type = FULL_COUNTRY
+            self.country_ids = (player_a.country_id,)
+        else:
+            self.team_type = HALF_COUNTRY
+            self.country_ids = (player_a.country_id, player_b.country_id)
+        self.base_ids = frozenset(base_id for base_id in (player_a.base_id, player_b.base_id) if base_id is not None)
+        self.qttr = (player_a.qttr, player_b.qttr)
 
     def __repr__(self):
-        return f"Team {self.rank} (Player A: {self.player_a.start_number}. Player B: {self.player_b.start_number})"
\ No newline at end of file
+        return f"Team {self.key} (Player A: {self.player_a.start_number}. Player B: {self.player_b.start_number}, Seeding: {self.seeding})"
@@ -0,0 +1,91 @@
+"""Registries of a single tournament.
+
+All state of a tournament - players, teams, seedings, interned countries and bases, the draw
+input and the draw results - lives in a `TournamentContext` that is passed explicitly to
+readers, checks, drawers, exporters and viewers. Several tournaments can therefore be
+processed in the same process or handed to worker processes without sharing module-level state.
+"""
+from models.player import SymbolTable
+from models.team import Team, team_key
+
+COMPETITIONS = ('S', 'D', 'M')
+
+
+class TournamentContext:
+    """Holds all registries of one tournament."""
+    def __init__(self):
+        # for validation
+        self.players_list = []
+        self.players_by_start_number = {}
+        # seedings of single players; teams carry their own seeding
+        self.seeding_by_start_number = {}
+        self.teams = {}  # canonical (min, max) start numbers -> Team
+        self.countries = SymbolTable()
+        self.bases = SymbolTable()
+        self.draw_data = []
+        # fingerprint of the imported players file, if the players were read from the player database
+        self.players_fingerprint = None
+        # competition -> competition class -> result, filled by the draws
+        self.groups = {competition: {} for competition in COMPETITIONS}
+        self.brackets = {competition: {} for competition in COMPETITIONS}
+        # (stage, competition, competition class) -> DrawStatus, only filled while drawing in the background
+        self.draw_status = {}
+        # (competition, competition class) -> group assignment of a previous draw to warm-start from
+        self.previous_groups = {}
+
+    def team(self, start_number_a, start_number_b) -> Team:
+        """Return the registered team of two players, registering it on first use."""
+        key = team_key(start_number_a, start_number_b)
+        team = self.teams.get(key)
+        if team is None:
+            team = Team(self.players_by_start_number[start_number_a], self.players_by_start_number[start_number_b])
+            self.teams[key] = team
+        return team
+
+    def team_of(self, row) -> Team:
+        """Return the team of a doubles or mixed participant."""
+        return self.team(row.start_number_a, row.start_number_b)
+
+    def register_seeding(self, row):
+        """Remember the seeding of a draw data row for the bracket draw."""
+        if row.start_number_b is None:
+            self.seeding_by_start_number[row.start_number_a] = row.seeding
+        else:
+            self.team_of(row).seeding = row.seeding
+
+    def index_draw_data(self):
+        """Register all teams and seedings of the draw data (the players must be validated first)."""
+        for row in self.draw_data:
+            if row.seeding is not None:
+                self.register_seeding(row)
+            elif row.start_number_b is not None:
+                self.team_of(row)
+
+    def seeding_of(self, row):
+        """Return the seeding of a participant, None if it was never seeded."""
+        if row.start_number_b is None:
+            return self.seeding_by_start_number.get(row.start_number_a)
+        team = self.teams.get(team_key(row.start_number_a, row.start_number_b))
+        return team.seeding if team is not None else None
+
+    def for_participants(self, rows):
+        """Return a reduced context with only the players, teams and seedings of the given rows.
+
+        Used to keep stored replays of a single class small.
+        """
+        context = TournamentContext()
+        context.countries = self.countries
+        context.bases = self.bases
+        for row in rows:
+            for start_number in (row.start_number_a, row.start_number_b):
+                if start_number in self.players_by_start_number:
+                    context.players_by_start_number[start_number] = self.players_by_start_number[start_number]
+            if row.start_number_b is None:
+                if row.start_number_a in self.seeding_by_start_number:
+                    context.seeding_by_start_number[row.start_number_a] = self.seeding_by_start_number[row.start_number_a]
+            else:
+                key = team_key(row.start_number_a, row.start_number_b)
+                if key in self.teams:
+                    context.teams[key] = self.teams[key]
+        context.players_list = list(context.players_by_start_number.values())
+        return context
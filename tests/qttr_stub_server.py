@@ -0,0 +1,68 @@
+"""Local stand-in for a QTTR ratings service, used by the ratings sync smoke test.
+
+Answers POST {"start_numbers": [...]} with {"ratings": {...}} after a fixed latency. Every
+`fail_every`-th request is answered with 503 to exercise the retries. The ratings in `extra` are
+added to every answer, like a service that returns more players than were requested.
+"""
+import asyncio
+import threading
+
+from aiohttp import web
+
+
+class StubRatingsServer:
+    """Ratings service running on a random local port in a background thread."""
+    def __init__(self, ratings, latency=0.05, fail_every=0, extra=None):
+        self.ratings = ratings
+        self.extra = extra or {}
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.max_concurrent = 0
+        self._concurrent = 0
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def _handle(self, request):
+        self.requests += 1
+        if self.fail_every and self.requests % self.fail_every == 0:
+            return web.Response(status=503)
+        self._concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self._concurrent)
+        try:
+            start_numbers = (await request.json())["start_numbers"]
+            await asyncio.sleep(self.latency)
+            ratings = {str(sn): self.ratings.get(sn) for sn in start_numbers}
+            ratings.update({str(sn): rating for sn, rating in self.extra.items()})
+            return web.json_response({"ratings": ratings})
+        finally:
+            self._concurrent -= 1
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post("/ratings", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/ratings"
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._start())
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+
+    def __enter__(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        return False
@@ -0,0 +1,78 @@
+"""Smoke test for drawing in the background.
+Draws two singles classes with worker processes while polling their status and checks that the
+output is identical to the sequential draw.
+"""
+import os
+import tempfile
+import time
+from misc.config import config, initialize_config
+from misc.batch import configure_batch_run
+from misc.initializer import load_input_tables, draw_and_export, start_draw_in_background, group_violation_messages
+from misc.progress import set_headless
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp_dir = tempfile.mkdtemp()
+input_dir = os.path.join(tmp_dir, 'input')
+os.makedirs(input_dir)
+os.chdir(tmp_dir)
+
+with open(os.path.join(input_dir, 'players.csv'), 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn in range(1, 25):
+        # four players of M1 share a base, so three groups cannot separate them
+        base = 'Shared' if sn <= 4 else f'Base{sn % 7}'
+        file.write(f'{sn};Player{sn};P;{["GER", "SWE", "NOR", "FIN"][sn % 4]};{base};M;{1500 - sn}\n')
+
+with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(1, 25):
+        file.write(f'S;{"M1" if sn <= 12 else "M2"};3;{300 - sn};;;;;{sn};\n')
+
+initialize_config(base_dir)
+set_headless(True)
+config["group_draw"]["max_iterations"] = "2000"
+config["files"]["input_cache_path"] = ""
+config["files"]["result_store_path"] = ""
+
+
+def output_of(name):
+    output_dir = os.path.join(tmp_dir, name)
+    configure_batch_run(input_dir, output_dir)
+    os.makedirs(output_dir)
+    return os.path.join(output_dir, 'output.csv')
+
+
+sequential_output = output_of('sequential')
+draw_and_export(load_input_tables())
+
+background_output = output_of('background')
+context = load_input_tables()
+background_draw = start_draw_in_background(context, workers=2)
+seen_states = set()
+while not background_draw.finished.is_set():
+    seen_states.update(status.state for status in context.draw_status.values())
+    time.sleep(0.005)
+print({' '.join(key): status.label() for key, status in context.draw_status.items()})
+
+if not background_draw.wait(timeout=0):
+    raise AssertionError('Background draw failed')
+if sorted(context.draw_status) != [('groups', 'S', 'M1'), ('groups', 'S', 'M2')]:
+    raise AssertionError(f'Unexpected classes: {sorted(context.draw_status)}')
+if not all(status.done and status.score is not None for status in context.draw_status.values()):
+    raise AssertionError('Not all classes were finished with a score')
+if sorted(context.groups['S']) != ['M1', 'M2']:
+    raise AssertionError('Finished classes are missing from the context')
+with open(sequential_output, encoding='utf-8') as a, open(background_output, encoding='utf-8') as b:
+    if a.read() != b.read():
+        raise AssertionError('Background draw output differs from the sequential draw')
+print('Seen states:', sorted(seen_states))
+
+# finished group classes are validated like in the sequential draw
+for (stage, competition, competition_class), status in context.draw_status.items():
+    expected = [message for _, messages in group_violation_messages(context, competition, competition_class, context.groups[competition][competition_class]["group"]) for message in messages]
+    if status.violations != expected:
+        raise AssertionError(f'Unexpected violations of {competition} {competition_class}: {status.violations}')
+if not context.draw_status[('groups', 'S', 'M1')].violations or 'violation' not in context.draw_status[('groups', 'S', 'M1')].label():
+    raise AssertionError('The base violation of M1 is not shown')
+
+print('Background draw test passed.')
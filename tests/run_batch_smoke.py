@@ -0,0 +1,54 @@
+"""Smoke test for the headless batch mode.
+Draws a small singles class from a temporary input folder and checks outputs, summary, exit code
+and that no interactive UI module was imported.
+"""
+import json
+import os
+import sys
+import tempfile
+from misc.batch import run_batch, EXIT_OK, EXIT_FAILED
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp_dir = tempfile.mkdtemp()
+input_dir = os.path.join(tmp_dir, 'input')
+output_dir = os.path.join(tmp_dir, 'what_if', 'output')
+os.makedirs(input_dir)
+# relative cache paths of the config end up in the temporary folder
+os.chdir(tmp_dir)
+
+with open(os.path.join(input_dir, 'players.csv'), 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn, country in enumerate(['GER', 'SWE', 'NOR', 'FIN', 'DEN', 'POL', 'AUT', 'SUI'], start=1):
+        file.write(f'{sn};Player{sn};P;{country};Base{sn};M;{1500 - sn}\n')
+
+with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(1, 9):
+        file.write(f'S;M1;2;{300 - sn};;;;;{sn};\n')
+
+exit_code = run_batch(base_dir, input_dir, output_dir)
+with open(os.path.join(output_dir, 'summary.json'), encoding='utf-8') as file:
+    summary = json.load(file)
+print(json.dumps(summary, indent=2))
+
+if exit_code != EXIT_OK or summary['status'] != 'ok':
+    raise AssertionError(f'Batch run failed: {exit_code}')
+if [(g['class'], g['groups'], g['participants']) for g in summary['groups']] != [('M1', 2, 8)]:
+    raise AssertionError(f'Unexpected group summary: {summary["groups"]}')
+for path in summary['output_files']:
+    if not os.path.exists(path):
+        raise AssertionError(f'Missing output file {path}')
+loaded_ui = {'inquirer', 'tabulate', 'yaspin', 'misc.menu'} & set(sys.modules)
+if loaded_ui:
+    raise AssertionError(f'Batch mode imported UI modules: {loaded_ui}')
+
+# a broken input is reported with a failing exit code and a summary
+with open(os.path.join(input_dir, 'draw_input.csv'), 'a', encoding='utf-8') as file:
+    file.write('S;M1;2;x;;;;;9;\n')
+if run_batch(base_dir, input_dir, output_dir) != EXIT_FAILED:
+    raise AssertionError('Broken input did not fail the batch run')
+with open(os.path.join(output_dir, 'summary.json'), encoding='utf-8') as file:
+    if json.load(file)['input_loaded']:
+        raise AssertionError('Broken input was reported as loaded')
+
+print('Batch mode test passed.')
@@ -0,0 +1,99 @@
+"""Smoke test for the analytical meeting probabilities of a bracket.
+Compares the dynamic program with a simulation of many tournaments and times a 128 slot bracket.
+"""
+import os
+import tempfile
+import time
+import numpy as np
+from misc.config import config, initialize_config
+from models.tournament_context import TournamentContext
+from data_io.input_reader import read_players, read_draw_data
+from checks.validity_checker import check_all_players_only_exist_once
+from checks.bracket_probabilities import meeting_probabilities, win_probabilities, expected_meetings
+from draw.bracket_drawer import draw_bracket
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+initialize_config(base_dir)
+tmp_dir = tempfile.mkdtemp()
+config["files"]["players_path"] = os.path.join(tmp_dir, 'players.csv')
+config["files"]["draw_data_path"] = os.path.join(tmp_dir, 'draw_input.csv')
+config["files"]["player_database_path"] = ""
+config["settings"]["snapshot_mode"] = "off"
+
+countries = ['GER', 'SWE', 'NOR', 'FIN']
+with open(config["files"]["players_path"], 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn in range(1, 13):
+        file.write(f'{sn};Player{sn};P;{countries[sn % 4]};Base{sn};M;{"" if sn == 7 else 1900 - 40 * sn}\n')
+with open(config["files"]["draw_data_path"], 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(1, 13):
+        file.write(f'S;M1;;{300 - sn};{(sn - 1) % 6 + 1};{(sn - 1) // 6 + 1};x;;{sn};\n')
+
+context = TournamentContext()
+read_players(context)
+check_all_players_only_exist_once(context)
+read_draw_data(context)
+context.index_draw_data()
+rows = [row for row in context.draw_data if row.main_round]
+matches, _ = draw_bracket(context, rows, seed=7)
+probabilities = meeting_probabilities(context, matches)
+slots = len(probabilities.participants)
+if slots != 16 or abs(probabilities.reach[-1].sum() - 1) > 1e-9:
+    raise AssertionError(f'Winning probabilities do not add up: {probabilities.reach[-1].sum()}')
+for r in range(probabilities.rounds):
+    if not np.allclose(probabilities.meet[r], probabilities.meet[r].T):
+        raise AssertionError('Meeting probabilities are not symmetric')
+
+# simulate the same tournament many times
+rng = np.random.default_rng(1)
+present = np.array([p is not None and p != "BYE" for p in probabilities.participants])
+strengths = np.array([np.nan] * slots)
+for i, p in enumerate(probabilities.participants):
+    if present[i]:
+        qttr = context.players_by_start_number[p.start_number_a].qttr
+        strengths[i] = qttr if qttr is not None else np.median([context.players_by_start_number[row.start_number_a].qttr for row in rows
+                                                                 if context.players_by_start_number[row.start_number_a].qttr is not None])
+beats = win_probabilities(strengths)
+simulations = 20000
+reached = np.zeros((probabilities.rounds + 1, slots))
+met = np.zeros((probabilities.rounds, slots, slots))
+for _ in range(simulations):
+    alive = [i if present[i] else None for i in range(slots)]
+    for r in range(probabilities.rounds):
+        for i in alive:
+            if i is not None:
+                reached[r, i] += 1
+        winners = []
+        for a, b in zip(alive[0::2], alive[1::2]):
+            if a is None or b is None:
+                winners.append(a if b is None else b)
+                continue
+            met[r, a, b] += 1
+            met[r, b, a] += 1
+            winners.append(a if rng.random() < beats[a, b] else b)
+        alive = winners
+    reached[probabilities.rounds, alive[0]] += 1
+reach_error = np.abs(reached / simulations - probabilities.reach).max()
+meet_error = np.abs(met / simulations - probabilities.meet).max()
+print(f'Largest difference to {simulations} simulated tournaments: reach {reach_error:.4f}, meet {meet_error:.4f}')
+if reach_error > 0.02 or meet_error > 0.02:
+    raise AssertionError('Analytical probabilities differ from the simulation')
+
+same_country = np.zeros((slots, slots), dtype=bool)
+for i, a in enumerate(probabilities.participants):
+    for j, b in enumerate(probabilities.participants):
+        if i != j and present[i] and present[j]:
+            same_country[i, j] = context.players_by_start_number[a.start_number_a].country == context.players_by_start_number[b.start_number_a].country
+print(f'Expected same-country meetings in the first two rounds: {expected_meetings(probabilities, same_country, 2):.3f}')
+
+# a bracket of 128 participants with given ratings
+large = {match_no: [object(), object()] for match_no in range(1, 65)}
+started = time.perf_counter()
+large_probabilities = meeting_probabilities(context, large, strengths=list(range(1000, 2280, 10)))
+elapsed = time.perf_counter() - started
+print(f'128 slot bracket evaluated in {elapsed * 1000:.1f} ms')
+if abs(large_probabilities.reach[-1].sum() - 1) > 1e-9 or elapsed > 1:
+    raise AssertionError('Large bracket evaluation failed')
+
+print('Bracket probabilities test passed.')
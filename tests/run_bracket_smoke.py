@@ -1,8 +1,9 @@
 """Smoke test for bracket drawing.
 Creates minimal players and draw rows and runs `draw_bracket`.
 """
-from models.player import Player, players_by_start_number
-from models.draw_data import DrawDataRow, seeding_by_start_numbers
+from models.player import Player
+from models.draw_data import DrawDataRow
+from models.tournament_context import TournamentContext
 from draw.bracket_drawer import draw_bracket
 
 
@@ -17,39 +18,37 @@ def participant_slots(match_map):
     return slot_by_start_number
 
 # Create minimal players
-players_by_start_number.clear()
-Player(1, 'Alice', 'Alpha', 'GER', 'Base1', 'F', 1200)
-Player(2, 'Betty', 'Bravo', 'SWE', 'Base2', 'F', 1100)
-Player(3, 'Cara', 'Charlie', 'GER', 'Base1', 'F', 1150)
-Player(4, 'Dora', 'Delta', 'SWE', 'Base3', 'F', 1050)
-Player(5, 'Eve', 'Echo', 'NOR', 'Base4', 'F', 1000)
-Player(6, 'Fay', 'Foxtrot', 'FIN', 'Base5', 'F', 980)
-Player(7, 'Gina', 'Golf', 'SWE', 'Base2', 'F', 970)
-Player(8, 'Hana', 'Hotel', 'GER', 'Base6', 'F', 950)
-from models.player import players_list
+context = TournamentContext()
+Player(1, 'Alice', 'Alpha', 'GER', 'Base1', 'F', 1200, context)
+Player(2, 'Betty', 'Bravo', 'SWE', 'Base2', 'F', 1100, context)
+Player(3, 'Cara', 'Charlie', 'GER', 'Base1', 'F', 1150, context)
+Player(4, 'Dora', 'Delta', 'SWE', 'Base3', 'F', 1050, context)
+Player(5, 'Eve', 'Echo', 'NOR', 'Base4', 'F', 1000, context)
+Player(6, 'Fay', 'Foxtrot', 'FIN', 'Base5', 'F', 980, context)
+Player(7, 'Gina', 'Golf', 'SWE', 'Base2', 'F', 970, context)
+Player(8, 'Hana', 'Hotel', 'GER', 'Base6', 'F', 950, context)
 
 # Populate players_by_start_number mapping expected by other modules
-players_by_start_number.clear()
-for p in players_list:
-    players_by_start_number[p.start_number] = p
+for p in context.players_list:
+    context.players_by_start_number[p.start_number] = p
+seeding_by_start_number = context.seeding_by_start_number
 
 # Prepare draw rows (simulate group qualifiers)
-seeding_by_start_numbers.clear()
 rows = []
 # Seeded by start number mapping
 for i, sn in enumerate([1,2,3,4,5,6,7,8], start=1):
-    seeding_by_start_numbers[str(sn)] = 300 - i
+    seeding_by_start_number[sn] = 300 - i
 
 # Create DrawDataRow objects: competition 'S', class 'M1', seeding set, amount_of_groups=1, group_no maybe None, group_pos maybe 1..
 for i, sn in enumerate([1,2,3,4,5,6,7,8], start=1):
-    row = DrawDataRow('S', 'M1', seeding_by_start_numbers[str(sn)], 1, 1, (i%3)+1, True, False, sn, '')
+    row = DrawDataRow('S', 'M1', seeding_by_start_number[sn], 1, 1, (i%3)+1, True, False, sn, '')
     rows.append(row)
 
 # Run the bracket draw
 from viewer import bracket_viewer
 
 # Run draw_bracket and display the first-round matches using the viewer
-matches, snapshots = draw_bracket(rows)
+matches, snapshots = draw_bracket(context, rows)
 print('Generated matches:')
 for k, v in matches.items():
     print(k, [type(x).__name__ if x is not None else None for x in v])
@@ -77,7 +76,7 @@ for snapshot in snapshots:
             raise AssertionError(f'Top seeded participants moved after anchoring: {seeded_snapshot_slots} -> {current_top_slots}')
 
 print('\nBracket display:')
-bracket_viewer.show_bracket_table(matches, title='Smoke Test Bracket')
+bracket_viewer.show_bracket_table(context, matches, title='Smoke Test Bracket')
 
 # Bye distribution regression: verify byes are balanced across halves and that group 1st/2nd bye recipients are separated.
 small_rows = [
@@ -88,13 +87,12 @@ small_rows = [
     DrawDataRow('S', 'M1', 80, 2, 1, 3, True, False, 5, ''),
 ]
 
-# Use the same players_by_start_number mapping already prepared above.
-seeding_by_start_numbers.clear()
+# Use the same players in a reduced tournament context with the seedings of these rows.
+bye_context = context.for_participants(small_rows)
 for row in small_rows:
-    key = str(row.start_number_a)
-    seeding_by_start_numbers[key] = row.seeding
+    bye_context.register_seeding(row)
 
-bye_matches, bye_snapshots = draw_bracket(small_rows)
+bye_matches, bye_snapshots = draw_bracket(bye_context, small_rows)
 bye_half_counts = {0: 0, 1: 0}
 byes_in_half = {}
 for match_idx, participants in bye_matches.items():
@@ -137,4 +135,15 @@ custom_matches = {
 }
 
 print('\nCustom team bracket display:')
-bracket_viewer.show_bracket_table(custom_matches, title='Team Test Bracket')
+bracket_viewer.show_bracket_table(context, custom_matches, title='Team Test Bracket')
+
+# Teams are registered once under their canonical key, whatever the order of the start numbers.
+group_team = DrawDataRow('D', 'W1', 120, 1, None, None, False, False, 3, 1)
+bracket_team = DrawDataRow('D', 'W1', None, 1, 1, 1, True, False, 1, 3)
+team_context = context.for_participants([group_team, bracket_team])
+team_context.register_seeding(group_team)
+if team_context.seeding_of(bracket_team) != 120 or list(team_context.teams) != [(1, 3)]:
+    raise AssertionError(f'Team seeding lookup failed: {team_context.teams}')
+if team_context.team_of(bracket_team).team_type != 'full-country':
+    raise AssertionError('Team of two GER players should be a full-country team')
+print('Team registry test passed.')
@@ -0,0 +1,88 @@
+"""Smoke test for the array-backed bracket tree.
+Builds a tree from a drawn bracket with byes and enters, corrects and forfeits results.
+"""
+from models.player import Player
+from models.draw_data import DrawDataRow
+from models.tournament_context import TournamentContext
+from models.bracket import Bracket, BYE
+from draw.bracket_drawer import draw_bracket
+
+context = TournamentContext()
+Player(1, 'Alice', 'Alpha', 'GER', 'Base1', 'F', 1200, context)
+Player(2, 'Betty', 'Bravo', 'SWE', 'Base2', 'F', 1100, context)
+Player(3, 'Cara', 'Charlie', 'NOR', 'Base3', 'F', 1150, context)
+Player(4, 'Dora', 'Delta', 'FIN', 'Base4', 'F', 1050, context)
+Player(5, 'Eve', 'Echo', 'DEN', 'Base5', 'F', 1000, context)
+for p in context.players_list:
+    context.players_by_start_number[p.start_number] = p
+
+# five participants in an 8-slot bracket -> three byes
+rows = []
+for i, sn in enumerate([1, 2, 3, 4, 5], start=1):
+    row = DrawDataRow('S', 'W1', 200 - i, 2, (i % 2) + 1, (i + 1) // 2, True, False, sn, '')
+    context.register_seeding(row)
+    rows.append(row)
+
+matches, _ = draw_bracket(context, rows, seed=7)
+bracket = Bracket.from_first_round(matches)
+if bracket.number_of_matches != 4 or bracket.rounds != 3:
+    raise AssertionError(f'Unexpected bracket size: {bracket.number_of_matches} matches, {bracket.rounds} rounds')
+
+# every first-round match against a bye is decided on construction
+for match_idx, participants in matches.items():
+    node = bracket.node_of_match(match_idx)
+    if BYE in participants and bracket.winner[node] is None:
+        raise AssertionError(f'Bye in match {match_idx} was not advanced')
+    if BYE not in participants and bracket.winner[node] is not None:
+        raise AssertionError(f'Match {match_idx} without bye was decided on construction')
+
+# play the only open first-round match, then the rest of the bracket with the first listed participant winning
+open_nodes = [n for n in range(bracket.number_of_matches, 2 * bracket.number_of_matches) if bracket.winner[n] is None]
+if len(open_nodes) != 1:
+    raise AssertionError(f'Expected one open first-round match, got {open_nodes}')
+first_node = open_nodes[0]
+loser = bracket.slot_b[first_node]
+bracket.set_winner(first_node, bracket.slot_a[first_node])
+if bracket.is_alive(loser) or bracket.current_match(loser) is not None:
+    raise AssertionError('Loser of a match is still alive')
+
+for node in range(bracket.number_of_matches - 1, 0, -1):
+    if bracket.winner[node] is None:
+        bracket.set_winner(node, bracket.slot_a[node])
+champion = bracket.champion()
+if champion is None or not bracket.is_alive(champion):
+    raise AssertionError('No champion after all results were entered')
+
+# correcting the first result clears every later result the old winner was part of
+old_winner = bracket.slot_a[first_node]
+bracket.set_winner(first_node, loser)
+node = first_node // 2
+if bracket.slot_a[node] is not loser and bracket.slot_b[node] is not loser:
+    raise AssertionError('Corrected winner was not moved into the next round')
+while node >= 1:
+    if bracket.winner[node] is old_winner:
+        raise AssertionError(f'Result of node {node} still depends on the corrected winner')
+    node //= 2
+if not bracket.is_alive(loser) or bracket.is_alive(old_winner):
+    raise AssertionError('Liveness not updated after correction')
+
+# a walkover advances the opponent
+node = bracket.current_match(loser)
+opponent = bracket.slot_b[node] if bracket.slot_a[node] is loser else bracket.slot_a[node]
+if opponent is not None:
+    bracket.walkover(node, loser)
+    if bracket.is_alive(loser) or bracket.winner[node] is not opponent:
+        raise AssertionError('Walkover did not advance the opponent')
+
+# meeting rounds follow from the leaf positions
+leaves = sorted(bracket.leaf_by_participant.items(), key=lambda item: item[1])
+by_leaf = {leaf: row for row in rows for key, leaf in leaves if key == (row.start_number_a, row.start_number_b)}
+for leaf_a, row_a in by_leaf.items():
+    for leaf_b, row_b in by_leaf.items():
+        if leaf_a < leaf_b:
+            expected = 1 if leaf_a // 2 == leaf_b // 2 else (2 if leaf_a // 4 == leaf_b // 4 else 3)
+            if bracket.meeting_round(row_a, row_b) != expected:
+                raise AssertionError(f'Meeting round of leaves {leaf_a}/{leaf_b} should be {expected}')
+
+print('Final:', bracket.matches_of_round(bracket.rounds))
+print('Bracket tree test passed.')
@@ -0,0 +1,55 @@
+"""Smoke test for the fairness analysis.
+Draws a group class and a bracket a few hundred times and checks the aggregated arrays and the report.
+"""
+import os
+import tempfile
+import numpy as np
+from misc.batch import EXIT_OK
+from misc.fairness_analysis import run_fairness_analysis, REPORT_FILE
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp_dir = tempfile.mkdtemp()
+input_dir = os.path.join(tmp_dir, 'input')
+output_dir = os.path.join(tmp_dir, 'fairness')
+os.makedirs(input_dir)
+os.chdir(tmp_dir)
+
+countries = ['GER', 'SWE', 'NOR', 'FIN']
+with open(os.path.join(input_dir, 'players.csv'), 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn in range(1, 25):
+        file.write(f'{sn};Player{sn};P;{countries[sn % 3]};Base{sn % 12};M;{1500 - sn}\n')
+
+with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(1, 13):
+        file.write(f'S;M1;3;{300 - sn};;;;;{sn};\n')
+    for sn in range(13, 25):
+        group_no, group_pos = (sn - 13) % 4 + 1, (sn - 13) // 4 + 1
+        main_round = group_pos <= 2
+        file.write(f'S;M2;;{300 - sn};{group_no};{group_pos};{"x" if main_round else ""};{"" if main_round else "x"};{sn};\n')
+
+runs = 200
+if run_fairness_analysis(base_dir, runs, input_dir, output_dir) != EXIT_OK:
+    raise AssertionError('Fairness analysis failed')
+
+groups = np.load(os.path.join(output_dir, 'S_M1_groups.npz'))
+together = groups['together']
+if together.shape != (12, 12) or not (together == together.T).all() or (np.diag(together) != runs).any():
+    raise AssertionError('Unexpected co-occurrence matrix')
+if (groups['group_counts'].sum(axis=1) != runs).any() or groups['violations'].shape != (runs, 4):
+    raise AssertionError('Unexpected group distribution')
+pots = np.arange(12) // 3
+if together[pots[:, None] == pots[None, :]].sum() != 12 * runs:
+    raise AssertionError('Participants of one pot shared a group')
+
+bracket = np.load(os.path.join(output_dir, 'S_M2_main.npz'))
+if bracket['slot_counts'].shape != (8, 8) or (bracket['slot_counts'].sum(axis=1) != runs).any():
+    raise AssertionError('Unexpected slot distribution')
+if (np.diag(bracket['same_half']) != runs).any() or (bracket['first_round'] > runs).any():
+    raise AssertionError('Unexpected bracket pair counts')
+
+with open(os.path.join(output_dir, REPORT_FILE), encoding='utf-8') as file:
+    if 'S M1 groups' not in file.read():
+        raise AssertionError('Report is incomplete')
+print('Fairness analysis test passed.')
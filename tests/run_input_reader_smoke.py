@@ -0,0 +1,51 @@
+"""Smoke test for the streaming CSV readers.
+Writes small player and draw input files and checks typed parsing and row-level error reporting.
+"""
+import os
+import tempfile
+from data_io.input_reader import iter_players, iter_draw_data, InputFormatError
+from models.tournament_context import TournamentContext
+
+tmp_dir = tempfile.mkdtemp()
+players_path = os.path.join(tmp_dir, 'players.csv')
+draw_path = os.path.join(tmp_dir, 'draw_input.csv')
+
+with open(players_path, 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    file.write('1;Alpha;Alice;GER;"Bad Homburg; Süd";F;1200\n')   # quoted field containing the delimiter
+    file.write('2;Bravo;Betty;SWE;;F;;\n')                         # trailing empty column
+    file.write('\n')
+
+context = TournamentContext()
+players = list(iter_players(context, players_path))
+if [p.start_number for p in players] != [1, 2]:
+    raise AssertionError(f'Unexpected players: {players}')
+if players[0].base != 'Bad Homburg; Süd' or players[1].base is not None or players[1].qttr is not None:
+    raise AssertionError(f'Unexpected player attributes: {players}')
+
+with open(draw_path, 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    file.write('S;W1;;;1;1;1;;1;\n')
+    file.write('S;W1;;;1;2;0;1;2;\n')
+    file.write('S;W1;;;1;x;1;;3;\n')           # invalid group_pos
+    file.write('S;W1;;;1;3;maybe;;4;\n')       # invalid boolean
+    file.write('S;W1;;;1;4\n')                 # too few columns
+
+parsed = []
+try:
+    for row in iter_draw_data(draw_path):
+        parsed.append(row)
+except InputFormatError as e:
+    if [line_number for line_number, _ in e.errors] != [4, 5, 6]:
+        raise AssertionError(f'Unexpected error lines: {e.errors}')
+    print(e)
+else:
+    raise AssertionError('Malformed draw rows were not reported')
+
+if [(row.main_round, row.consolation_round) for row in parsed] != [(True, False), (False, True)]:
+    raise AssertionError(f'Booleans were not parsed correctly: {parsed}')
+
+if context.players_list != players or context.countries.names != ['GER', 'SWE']:
+    raise AssertionError('Players were not registered in the tournament context')
+
+print('Input reader test passed.')
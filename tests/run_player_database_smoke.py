@@ -0,0 +1,138 @@
+"""Smoke test for the SQLite player database.
+Imports a federation-size players file, reads only the referenced players and compares players and
+draw rows with the CSV readers.
+"""
+import os
+import tempfile
+import time
+from misc.config import config, initialize_config
+from models.tournament_context import TournamentContext
+from data_io.input_reader import read_players, read_draw_data, iter_players, iter_draw_data, InputFormatError
+from data_io.player_database import PlayerDatabase
+from misc.batch import run_batch, EXIT_OK
+from misc.initializer import load_input_tables
+from misc.progress import set_headless
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+initialize_config(base_dir)
+tmp_dir = tempfile.mkdtemp()
+players_path = os.path.join(tmp_dir, 'players.csv')
+draw_data_path = os.path.join(tmp_dir, 'draw_input.csv')
+database_path = os.path.join(tmp_dir, 'cache', 'players.sqlite')
+config["files"]["players_path"] = players_path
+config["files"]["draw_data_path"] = draw_data_path
+config["files"]["player_database_path"] = database_path
+
+
+def write_players(start_numbers, qttr=None):
+    with open(players_path, 'w', encoding='utf-8') as file:
+        file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+        for sn in start_numbers:
+            rating = qttr if qttr is not None else "" if sn % 7 == 0 else 1000 + sn % 900
+            file.write(f'{sn};Last{sn};First{sn};{["GER", "SWE", "NOR"][sn % 3]};{"" if sn % 5 == 0 else f"Base{sn % 40}"};{"MF"[sn % 2]};{rating}\n')
+
+
+write_players(range(1, 50001))
+
+with open(draw_data_path, 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(101, 141):
+        file.write(f'S;M1;8;{300 - sn};;;;;{sn * 11};\n')
+    file.write('D;MD1;;;1;2;x;;1111;2222\n')
+
+started = time.perf_counter()
+context = TournamentContext()
+players = read_players(context)
+first_start = time.perf_counter() - started
+draw_data = read_draw_data(context)
+
+started = time.perf_counter()
+second_context = TournamentContext()
+read_players(second_context)
+second_start = time.perf_counter() - started
+print(f'First start (import): {first_start * 1000:.0f} ms, second start: {second_start * 1000:.0f} ms')
+
+csv_context = TournamentContext()
+referenced = {sn for row in iter_draw_data() for sn in (row.start_number_a, row.start_number_b) if sn is not None}
+expected_players = [p for p in iter_players(csv_context) if p.start_number in referenced]
+if [repr(p) + str((p.gender, p.qttr)) for p in players] != [repr(p) + str((p.gender, p.qttr)) for p in expected_players]:
+    raise AssertionError('Players of the database differ from the CSV file')
+if len(players) != 41 or len(context.players_list) != 41:
+    raise AssertionError(f'Expected 41 referenced players, got {len(players)}')
+fields = lambda row: tuple(getattr(row, slot) for slot in row.__slots__)
+if [fields(row) for row in draw_data] != [fields(row) for row in iter_draw_data()]:
+    raise AssertionError('Draw rows of the database differ from the CSV file')
+
+database = PlayerDatabase(database_path)
+if database.import_players(players_path):
+    raise AssertionError('An unchanged players file was imported again')
+plan = ' '.join(str(row) for row in database.connection.execute(
+    "EXPLAIN QUERY PLAN SELECT * FROM players WHERE country = 'GER'"))
+if 'players_country' not in plan:
+    raise AssertionError(f'Country index not used: {plan}')
+database.close()
+
+# the database keeps working without the federation file
+os.remove(players_path)
+if len(read_players(TournamentContext())) != 41:
+    raise AssertionError('Players could not be read from the database alone')
+
+# duplicate start numbers are reported and leave the database unchanged
+with open(players_path, 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n1111;A;B;GER;;M;\n1111;C;D;SWE;;M;\n')
+try:
+    read_players(TournamentContext())
+    raise AssertionError('Duplicate start numbers were not reported')
+except InputFormatError as e:
+    print(e)
+os.remove(players_path)
+if len(read_players(TournamentContext())) != 41:
+    raise AssertionError('A failed import changed the database')
+
+# a missing draw input is reported by the players step instead of yielding no players
+os.rename(draw_data_path, draw_data_path + '.bak')
+try:
+    read_players(TournamentContext())
+    raise AssertionError('A missing draw input was not reported')
+except FileNotFoundError:
+    pass
+os.rename(draw_data_path + '.bak', draw_data_path)
+
+# the input cache follows the player database
+set_headless(True)
+config["files"]["input_cache_path"] = os.path.join(tmp_dir, 'cache', 'input.cache')
+write_players(sorted(referenced | {7}), qttr=1)
+config["files"]["player_database_path"] = ""
+if len(load_input_tables().players_list) != 42:
+    raise AssertionError('Unexpected players read from the CSV file')
+config["files"]["player_database_path"] = database_path
+context = load_input_tables()
+if len(context.players_list) != 41 or context.players_by_start_number[1111].qttr != 1:
+    raise AssertionError('The input cache of the CSV file was used with the player database')
+write_players(sorted(referenced | {7}), qttr=2)
+database = PlayerDatabase(database_path)
+database.import_players(players_path)
+database.close()
+os.remove(players_path)
+if load_input_tables().players_by_start_number[1111].qttr != 2:
+    raise AssertionError('The input cache was used after the player database changed')
+config["files"]["input_cache_path"] = ""
+
+# a batch run draws and exports from the database alone, without the players file
+input_dir = os.path.join(tmp_dir, 'input')
+os.makedirs(input_dir)
+with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(102, 134, 2):
+        file.write(f'S;M1;4;{300 - sn};;;;;{sn * 11};\n')
+os.chdir(tmp_dir)
+with open(os.path.join(base_dir, 'config', 'config.ini'), encoding='utf-8') as file:
+    os.makedirs(os.path.join(tmp_dir, 'config'), exist_ok=True)
+    with open(os.path.join(tmp_dir, 'config', 'config.ini'), 'w', encoding='utf-8') as copy:
+        copy.write(file.read().replace('player_database_path =', f'player_database_path = {database_path}', 1))
+if run_batch(tmp_dir, input_dir, os.path.join(tmp_dir, 'output')) != EXIT_OK:
+    raise AssertionError('The batch run failed without the players file')
+if not os.path.exists(os.path.join(tmp_dir, 'output', 'output.csv')):
+    raise AssertionError('The batch run did not export the draw')
+
+print('Player database test passed.')
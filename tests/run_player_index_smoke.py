@@ -0,0 +1,67 @@
+"""Smoke test for the player indexes of the player browser.
+Builds a federation-size context, compares indexed searches with a full scan and checks the
+reverse index of group and bracket placements.
+"""
+import random
+import time
+from models.player import Player
+from models.draw_data import DrawDataRow
+from models.tournament_context import TournamentContext
+from models.player_index import PlayerIndex
+from viewer.player_viewer import players_page
+
+rng = random.Random(5)
+context = TournamentContext()
+countries = ['GER', 'SWE', 'NOR', 'FIN', 'DEN', 'POL', 'AUT', 'SUI']
+names = ['Müller', 'Meier', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Wagner', 'Becker', 'Hoffmann', 'Schulz']
+for sn in range(1, 30001):
+    Player(sn, f'First{sn}', f'{rng.choice(names)}{sn % 97}', rng.choice(countries), f'Base{rng.randrange(300)}', rng.choice('MF'), 1000 + sn % 900, context)
+for player in context.players_list:
+    context.players_by_start_number[player.start_number] = player
+
+for sn in range(1, 33):
+    context.draw_data.append(DrawDataRow('S', 'M1', 300 - sn, 8, None, None, None, None, sn, ''))
+context.draw_data.append(DrawDataRow('D', 'MD1', 100, 1, None, None, None, None, 1, 2))
+context.groups['S']['M1'] = {"group": {g: [row for row in context.draw_data[g - 1:32:8]] for g in range(1, 9)}, "snapshots": []}
+
+started = time.perf_counter()
+index = PlayerIndex(context)
+index.refresh()
+print(f'Indexed {len(index.start_numbers)} players in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+players = context.players_by_start_number.values()
+queries = [
+    ({'country': 'ger'}, lambda p: p.country == 'GER'),
+    ({'last_name': 'mü', 'gender': 'F'}, lambda p: p.last_name.casefold().startswith('mü') and p.gender == 'F'),
+    ({'start_number': 123}, lambda p: str(p.start_number).startswith('123')),
+    ({'base': 'Base7', 'country': 'SWE'}, lambda p: p.base == 'Base7' and p.country == 'SWE'),
+    ({'competition': 's  m1', 'start_number': 1}, lambda p: p.start_number <= 32 and str(p.start_number).startswith('1')),
+    ({'country': 'XYZ', 'gender': 'M'}, lambda p: False),
+    ({'start_number': '0'}, lambda p: False),
+    ({'start_number': '0x'}, lambda p: False),
+    ({'start_number': '007'}, lambda p: False),
+    ({'start_number': '299'}, lambda p: str(p.start_number).startswith('299')),
+]
+for filters, predicate in queries:
+    started = time.perf_counter()
+    found = index.search(**filters)
+    elapsed = time.perf_counter() - started
+    expected = sorted(p.start_number for p in players if predicate(p))
+    if found != expected:
+        raise AssertionError(f'Search {filters} found {len(found)} players, expected {len(expected)}')
+    print(f'{filters}: {len(found)} players in {elapsed * 1000:.2f} ms')
+
+if index.placements.get(9) != ['S M1 group 1'] or index.competitions_of.get(1) != ['S M1', 'D MD1']:
+    raise AssertionError(f'Unexpected placements {index.placements.get(9)} / competitions {index.competitions_of.get(1)}')
+context.brackets['S']['M1'] = {'main': {'matches': {1: [context.draw_data[0], 'BYE']}, 'snapshots': []}, 'consolation': {'matches': {}, 'snapshots': []}}
+index.refresh()
+index.refresh()
+if index.placements.get(1) != ['S M1 group 1', 'S M1 main match 1']:
+    raise AssertionError(f'Bracket placement missing: {index.placements.get(1)}')
+
+page = players_page(index, index.search(competition='S M1'), 0)
+if 'S M1 main match 1' not in page or page.count('\n') > 30:
+    raise AssertionError('Unexpected first page')
+print(page.splitlines()[3])
+
+print('Player index test passed.')
@@ -0,0 +1,93 @@
+"""Smoke test for the bulk QTTR refresh.
+Refreshes 900 players from a local stand-in ratings service, then from the ratings cache, and
+checks the retries and the fallback to cached ratings when the service is down.
+"""
+import os
+import sys
+import tempfile
+import time
+from misc.config import config, initialize_config
+from models.tournament_context import TournamentContext
+from data_io.input_reader import read_players
+from checks.validity_checker import check_all_players_only_exist_once
+from data_io.ratings_sync import read_ratings_settings, refresh_ratings
+from data_io.checkpoint import run_fingerprint
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from qttr_stub_server import StubRatingsServer
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+initialize_config(base_dir)
+tmp_dir = tempfile.mkdtemp()
+players_path = os.path.join(tmp_dir, 'players.csv')
+config["files"]["players_path"] = players_path
+config["files"]["player_database_path"] = ""
+config["files"]["draw_data_path"] = os.path.join(tmp_dir, 'draw_input.csv')
+if not config.has_section("ratings"):
+    config.add_section("ratings")
+config["ratings"]["cache_path"] = os.path.join(tmp_dir, 'cache', 'qttr.json')
+
+with open(players_path, 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn in range(1, 901):
+        file.write(f'{sn};Last{sn};First{sn};GER;;M;1000\n')
+with open(config["files"]["draw_data_path"], 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+
+
+def load_context():
+    context = TournamentContext()
+    read_players(context)
+    check_all_players_only_exist_once(context)
+    context.team(1, 2)
+    return context
+
+
+service_ratings = {sn: (None if sn % 50 == 0 else 1000 + sn) for sn in range(1, 901)}
+with StubRatingsServer(service_ratings, latency=0.05, fail_every=7) as server:
+    config["ratings"]["endpoint"] = server.url
+    settings = read_ratings_settings()
+    context = load_context()
+    fingerprint = run_fingerprint(context)
+    started = time.perf_counter()
+    report = refresh_ratings(context, settings)
+    elapsed = time.perf_counter() - started
+    print(f'Refreshed 900 players in {elapsed:.2f} s with {server.requests} requests '
+          f'(at most {server.max_concurrent} concurrent): {report}')
+    if report['fetched'] != 900 or report['not_refreshed'] or elapsed > 5:
+        raise AssertionError(f'Unexpected refresh: {report}')
+    if server.max_concurrent > settings['max_connections']:
+        raise AssertionError('The connection limit was exceeded')
+    if any(context.players_by_start_number[sn].qttr != rating for sn, rating in service_ratings.items()):
+        raise AssertionError('Ratings were not applied')
+    if context.teams[(1, 2)].qttr != (1001, 1002):
+        raise AssertionError('Team ratings were not updated')
+    # checkpoints of classes drawn with the old ratings are not resumed
+    if run_fingerprint(context) == fingerprint:
+        raise AssertionError('The run fingerprint does not depend on the refreshed ratings')
+
+    requests = server.requests
+    report = refresh_ratings(load_context(), settings)
+    if report['cached'] != 900 or server.requests != requests:
+        raise AssertionError(f'Fresh ratings were fetched again: {report}')
+
+# start numbers that are not in the tournament are ignored
+with StubRatingsServer({1: 1500}, latency=0, extra={5000: 1800}) as server:
+    extra_settings = dict(settings, endpoint=server.url, cache_path='')
+    context = load_context()
+    context.players_by_start_number = {1: context.players_by_start_number[1]}
+    context.teams = {}
+    report = refresh_ratings(context, extra_settings)
+    if report['fetched'] != 1 or context.players_by_start_number[1].qttr != 1500:
+        raise AssertionError(f'Unexpected refresh with an extra start number: {report}')
+
+# service down: outdated cached ratings are used
+settings['cache_ttl'] = 0
+settings['retries'] = 1
+context = load_context()
+report = refresh_ratings(context, settings)
+print('Service down:', report)
+if report['fetched'] or report['not_refreshed'] or context.players_by_start_number[5].qttr != 1005:
+    raise AssertionError(f'Cached ratings were not used: {report}')
+
+print('Ratings sync test passed.')
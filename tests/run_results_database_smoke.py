@@ -0,0 +1,76 @@
+"""Smoke test for the SQLite results database export.
+Draws groups and brackets in batch mode and answers typical questions of downstream tools with
+indexed queries, comparing them with output.csv.
+"""
+import csv
+import os
+import sqlite3
+import tempfile
+import time
+from misc.batch import run_batch, EXIT_OK
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp_dir = tempfile.mkdtemp()
+input_dir = os.path.join(tmp_dir, 'input')
+output_dir = os.path.join(tmp_dir, 'output')
+os.makedirs(input_dir)
+os.chdir(tmp_dir)
+
+countries = ['GER', 'SWE', 'NOR', 'FIN']
+with open(os.path.join(input_dir, 'players.csv'), 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn in range(1, 25):
+        file.write(f'{sn};Player{sn};P;{countries[sn % 4]};Base{sn % 6};M;{1500 - sn}\n')
+
+with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(1, 13):
+        file.write(f'S;M1;3;{300 - sn};;;;;{sn};\n')
+    for sn in range(13, 19):
+        main_round = sn < 16
+        file.write(f'S;M2;;{300 - sn};{sn % 3 + 1};{1 if main_round else 2};{"x" if main_round else ""};{"" if main_round else "x"};{sn};\n')
+    file.write('D;MD1;1;100;;;;;19;20\nD;MD1;1;90;;;;;21;22\nD;MD1;1;80;;;;;23;24\n')
+
+if run_batch(base_dir, input_dir, output_dir) != EXIT_OK:
+    raise AssertionError('Batch run failed')
+database_path = os.path.join(output_dir, 'results.sqlite')
+with open(os.path.join(output_dir, 'output.csv'), encoding='utf-8') as file:
+    output_rows = list(csv.DictReader(file, delimiter=';'))
+
+connection = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+second_reader = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+
+started = time.perf_counter()
+german_group_players = connection.execute(
+    "SELECT competition_class, group_no, start_number FROM group_players WHERE country = 'GER' ORDER BY start_number").fetchall()
+german_matches = second_reader.execute(
+    "SELECT DISTINCT competition_class, bracket, match_no FROM bracket_players WHERE country = 'GER'").fetchall()
+bases_in_group = connection.execute(
+    "SELECT DISTINCT base FROM group_players WHERE competition = 'S' AND competition_class = 'M1' AND group_no = 2").fetchall()
+elapsed = time.perf_counter() - started
+print(f'Queries answered in {elapsed * 1000:.2f} ms')
+
+expected_german = sorted((row['class'], int(row['group_no']), int(row['startnumber_A'])) for row in output_rows
+                         if row['S_D_M'] == 'S' and row['group_no'] and row['for_main_round'] == '' and row['country_A'] == 'GER'
+                         and row['draw_number'] == '')
+expected_german += sorted((row['class'], int(row['group_no']), int(sn)) for row in output_rows if row['S_D_M'] == 'D'
+                          for sn, country in ((row['startnumber_A'], row['country_A']), (row['startnumber_B'], row['country_B'])) if country == 'GER')
+if sorted(german_group_players) != sorted(expected_german):
+    raise AssertionError(f'Unexpected German group players: {german_group_players} != {expected_german}')
+if not german_matches or not bases_in_group:
+    raise AssertionError('Bracket or base queries returned nothing')
+
+byes = connection.execute("SELECT COUNT(*) FROM bracket_slots WHERE is_bye").fetchone()[0]
+expected_byes = sum(1 for row in output_rows if row['is_bye'] == 'True')
+if byes != expected_byes:
+    raise AssertionError(f'{byes} byes exported, output.csv has {expected_byes}')
+plan = ' '.join(str(row) for row in connection.execute(
+    "EXPLAIN QUERY PLAN SELECT * FROM participant_players WHERE start_number = 5"))
+if 'participant_players_start_number' not in plan and 'PRIMARY KEY' not in plan.upper():
+    raise AssertionError(f'Start number index not used: {plan}')
+run = dict(connection.execute("SELECT key, value FROM run"))
+if not run.get('run_fingerprint') or 'created' not in run:
+    raise AssertionError(f'Run metadata missing: {run}')
+print('Violations:', connection.execute("SELECT stage, rule, COUNT(*) FROM violations GROUP BY stage, rule").fetchall())
+
+print('Results database test passed.')
@@ -0,0 +1,103 @@
+"""Smoke test for the adaptive search budgets.
+Checks the budget decisions on synthetic score sequences, the lower bound of the group draw and
+that drawing a class reports its budget decisions.
+"""
+import copy
+import os
+import tempfile
+from misc.config import config, initialize_config
+from misc.batch import configure_batch_run
+from misc.initializer import load_input_tables
+from misc.progress import set_headless
+from draw.search_budget import SearchBudget, RetryBudget, read_budget_settings
+from draw.group_drawer import draw_groups_monte_carlo, violation_score_lower_bound, read_group_draw_settings
+from draw.bracket_drawer import draw_bracket
+
+budget_settings = {"reference_class_size": 32, "min_budget_factor": 0.25, "max_budget_factor": 2, "plateau_share": 0.5, "retry_patience": 3}
+
+# budgets scale with the class size within the factors
+if SearchBudget(1000, 8, budget_settings).budget != 250 or SearchBudget(1000, 64, budget_settings).budget != 2000 or SearchBudget(1000, 200, budget_settings).budget != 2000:
+    raise AssertionError('Budgets are not scaled with the class size')
+
+# a search that stops improving ends after one plateau window
+budget = SearchBudget(1000, 32, budget_settings)
+iteration = 0
+while budget.proceed(iteration + 1, 10 if iteration < 100 else 5):
+    iteration += 1
+if budget.decision != "plateau" or budget.iterations != 101 + 500:
+    raise AssertionError(f'Unexpected plateau decision: {budget.describe()}')
+
+# a search that keeps improving is extended up to the limit
+budget = SearchBudget(1000, 32, budget_settings)
+iteration = 0
+while budget.proceed(iteration + 1, 100000 - iteration):
+    iteration += 1
+if budget.decision != "budget exhausted" or budget.iterations != 2000 or budget.extensions != 2:
+    raise AssertionError(f'Unexpected extension decision: {budget.describe()}')
+
+# the lower bound stops right away
+budget = SearchBudget(1000, 32, budget_settings, lower_bound=2)
+if budget.proceed(1, 2) or budget.decision != "lower bound reached":
+    raise AssertionError('The lower bound did not stop the search')
+
+retries = RetryBudget(10, budget_settings)
+results = [5, 4, 4, 4, 4, 1]
+count = next(i for i, score in enumerate(results, start=1) if not retries.proceed(score))
+if count != 5 or retries.decision != "no better result":
+    raise AssertionError(f'Unexpected retry decision after {count} retries: {retries.decision}')
+
+# draw a class in which one base has more players than there are groups
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp_dir = tempfile.mkdtemp()
+input_dir = os.path.join(tmp_dir, 'input')
+os.makedirs(input_dir)
+os.chdir(tmp_dir)
+
+countries = ['GER', 'SWE', 'NOR', 'FIN']
+with open(os.path.join(input_dir, 'players.csv'), 'w', encoding='utf-8') as file:
+    file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+    for sn in range(1, 17):
+        base = 'Shared' if sn <= 6 else f'Base{sn}'
+        file.write(f'{sn};Player{sn};P;{countries[sn % 4]};{base};M;{1500 - sn}\n')
+with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+    for sn in range(1, 17):
+        file.write(f'S;M1;4;{300 - sn};;;;;{sn};\n')
+
+initialize_config(base_dir)
+configure_batch_run(input_dir, os.path.join(tmp_dir, 'output'))
+set_headless(True)
+config["group_draw"]["adaptive_budget"] = "true"
+config["bracket_draw"]["adaptive_budget"] = "true"
+if read_budget_settings("group_draw") is None:
+    raise AssertionError('Adaptive budgets are not enabled')
+context = load_input_tables()
+rows = [row for row in context.draw_data if row.competition_class == 'M1']
+
+# 6 players of one base, 4 of them in the first pot: two groups get two of them
+lower_bound = violation_score_lower_bound(context, rows, 4, read_group_draw_settings())
+if lower_bound != 2 * read_group_draw_settings()["base_violation_weight"]:
+    raise AssertionError(f'Unexpected lower bound {lower_bound}')
+
+reports = []
+groups, _ = draw_groups_monte_carlo(context, list(rows), 4, seed=5, snapshot_mode="off", on_budget=reports.append)
+print(f'Groups: {reports}')
+if len(reports) != 1 or "lower bound reached" not in reports[0]:
+    raise AssertionError('The group draw did not stop at the lower bound')
+
+for row, (group_no, group_pos) in zip(sorted(rows, key=lambda r: -r.seeding), [(g, p) for p in (1, 2) for g in range(1, 5)]):
+    row.group_no, row.group_pos = group_no, group_pos
+bracket_rows = [row for row in rows if row.group_pos is not None]
+reports = []
+draw_bracket(context, bracket_rows, seed=5, snapshot_mode="off", on_budget=reports.append)
+print(f'Bracket: {reports}')
+if len(reports) != 1:
+    raise AssertionError('The bracket draw did not report its budget')
+
+# a replay repeats the attempts of the adaptive draw, even if the budget settings changed since
+_, full_snapshots = draw_bracket(context, [copy.copy(row) for row in bracket_rows], seed=5, snapshot_mode="full")
+_, replay = draw_bracket(context, [copy.copy(row) for row in bracket_rows], seed=5, snapshot_mode="replay")
+config["bracket_draw"]["adaptive_budget"] = "false"
+if [(s.action, s.groups, s.violation_score) for s in replay] != [(s.action, s.groups, s.violation_score) for s in full_snapshots]:
+    raise AssertionError('The replay differs from the adaptive bracket draw')
+print('Search budget test passed.')
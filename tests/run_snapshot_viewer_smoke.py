@@ -0,0 +1,191 @@
+"""Smoke test for the cached, diff-based snapshot rendering.
+Steps through the snapshots of an 11-group class and a bracket, checks that the cached frames equal
+freshly rendered ones, that a step on a 160x50 terminal only rewrites a few lines above the prompt and
+stays within a frame (16 ms), and that frames too tall for a 120x40 terminal are redrawn completely.
+Also checks that snapshot files keep their class names and are not opened for another class, and
+that the replay menu offers the draws of a run in replay and in full mode but skips changed classes.
+"""
+import io
+import os
+import random
+import tempfile
+import time
+from misc.config import config, initialize_config
+from models.player import Player
+from models.draw_data import DrawDataRow
+from models.tournament_context import TournamentContext
+from draw.group_drawer import draw_groups_monte_carlo
+from draw.bracket_drawer import draw_bracket
+from viewer.group_viewer import snapshot_frame, GroupSnapshotCursor, GroupTableCache
+from viewer.bracket_viewer import bracket_snapshot_frame, BracketTableCache
+from viewer.screen import Screen, text_rows
+from data_io.snapshot_file import SnapshotFile, write_group_snapshots, write_bracket_snapshots
+from misc import menu
+from misc.batch import configure_batch_run
+from misc.initializer import load_input_tables, draw_and_export
+from misc.progress import set_headless
+import viewer.group_viewer
+
+FRAME_SECONDS = 0.016
+
+initialize_config(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+config["group_draw"]["max_iterations"] = "1000"
+config["group_draw"]["max_seed_retries"] = "1"
+
+context = TournamentContext()
+countries = ['GER', 'GER', 'GER', 'SWE', 'NOR']
+for sn in range(1, 45):
+    Player(sn, f'First{sn}', f'Last{sn}', countries[(sn - 1) % 11 % len(countries)], f'Base{(sn - 1) % 11}', 'M', 2000 - sn, context)
+for player in context.players_list:
+    context.players_by_start_number[player.start_number] = player
+
+rows = [DrawDataRow('S', 'M1', 300 - sn, 11, None, None, None, None, sn, '') for sn in range(1, 45)]
+for row in rows:
+    context.register_seeding(row)
+groups, snapshots = draw_groups_monte_carlo(context, rows, 11, seed=7, snapshot_mode='full')
+print(f'{len(groups)} groups, {len(snapshots)} snapshots')
+
+
+def step_through(terminal_size):
+    """Step through the group snapshots on a screen of the given size.
+
+    Returns the output and (seconds, rows written, whether the frame fits, whether it was redrawn) per step.
+    """
+    output = io.StringIO()
+    screen = Screen(stream=output, terminal_size=lambda: terminal_size)
+    columns, max_rows = screen.frame_size()
+    cursor = GroupSnapshotCursor(snapshots)
+    tables = GroupTableCache(context)
+    rng = random.Random(1)
+    steps = [1] * 200 + [-1] * 50 + [rng.randrange(-len(snapshots), len(snapshots)) for _ in range(20)]
+    index = 0
+    taken = []
+    screen.draw(snapshot_frame(context, snapshots, index, cursor, tables, max_rows, columns))
+    for step in steps:
+        index = min(max(index + step, 0), len(snapshots) - 1)
+        started = time.perf_counter()
+        frame = snapshot_frame(context, snapshots, index, cursor, tables, max_rows, columns)
+        position = output.tell()
+        written = screen.draw(frame)
+        redrawn = output.getvalue()[position:].startswith('\x1b[H\x1b[2J')
+        taken.append((time.perf_counter() - started, written, text_rows(frame, columns) <= max_rows, redrawn))
+        if frame != snapshot_frame(context, snapshots, index, max_rows=max_rows, columns=columns):
+            raise AssertionError(f'Cached frame of snapshot {index} differs from a fresh one')
+    return output.getvalue(), taken, max_rows
+
+
+# a wide terminal shows the groups touched by a step and the groups next to them, below them the prompt
+output, taken, max_rows = step_through((160, 50))
+average = sum(seconds for seconds, _, _, _ in taken[:250]) / 250
+rewritten = sum(written for _, written, _, _ in taken[:250]) / 250
+print(f'Group step: {average * 1000:.2f} ms on average, {rewritten:.1f} of {max_rows} rows rewritten')
+if not all(fits for _, _, fits, _ in taken):
+    raise AssertionError('A frame leaves no room for the prompt')
+if average > FRAME_SECONDS:
+    raise AssertionError(f'Stepping takes {average * 1000:.1f} ms')
+if rewritten > max_rows // 2:
+    raise AssertionError('The steps rewrote most of the frame')
+if 'clear' in output or '\x1b[2J' in output[10:]:
+    raise AssertionError('The screen was cleared after the first frame')
+
+# on a 120x40 terminal the group tables wrap and mostly even the touched groups do not fit above the
+# prompt, these steps are redrawn completely instead of rewriting rows that scrolled away
+output, taken, _ = step_through((120, 40))
+if any(not fits and not redrawn for _, _, fits, redrawn in taken):
+    raise AssertionError('A frame taller than the terminal was updated in place')
+
+bracket_rows = [DrawDataRow('S', 'M1', None, 11, sn % 11 + 1, 1 if sn <= 11 else 2, True, False, sn, '') for sn in range(1, 23)]
+matches, bracket_snapshots = draw_bracket(context, bracket_rows, seed=3, snapshot_mode='full', max_attempts=200)
+tables = BracketTableCache(context)
+started = time.perf_counter()
+for index in range(len(bracket_snapshots)):
+    frame = bracket_snapshot_frame(context, matches, bracket_snapshots, index, tables)
+    if frame != bracket_snapshot_frame(context, matches, bracket_snapshots, index):
+        raise AssertionError(f'Cached bracket frame of snapshot {index} differs from a fresh one')
+print(f'Bracket: {len(bracket_snapshots)} snapshots checked in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+# snapshot files keep long and non-ASCII class names and only open for their own class
+tmp_dir = tempfile.mkdtemp()
+class_names = ['Herren A Klasse 1', 'Herren A Klasse 2', 'Jungen Ü18']
+for number, class_name in enumerate(class_names):
+    write_group_snapshots(os.path.join(tmp_dir, f'{number}_groups.snap'), 'S', class_name, snapshots)
+    write_bracket_snapshots(os.path.join(tmp_dir, f'{number}_main.snap'), 'S', class_name, bracket_snapshots)
+for number, class_name in enumerate(class_names):
+    for name, expected in (('groups', snapshots), ('main', bracket_snapshots)):
+        snapshot_file = SnapshotFile(os.path.join(tmp_dir, f'{number}_{name}.snap'), 'S', class_name)
+        if snapshot_file.competition_class != class_name or [s.violation_score for s in snapshot_file] != [s.violation_score for s in expected]:
+            raise AssertionError(f'Snapshot file of {class_name} was not read back')
+        snapshot_file.close()
+try:
+    SnapshotFile(os.path.join(tmp_dir, '0_groups.snap'), 'S', class_names[1])
+    raise AssertionError('A snapshot file was opened for another class')
+except ValueError as e:
+    print(e)
+
+# the replay menu lists the draws of the last run, in replay mode from their replay records
+input_dir = os.path.join(tmp_dir, 'input')
+os.makedirs(input_dir)
+
+
+def write_input(qttr_of_first):
+    with open(os.path.join(input_dir, 'players.csv'), 'w', encoding='utf-8') as file:
+        file.write('start_number;last_name;first_name;country;base;gender;qttr\n')
+        for sn in range(1, 25):
+            file.write(f'{sn};Player{sn};P;{["GER", "SWE", "NOR"][sn % 3]};Base{sn % 5};M;{qttr_of_first if sn == 1 else 1500 - sn}\n')
+    with open(os.path.join(input_dir, 'draw_input.csv'), 'w', encoding='utf-8') as file:
+        file.write('S_D_M;class;#groups;seeding;group_no;group_pos;for_main_round;for_consolation;startnumber_A;startnumber_B\n')
+        for sn in range(1, 25):
+            file.write(f'S;{"M1" if sn <= 12 else "M2"};3;{300 - sn};;;;;{sn};\n')
+        for sn in range(13, 25):
+            group_pos = (sn - 13) // 4 + 1
+            file.write(f'S;M2;;;{(sn - 13) % 4 + 1};{group_pos};{"x;" if group_pos <= 2 else ";x"};{sn};\n')
+
+
+def replay_choices():
+    offered = []
+    def list_input(message, choices):
+        offered.extend(choices[:-1])
+        return 'Back'
+    menu.list_input = list_input
+    menu.show_replay_menu(load_input_tables())
+    return offered
+
+
+def run(snapshot_mode):
+    configure_batch_run(input_dir, os.path.join(tmp_dir, 'output'))
+    config["files"]["snapshot_dir"] = snapshot_dir
+    config["settings"]["snapshot_mode"] = snapshot_mode
+    context = load_input_tables()
+    draw_and_export(context)
+    return context
+
+
+os.chdir(tmp_dir)
+set_headless(True)
+os.makedirs(os.path.join(tmp_dir, 'output'))
+snapshot_dir = os.path.join(tmp_dir, 'snapshots')
+os.makedirs(snapshot_dir)
+config["files"]["input_cache_path"] = ""
+config["files"]["result_store_path"] = ""
+write_input(1499)
+context = run('replay')
+expected = ['S M1 groups', 'S M2 consolation', 'S M2 groups', 'S M2 main']
+if sorted(os.listdir(snapshot_dir)) != [f'{name.replace(" ", "_")}.replay' for name in expected] or replay_choices() != expected:
+    raise AssertionError(f'Replay records missing: {sorted(os.listdir(snapshot_dir))}')
+replayed = []
+viewer.group_viewer.show_snapshot_viewer = lambda context, competition, competition_class, snapshots: replayed.append(snapshots)
+menu.list_input = lambda message, choices: 'S M1 groups'
+menu.show_replay_menu(load_input_tables())
+final_groups = {group_no: sorted(p.start_number_a for p in members) for group_no, members in replayed[0].groups_at(len(replayed[0]) - 1).items()}
+if final_groups != {group_no: sorted(p.start_number_a for p in members) for group_no, members in context.groups['S']['M1']['group'].items()}:
+    raise AssertionError('The replay record does not re-simulate the drawn groups')
+
+# full mode replaces the replay records by snapshot files, changed classes are skipped
+run('full')
+if sorted(os.listdir(snapshot_dir)) != [f'{name.replace(" ", "_")}.snap' for name in expected] or replay_choices() != expected:
+    raise AssertionError(f'Snapshot files missing: {sorted(os.listdir(snapshot_dir))}')
+write_input(1600)
+if replay_choices() != [name for name in expected if 'M1' not in name]:
+    raise AssertionError('The snapshot file of a changed class was offered')
+
+print('Snapshot viewer test passed.')
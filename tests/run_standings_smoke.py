@@ -0,0 +1,117 @@
+"""Smoke test for group standings.
+Parses group results, checks the table tennis tie-breaks and the derived bracket rows and times a
+full tournament day.
+"""
+import os
+import random
+import tempfile
+import time
+from data_io.input_reader import iter_group_results, InputFormatError
+from draw.standings import compute_standings, standings_to_bracket_rows, StandingsError
+from models.draw_data import DrawDataRow
+from models.group_result import GroupMatchResult
+
+tmp_dir = tempfile.mkdtemp()
+results_path = os.path.join(tmp_dir, 'group_results.csv')
+
+
+def group(competition_class, group_no, start_numbers):
+    return [DrawDataRow('S', competition_class, 300 - sn, 2, group_no, None, False, False, sn, '') for sn in start_numbers]
+
+
+groups = {('S', 'M1'): {1: group('M1', 1, [1, 2, 3, 4]), 2: group('M1', 2, [5, 6, 7, 8])}}
+
+with open(results_path, 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;group_no;startnumber_1;startnumber_2;result\n')
+    # group 1: 1, 2 and 3 beat each other in a circle, the games ratio among them decides
+    file.write('S;M1;1;1;2;11:5 11:5 11:5\n')
+    file.write('S;M1;1;2;3;11:5,11:5,5:11,11:5\n')
+    file.write('S;M1;1;3;1;11:5 11:5 5:11 5:11 11:5\n')
+    file.write('S;M1;1;1;4;wo 4\n')
+    file.write('S;M1;1;2;4;11:1 11:1 11:1\n')
+    file.write('S;M1;1;3;4;11:1 11:1 11:1\n')
+    # group 2: same circle with equal games, the points ratio decides
+    file.write('S;M1;2;5;6;11:9 11:9 9:11 11:9\n')
+    file.write('S;M1;2;6;7;11:2 11:2 2:11 11:2\n')
+    file.write('S;M1;2;7;5;11:9 11:9 9:11 11:9\n')
+    file.write('S;M1;2;5;8;11:1 11:1 11:1\n')
+    file.write('S;M1;2;6;8;11:1 11:1 11:1\n')
+    file.write('S;M1;2;8;7;1:11 1:11 1:11\n')
+
+standings, incomplete = compute_standings(groups, iter_group_results(results_path))
+ranking = {group_no: [p.start_number_a for p in members] for group_no, members in standings[('S', 'M1')].items()}
+if ranking != {1: [1, 3, 2, 4], 2: [6, 5, 7, 8]}:
+    raise AssertionError(f'Unexpected standings: {ranking}')
+if incomplete:
+    raise AssertionError(f'Unexpected incomplete groups: {incomplete}')
+
+rows = standings_to_bracket_rows(standings, {'main_round_positions': {1, 2}, 'consolation_positions': {3, 4}})
+flags = {row.start_number_a: (row.group_no, row.group_pos, row.main_round, row.consolation_round) for row in rows}
+if flags[3] != (1, 2, True, False) or flags[2] != (1, 3, False, True) or flags[8] != (2, 4, False, True):
+    raise AssertionError(f'Unexpected bracket rows: {flags}')
+
+# without any result, ties are decided by seeding
+untouched, incomplete = compute_standings({('S', 'W1'): {1: group('W1', 1, [12, 10, 11])}}, [])
+if [p.start_number_a for p in untouched[('S', 'W1')][1]] != [10, 11, 12]:
+    raise AssertionError('Ties without results are not decided by seeding')
+if incomplete != [('S', 'W1', 1, 0, 3)]:
+    raise AssertionError(f'Unexpected incomplete groups: {incomplete}')
+
+# results that do not fit the groups are reported together
+try:
+    compute_standings(groups, [GroupMatchResult('S', 'M1', 1, 1, 5, [(11, 3)] * 3), GroupMatchResult('S', 'M1', 1, 1, 99, [(11, 3)] * 3)])
+except StandingsError as e:
+    if len(e.errors) != 2:
+        raise AssertionError(f'Unexpected errors: {e.errors}')
+else:
+    raise AssertionError('Results of participants in different groups were accepted')
+
+# walkovers of participants outside the match and results without a winner are reported as well
+try:
+    compute_standings(groups, [GroupMatchResult('S', 'M1', 1, 1, 2, absent=3), GroupMatchResult('S', 'M1', 1, 1, 3, absent=99),
+                               GroupMatchResult('S', 'M1', 1, 1, 4, [(11, 3), (3, 11)])])
+except StandingsError as e:
+    if len(e.errors) != 3:
+        raise AssertionError(f'Unexpected errors: {e.errors}')
+else:
+    raise AssertionError('Invalid walkovers and results without a winner were accepted')
+
+with open(results_path, 'w', encoding='utf-8') as file:
+    file.write('S_D_M;class;group_no;startnumber_1;startnumber_2;result\n')
+    file.write('S;M1;1;1;2;11:11 11:5\n')
+    file.write('S;M1;1;1;2;wo 3\n')
+try:
+    list(iter_group_results(results_path))
+except InputFormatError as e:
+    if [line_number for line_number, _ in e.errors] != [2, 3]:
+        raise AssertionError(f'Unexpected error lines: {e.errors}')
+else:
+    raise AssertionError('Malformed results were not reported')
+
+# a full tournament day: 900 singles entries in 150 groups of 6
+rng = random.Random(1)
+day_groups = {}
+day_results = []
+start_number = 1
+for class_no in range(1, 7):
+    competition_class = f'M{class_no}'
+    day_groups[('S', competition_class)] = {}
+    for group_no in range(1, 26):
+        members = group(competition_class, group_no, range(start_number, start_number + 6))
+        start_number += 6
+        day_groups[('S', competition_class)][group_no] = members
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                # five games always have a winner
+                games = [(11, rng.randint(0, 9)) if rng.random() < 0.5 else (rng.randint(0, 9), 11) for _ in range(5)]
+                day_results.append(GroupMatchResult('S', competition_class, group_no, a.start_number_a, b.start_number_a, games))
+
+started = time.perf_counter()
+day_standings, day_incomplete = compute_standings(day_groups, day_results)
+standings_to_bracket_rows(day_standings, {'main_round_positions': {1, 2}, 'consolation_positions': {3, 4}})
+elapsed = time.perf_counter() - started
+print(f'Standings of 900 entries ({len(day_results)} matches) computed in {elapsed * 1000:.0f} ms')
+if day_incomplete or elapsed > 1:
+    raise AssertionError(f'Full day standings too slow or incomplete: {elapsed:.2f}s, {day_incomplete}')
+
+print('Standings test passed.')
@@ -1,18 +1,13 @@
 """Module for viewing brackets in either interactive or table mode."""
-import os
 import inquirer
 from tabulate import tabulate
 from viewer.view_config import table_format
-from models.player import players_by_start_number
+from viewer.screen import Screen
+from models.team import team_key
 from misc.config import config
 
 
-def clear_screen():
-    """Clear the terminal screen in a cross-platform way."""
-    os.system("cls" if os.name == "nt" else "clear")
-
-
-def show_bracket(competition, competition_class, bracket):
+def show_bracket(context, competition, competition_class, bracket):
     """Display bracket information in either interactive or table mode."""
     if not bracket or ('main' not in bracket and 'consolation' not in bracket):
         print("No bracket information available for this competition class.")
@@ -20,12 +15,12 @@ def show_bracket(competition, competition_class, bracket):
 
     mode = config["settings"].get("mode", "table")
     if mode == 'interactive':
-        show_bracket_menu(competition, competition_class, bracket)
+        show_bracket_menu(context, competition, competition_class, bracket)
     else:
-        show_bracket_tables(competition, competition_class, bracket)
+        show_bracket_tables(context, competition, competition_class, bracket)
 
 
-def show_bracket_menu(competition, competition_class, bracket):
+def show_bracket_menu(context, competition, competition_class, bracket):
     """Interactive bracket viewer: choose main or consolation bracket and step through snapshots."""
     bracket_types = [k for k in ('main', 'consolation') if bracket.get(k) and bracket[k].get('matches')]
     if not bracket_types:
@@ -46,28 +41,32 @@ def show_bracket_menu(competition, competition_class, bracket):
 
     if not snapshots:
         print(f"Bracket '{bracket_type}' has no replay snapshots available.")
-        show_bracket_table(matches, title=f"{competition} {competition_class} {bracket_type.capitalize()} Bracket")
+        show_bracket_table(context, matches, title=f"{competition} {competition_class} {bracket_type.capitalize()} Bracket")
         return
 
     current_index = 0
     last_action = "Forward"
+    message = ""
+    screen = Screen()
+    tables = BracketTableCache(context)
 
     while True:
-        clear_screen()
-        print(f"Competition: {competition} | Class: {competition_class} | Bracket: {bracket_type.capitalize()}")
-        display_bracket_snapshot(matches, snapshots, current_index)
+        frame = (f"Competition: {competition} | Class: {competition_class} | Bracket: {bracket_type.capitalize()}\n"
+                 + bracket_snapshot_frame(context, matches, snapshots, current_index, tables))
+        screen.draw(frame + (f"\n{message}" if message else ""))
+        message = ""
         action = prompt_snapshot_action(last_action)
 
         if action == "Forward":
             if current_index + 1 < len(snapshots):
                 current_index += 1
             else:
-                print("Already at the last snapshot.")
+                message = "Already at the last snapshot."
         elif action == "Backward":
             if current_index > 0:
                 current_index -= 1
             else:
-                print("Already at the first snapshot.")
+                message = "Already at the first snapshot."
         elif action == "Forward to next improvement":
             next_index = current_index + 1
             while next_index < len(snapshots):
@@ -76,7 +75,7 @@ def show_bracket_menu(competition, competition_class, bracket):
                     break
                 next_index += 1
             else:
-                print("No next improvement found.")
+                message = "No next improvement found."
         elif action == "Go to snapshot":
             snapshot_number = inquirer.text(message=f"Enter snapshot number (1–{len(snapshots)}):")
             try:
@@ -84,9 +83,9 @@ def show_bracket_menu(competition, competition_class, bracket):
                 if 1 <= num <= len(snapshots):
                     current_index = num - 1
                 else:
-                    print("Invalid snapshot number.")
+                    message = "Invalid snapshot number."
             except ValueError:
-                print("Please enter a valid integer.")
+                message = "Please enter a valid integer."
         elif action == "Show final bracket":
             current_index = len(snapshots) - 1
         elif action == "Quit":
@@ -94,16 +93,47 @@ def show_bracket_menu(competition, competition_class, bracket):
         last_action = action
 
 
-def show_bracket_tables(competition, competition_class, bracket):
+def show_bracket_tables(context, competition, competition_class, bracket):
     """Print main and consolation bracket tables if available."""
     print(f"Competition: {competition} | Class: {competition_class}")
     if bracket.get('main') and bracket['main'].get('matches'):
-        show_bracket_table(bracket['main']['matches'], title="Main Bracket")
+        show_bracket_table(context, bracket['main']['matches'], title="Main Bracket")
+        show_round_probabilities(context, bracket['main']['matches'])
     if bracket.get('consolation') and bracket['consolation'].get('matches'):
-        show_bracket_table(bracket['consolation']['matches'], title="Consolation Bracket")
+        show_bracket_table(context, bracket['consolation']['matches'], title="Consolation Bracket")
+        show_round_probabilities(context, bracket['consolation']['matches'])
+
+
+def round_name(players: int) -> str:
+    return {1: "Winner", 2: "Final", 4: "Semifinal", 8: "Quarterfinal"}.get(players, f"Last {players}")
+
+
+def round_probability_table(context, matches, limit=16):
+    """Table of the participants with the best chances to win, with their probability to reach each round."""
+    from checks.bracket_probabilities import meeting_probabilities
+    probabilities = meeting_probabilities(context, matches)
+    rounds = probabilities.rounds
+    headers = ["Participant"] + [round_name(1 << (rounds - r)) for r in range(1, rounds + 1)]
+    slots = [i for i, p in enumerate(probabilities.participants) if p is not None and p != "BYE"]
+    slots.sort(key=lambda i: tuple(-probabilities.reach[r][i] for r in range(rounds, 0, -1)))
+    rows = [[format_participant_display(context, probabilities.participants[i])]
+            + [f"{probabilities.reach[r][i]:.0%}" for r in range(1, rounds + 1)] for i in slots[:limit]]
+    try:
+        return tabulate(rows, headers=headers, tablefmt=table_format)
+    except UnicodeEncodeError:
+        return tabulate(rows, headers=headers, tablefmt='simple')
 
 
-def format_participant_display(p):
+def show_round_probabilities(context, matches):
+    """Print how likely the favorites reach each round, estimated from their QTTR ratings."""
+    if len(matches) < 2:
+        return
+    print("Chances to reach each round (from QTTR)")
+    print(round_probability_table(context, matches))
+    print()
+
+
+def format_participant_display(context, p):
     """Format a single participant with metadata for vertical display.
     
     Format: seed:{N} | G:{group_no} | gp:{group_pos} | name [country/base] (for teams: PlayerA / PlayerB [country/base])
@@ -118,15 +148,15 @@ def format_participant_display(p):
         # Get player information
         if getattr(p, 'start_number_b', None) is None:
             # Single player
-            pl = players_by_start_number.get(p.start_number_a)
+            pl = context.players_by_start_number.get(p.start_number_a)
             if pl is None:
                 return f"Unknown({p.start_number_a})"
             player_name = f"{pl.last_name} ({pl.start_number}) [{pl.country}/{pl.base if pl.base else '-'}]"
         else:
             # Team: format as "PlayerA [country/base] / PlayerB [country/base]"
-            pa = players_by_start_number.get(p.start_number_a)
-            pb = players_by_start_number.get(p.start_number_b)
-            if pa and pb:
+            team = context.teams.get(team_key(p.start_number_a, p.start_number_b))
+            if team is not None:
+                pa, pb = team.player_a, team.player_b
                 player_name = f"{pa.last_name} ({pa.start_number}) [{pa.country}/{pa.base if pa.base else '-'}] / {pb.last_name} ({pb.start_number}) [{pb.country}/{pb.base if pb.base else '-'}]"
             else:
                 player_name = f"{p.start_number_a} / {p.start_number_b}"
@@ -148,13 +178,20 @@ def format_participant_display(p):
         return "ERR"
 
 
-def show_bracket_table(first_round_matches, title=None):
+def show_bracket_table(context, first_round_matches, title=None):
     """
     Display bracket table with participants stacked vertically and separators between matches.
     first_round_matches: dict mapping round match index to participant list.
     """
     if title:
         print(title)
+    print(bracket_table(context, first_round_matches))
+    print()
+
+
+def bracket_table(context, first_round_matches, format_participant=None):
+    """Render the bracket table of show_bracket_table, participants are formatted with format_participant."""
+    format_participant = format_participant or (lambda p: format_participant_display(context, p))
     table_data = []
 
     items = list(first_round_matches.items())
@@ -166,46 +203,81 @@ def show_bracket_table(first_round_matches, title=None):
         if a == 'BYE' and b != 'BYE':
             a, b = b, a
 
-        # Format both participants
-        formatted_a = format_participant_display(a)
-        formatted_b = format_participant_display(b)
-
         # Add first participant row with match index
-        table_data.append([match_idx, formatted_a])
-        
+        table_data.append([match_idx, format_participant(a)])
+
         # Add second participant row
-        table_data.append(["", formatted_b])
+        table_data.append(["", format_participant(b)])
 
         # Add filled separator line between matches (unless it's the last match)
         if i < len(items) - 1:
             table_data.append(["", "─" * 80])
 
     try:
-        print(tabulate(table_data, headers=["Match", "Participant"], tablefmt=table_format))
+        return tabulate(table_data, headers=["Match", "Participant"], tablefmt=table_format)
     except UnicodeEncodeError:
-        print(tabulate(table_data, headers=["Match", "Participant"], tablefmt='simple'))
-    print()
+        return tabulate(table_data, headers=["Match", "Participant"], tablefmt='simple')
+
+
+def _participant_key(p):
+    if p is None or p == "BYE":
+        return p
+    return (p.start_number_a, getattr(p, 'start_number_b', None), getattr(p, 'seeding', None),
+            getattr(p, 'group_no', None), getattr(p, 'group_pos', None))
+
 
+class BracketTableCache:
+    """Rendered bracket tables of one viewer: the text of every participant and the table of every bracket state seen so far."""
+    MAX_TABLES = 1024
 
-def display_bracket_snapshot(matches, snapshots, index):
+    def __init__(self, context):
+        self.context = context
+        self._participants = {}
+        self._tables = {}
+
+    def participant(self, p):
+        key = _participant_key(p)
+        text = self._participants.get(key)
+        if text is None:
+            text = self._participants[key] = format_participant_display(self.context, p)
+        return text
+
+    def table(self, matches):
+        key = tuple((match_idx, tuple(_participant_key(p) for p in participants)) for match_idx, participants in matches.items())
+        table = self._tables.get(key)
+        if table is None:
+            if len(self._tables) >= self.MAX_TABLES:
+                self._tables.clear()
+            table = self._tables[key] = bracket_table(self.context, matches, self.participant)
+        return table
+
+
+def display_bracket_snapshot(context, matches, snapshots, index):
     """Display a snapshot for the current bracket assignment."""
+    print(bracket_snapshot_frame(context, matches, snapshots, index))
+
+
+def bracket_snapshot_frame(context, matches, snapshots, index, tables=None):
+    """Render a snapshot of the bracket assignment, tables are taken from the viewer's cache if given."""
     if index < 0 or index >= len(snapshots):
-        print("Snapshot index out of range.")
-        return
+        return "Snapshot index out of range."
 
+    tables = tables or BracketTableCache(context)
     snapshot = snapshots[index]
-    print(f"Snapshot {index + 1}/{len(snapshots)}")
+    lines = [f"Snapshot {index + 1}/{len(snapshots)}"]
     if getattr(snapshot, 'action', None) is not None:
-        print(f"Action: {snapshot.action}")
+        lines.append(f"Action: {snapshot.action}")
     if getattr(snapshot, 'groups', None) is not None:
-        print(f"Metadata: {snapshot.groups}")
-    print(f"Violation score: {snapshot.violation_score}")
+        lines.append(f"Metadata: {snapshot.groups}")
+    lines.append(f"Violation score: {snapshot.violation_score}")
     for name, violations in snapshot.violations.items():
-        print(f"{name}: {violations}")
-    print("")
+        lines.append(f"{name}: {violations}")
+    lines.append("")
     state = snapshot.initial_groups if hasattr(snapshot, 'initial_groups') else matches
-    show_bracket_table(state, title="Bracket snapshot")
-    print("")
+    lines.append("Bracket snapshot")
+    lines.append(tables.table(state))
+    lines.append("")
+    return "\n".join(lines)
 
 
 def prompt_snapshot_action(last_action):
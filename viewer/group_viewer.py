@@ -1,99 +1,175 @@
 """Module for viewing groups and snapshots in either interactive or table mode."""
-import os
 import inquirer
 from tabulate import tabulate
 from viewer.view_config import table_format
-from models.player import players_by_start_number
+from viewer.screen import Screen, text_rows
 from misc.config import config
 from draw.group_drawer import EmptySlot
 
-def clear_screen():
-    """Clear the terminal screen in a cross-platform way."""
-    os.system("cls" if os.name == "nt" else "clear")
+SINGLE_HEADERS = ["#", "Seeding", "Last Name                  ", "First Name               ",
+                  "Start Number", "Country           ", "Base                   ", "QTTR"]
+TEAM_HEADERS = ["#", "Seeding", "Last Names                                ", "Start Numbers",
+                "Countries                      ", "Bases                                     ", "QTTR values    "]
 
-
-def show_groups(competition, competition_class, groups, snapshots):
+def show_groups(context, competition, competition_class, groups, snapshots):
     """Display groups in either interactive or table mode."""
     mode = config["settings"]["mode"]
-    if mode == 'interactive':
-        show_snapshot_viewer(competition, competition_class, snapshots)
+    if mode == 'interactive' and snapshots:
+        show_snapshot_viewer(context, competition, competition_class, snapshots)
     else:
-        show_groups_table(competition, competition_class, groups)
+        show_groups_table(context, competition, competition_class, groups)
 
 
-def show_groups_table(competition, competition_class, groups):
+def show_groups_table(context, competition, competition_class, groups):
     """Print all groups in a tabular format."""
     print(f"Competition: {competition} | Class: {competition_class}")
     for number, group in groups.items():
         print(f"Group {number}")
-        print_group_table(group)
+        print_group_table(context, group)
     print("")
 
-def print_group_table(group):
+def print_group_table(context, group):
     """Print a single group in a tabular format."""
-    table_data = []
-    if group[0].start_number_b is None:
-        # Single player group
-        for idx, member in enumerate(group):
-            if isinstance(member, EmptySlot):
-                continue
-            
-            player = players_by_start_number[member.start_number_a]
-            table_data.append([
-                idx + 1,
-                member.seeding,
-                player.last_name,
-                player.first_name,
-                player.start_number,
-                player.country,
-                f"{player.base}",
-                player.qttr
-            ])
-        print(tabulate(table_data, headers=["#", "Seeding", "Last Name                  ", "First Name               ",
-                                            "Start Number", "Country           ", "Base                   ", "QTTR"], tablefmt=table_format))
-    else:
-        # Team group
-        for idx, participant in enumerate(group):
-            if isinstance(participant, EmptySlot):
-                continue
-
-            player_a = players_by_start_number[participant.start_number_a]
-            player_b = players_by_start_number[participant.start_number_b]
-            table_data.append([
-                idx + 1,
-                f"{participant.seeding}",
-                f"{player_a.last_name}/{player_b.last_name}",
-                f"{player_a.start_number}/{player_b.start_number}",
-                f"{player_a.country}/{player_b.country}",
-                f"{player_a.base}/{player_b.base}",
-                f"{player_a.qttr}/{player_b.qttr}",
-            ])
-        print(tabulate(table_data, headers=["#", "Seeding", "Last Names                                ", "Start Numbers",
-                                            "Countries                      ", "Bases                                     ", "QTTR values    "], tablefmt=table_format))
-
-
-
-def show_snapshot_viewer(competition, competition_class, snapshots):
+    print(group_table(context, group))
+
+
+def participant_row(context, participant):
+    """Table cells of a group participant, without its position."""
+    if participant.start_number_b is None:
+        player = context.players_by_start_number[participant.start_number_a]
+        return (participant.seeding, player.last_name, player.first_name, player.start_number,
+                player.country, f"{player.base}", player.qttr)
+    team = context.team_of(participant)
+    player_a, player_b = team.player_a, team.player_b
+    return (f"{participant.seeding}",
+            f"{player_a.last_name}/{player_b.last_name}",
+            f"{player_a.start_number}/{player_b.start_number}",
+            f"{player_a.country}/{player_b.country}",
+            f"{player_a.base}/{player_b.base}",
+            f"{team.qttr[0]}/{team.qttr[1]}")
+
+
+def group_table(context, group, row_of=None):
+    """Render a single group as a table, rows are looked up with row_of (default participant_row)."""
+    row_of = row_of or (lambda participant: participant_row(context, participant))
+    table_data = [[idx + 1, *row_of(member)] for idx, member in enumerate(group) if not isinstance(member, EmptySlot)]
+    headers = SINGLE_HEADERS if group[0].start_number_b is None else TEAM_HEADERS
+    return tabulate(table_data, headers=headers, tablefmt=table_format)
+
+
+def _participant_key(participant):
+    if isinstance(participant, EmptySlot):
+        return None
+    return (participant.start_number_a, participant.start_number_b, participant.seeding)
+
+
+class GroupTableCache:
+    """Rendered group tables of one viewer, so that a step only renders the groups it changed.
+
+    The rows of every participant and the table of every group content seen so far are kept.
+    """
+    MAX_TABLES = 4096
+
+    def __init__(self, context):
+        self.context = context
+        self._rows = {}
+        self._tables = {}
+
+    def row(self, participant):
+        key = _participant_key(participant)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = participant_row(self.context, participant)
+        return row
+
+    def table(self, group):
+        key = tuple(_participant_key(member) for member in group)
+        table = self._tables.get(key)
+        if table is None:
+            if len(self._tables) >= self.MAX_TABLES:
+                self._tables.clear()
+            table = self._tables[key] = group_table(self.context, group, self.row)
+        return table
+
+
+class GroupSnapshotCursor:
+    """Groups after a snapshot, moved from snapshot to snapshot by applying or undoing single actions.
+
+    Replayed draws (with `groups_at`) re-simulate the groups themselves.
+    """
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.index = None
+        self.groups = None
+
+    def move_to(self, index):
+        """Return the groups right after the snapshot at index."""
+        if hasattr(self.snapshots, 'groups_at'):
+            self.groups = self.snapshots.groups_at(index)
+        else:
+            if self.groups is None or index < abs(index - self.index):
+                self.groups = {g: list(members) for g, members in self.snapshots[0].initial_groups.items()}
+                self.index = 0
+            for i in range(self.index + 1, index + 1):
+                self._apply(self.snapshots[i], undo=False)
+            for i in range(self.index, index, -1):
+                self._apply(self.snapshots[i], undo=True)
+        self.index = index
+        return self.groups
+
+    def _apply(self, snap, undo):
+        if not (hasattr(snap, 'action') and hasattr(snap, 'groups') and hasattr(snap, 'participants')):
+            return
+        if snap.action not in ("swap", "revert"):
+            return
+        g1, g2 = snap.groups
+        p1, p2 = snap.participants
+        # a swap moves p2 into g1, a revert moves p1 back; undoing does the opposite
+        if (snap.action == "swap") != undo:
+            self.groups[g1][snap.index], self.groups[g2][snap.index] = p2, p1
+        else:
+            self.groups[g1][snap.index], self.groups[g2][snap.index] = p1, p2
+
+
+def format_participant(context, participant):
+    """Describe a group participant including the countries of its players."""
+    if isinstance(participant, EmptySlot):
+        return repr(participant)
+    player_a = context.players_by_start_number.get(participant.start_number_a)
+    player_b = context.players_by_start_number.get(participant.start_number_b)
+    return (f"{participant.competition} {participant.competition_class} (Seeding: {participant.seeding}, "
+            f"Player A: {participant.start_number_a}, {player_a.country if player_a else ''}. "
+            f"Player B: {participant.start_number_b}, {player_b.country if player_b else ''})")
+
+
+def show_snapshot_viewer(context, competition, competition_class, snapshots):
     """Interactive viewer for group assignment snapshots."""
     current_index = 0
     last_action = "Forward"
+    message = ""
+    screen = Screen()
+    cursor = GroupSnapshotCursor(snapshots)
+    tables = GroupTableCache(context)
 
     while True:
-        clear_screen()
-        print(f"Competition: {competition} | Class: {competition_class}")
-        display_snapshot(snapshots, current_index)
+        header = f"Competition: {competition} | Class: {competition_class}"
+        columns, rows = screen.frame_size()
+        max_rows = rows - text_rows(header, columns) - (text_rows(message, columns) if message else 0)
+        frame = f"{header}\n" + snapshot_frame(context, snapshots, current_index, cursor, tables, max_rows, columns)
+        screen.draw(frame + (f"\n{message}" if message else ""))
+        message = ""
         action = prompt_snapshot_action(last_action)
 
         if action == "Forward":
             if current_index + 1 < len(snapshots):
                 current_index += 1
             else:
-                print("Already at last snapshot.")
+                message = "Already at last snapshot."
         elif action == "Backward":
             if current_index > 0:
                 current_index -= 1
             else:
-                print("Already at first snapshot.")
+                message = "Already at first snapshot."
         elif action == "Forward to next improvement":
             next_index = current_index + 1
             while next_index < len(snapshots):
@@ -102,7 +178,7 @@ def show_snapshot_viewer(competition, competition_class, snapshots):
                     break
                 next_index += 1
             else:
-                print("No next improvement found.")
+                message = "No next improvement found."
         elif action == "Go to snapshot":
             snapshot_number = inquirer.text(message=f"Enter snapshot number (1–{len(snapshots)}):")
             try:
@@ -110,50 +186,68 @@ def show_snapshot_viewer(competition, competition_class, snapshots):
                 if 1 <= num <= len(snapshots):
                     current_index = num - 1
                 else:
-                    print("Invalid snapshot number.")
+                    message = "Invalid snapshot number."
             except ValueError:
-                print("Please enter a valid integer.")
+                message = "Please enter a valid integer."
         elif action == "Show final groups":
             current_index = len(snapshots) - 1
         elif action == "Quit":
             break
         last_action = action
 
-def display_snapshot(snapshots, index):
+def display_snapshot(context, snapshots, index):
     """Display the current snapshot of group assignments."""
-    # Start from initial_groups in snapshots[0]
-    if not hasattr(snapshots[0], 'initial_groups') and not isinstance(snapshots[0].initial_groups, dict):
-        print("Invalid snapshot format: missing initial_groups.")
-
-    temp_groups = {g: list(members) for g, members in snapshots[0].initial_groups.items()}
-    # Apply all actions up to the current index
-    for i in range(1, index + 1):
-        snap = snapshots[i]
-        if hasattr(snap, 'action') and hasattr(snap, 'groups') and hasattr(snap, 'participants'):
-            if snap.action == "swap":
-                g1, g2 = snap.groups
-                p1, p2 = snap.participants
-                temp_groups[g1][snap.index], temp_groups[g2][snap.index] = p2, p1
-            elif snap.action == "revert":
-                g1, g2 = snap.groups
-                p1, p2 = snap.participants
-                temp_groups[g1][snap.index], temp_groups[g2][snap.index] = p1, p2
-    # Display reconstructed groups
-    for number, group in temp_groups.items():
-        print(f"\nGroup {number}")
-        print_group_table(group)
-    print("")
+    print(snapshot_frame(context, snapshots, index))
+
+def snapshot_frame(context, snapshots, index, cursor=None, tables=None, max_rows=None, columns=80):
+    """Render the groups after the snapshot at index and the details of the snapshot.
+
+    A cursor and table cache kept by the viewer make a step only re-render the groups it touched.
+    If the frame would take more than max_rows rows of a terminal with the given columns, only the
+    groups touched by the snapshot and the groups next to them are shown.
+    """
+    cursor = cursor or GroupSnapshotCursor(snapshots)
+    tables = tables or GroupTableCache(context)
+    blocks = {number: f"\nGroup {number}\n{tables.table(group)}" for number, group in cursor.move_to(index).items()}
     snap = snapshots[index]
-    print(f"Snapshot {index + 1}/{len(snapshots)}")
+    details = snapshot_details(context, snapshots, index)
+    shown = sorted(blocks)
+    if max_rows is not None:
+        group_rows = max_rows - text_rows(details, columns) - 1
+        if sum(text_rows(block, columns) for block in blocks.values()) > group_rows:
+            shown = _visible_groups(blocks, snap.groups if index > 0 else [], group_rows - 1, columns)
+            details = f"Groups {', '.join(map(str, shown))} of {len(blocks)} shown (the terminal is too small for all groups)\n" + details
+    return "\n".join([blocks[number] for number in shown] + ["", details])
+
+def _visible_groups(blocks, touched, max_rows, columns):
+    """Return the numbers of the groups to show: the touched groups, then the nearest ones as long as they fit."""
+    def distance(number):
+        return min((abs(number - group) for group in touched), default=number)
+    shown = list(dict.fromkeys(touched))
+    used = sum(text_rows(blocks[number], columns) for number in shown)
+    for number in sorted(set(blocks) - set(shown), key=lambda number: (distance(number), number)):
+        rows = text_rows(blocks[number], columns)
+        if used + rows > max_rows:
+            break
+        shown.append(number)
+        used += rows
+    return sorted(shown)
+
+def snapshot_details(context, snapshots, index):
+    """Describe the snapshot at index: its action, the swapped participants and the violations."""
+    snap = snapshots[index]
+    lines = [f"Snapshot {index + 1}/{len(snapshots)}"]
     if index > 0:
-        print(f"Action: {snap.action}")
-        print(f"{snap.participants[0]} has been swapped to group {snap.groups[1] if snap.action == 'swap' else snap.groups[0]}")
-        print(f"{snap.participants[1]} has been swapped to group {snap.groups[0] if snap.action == 'swap' else snap.groups[1]}")
+        lines.append(f"Action: {snap.action}")
+        lines.append(f"{format_participant(context, snap.participants[0])} has been swapped to group {snap.groups[1] if snap.action == 'swap' else snap.groups[0]}")
+        lines.append(f"{format_participant(context, snap.participants[1])} has been swapped to group {snap.groups[0] if snap.action == 'swap' else snap.groups[1]}")
     else:
-        print("Initial group assignment (no snapshots applied)")
-    print(f"Violation score: {snap.violation_score}")
+        lines.append("Initial group assignment (no snapshots applied)")
+    lines.append(f"Violation score: {snap.violation_score}")
     for violation_name, violations in snap.violations.items():
-        print(f"{violation_name} violations: {violations}")
+        lines.append(f"{violation_name} violations: {violations}")
+    return "\n".join(lines)
+
 def prompt_snapshot_action(last_action):
     """Prompt the user for the next snapshot navigation action."""
     questions = [
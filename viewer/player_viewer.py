@@ -1,11 +1,71 @@
-from models.player import players_by_start_number
+"""Module for browsing the players page by page, filtered with the indexes of models.player_index."""
+import inquirer
 from tabulate import tabulate
 from viewer.view_config import table_format
+from models.player_index import PlayerIndex
 
-def show_players_table():
-    """Print all players in a tabular format."""
-    # Convert to list of rows
-    table_data = [[start_number, player.gender, player.qttr, player.first_name, player.last_name, player.country, player.base] for start_number, player in sorted(players_by_start_number.items())]
+PAGE_SIZE = 25
+HEADERS = ["Start Number", "Gender", "QTTR", "First Name", "Last Name", "Country", "Base", "Competitions", "Drawn into"]
+# filter name -> keyword of PlayerIndex.search
+FILTERS = {
+    "Start number": "start_number",
+    "Last name": "last_name",
+    "Country": "country",
+    "Base": "base",
+    "Gender": "gender",
+    "Competition class (e.g. S M1)": "competition",
+}
 
-    # Print table
-    print(tabulate(table_data, headers=["Start Number", "Gender", "QTTR", "First Name", "Last Name", "Country", "Base"], tablefmt=table_format))
+
+def players_page(index, start_numbers, page):
+    """Render one page of the given players as a table, with their competitions and draw placements."""
+    context = index.context
+    table_data = []
+    for start_number in start_numbers[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]:
+        player = context.players_by_start_number[start_number]
+        table_data.append([start_number, player.gender, player.qttr, player.first_name, player.last_name, player.country, player.base,
+                           ", ".join(index.competitions_of.get(start_number, ())),
+                           ", ".join(index.placements.get(start_number, ()))])
+    return tabulate(table_data, headers=HEADERS, tablefmt=table_format)
+
+
+def describe_filters(filters):
+    return ", ".join(f"{name.split(' (')[0].lower()}: {filters[keyword]}" for name, keyword in FILTERS.items() if keyword in filters) or "none"
+
+
+def show_players_table(context):
+    """Browse all players page by page, with filters by start number, last name, country, base, gender and class."""
+    index = PlayerIndex(context)
+    filters = {}
+    page = 0
+    while True:
+        # classes drawn in the background since the last page are added to the placements
+        index.refresh()
+        start_numbers = index.search(**filters)
+        pages = max(1, -(-len(start_numbers) // PAGE_SIZE))
+        page = min(page, pages - 1)
+        print(players_page(index, start_numbers, page))
+        print(f"Page {page + 1}/{pages} - {len(start_numbers)} of {len(index.start_numbers)} players - filters: {describe_filters(filters)}")
+
+        action = inquirer.list_input("Choose what to do", choices=["Next page", "Previous page", "Filter", "Clear filters", "Back"])
+        match action:
+            case "Next page":
+                page = min(page + 1, pages - 1)
+            case "Previous page":
+                page = max(page - 1, 0)
+            case "Filter":
+                name = inquirer.list_input("Filter by", choices=list(FILTERS))
+                value = inquirer.text(message=f"{name} (leave empty to remove the filter)").strip()
+                keyword = FILTERS[name]
+                if not value:
+                    filters.pop(keyword, None)
+                elif keyword == "start_number" and not value.isdigit():
+                    print("Please enter a valid start number.")
+                else:
+                    filters[keyword] = value
+                page = 0
+            case "Clear filters":
+                filters = {}
+                page = 0
+            case "Back":
+                return
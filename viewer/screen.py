@@ -0,0 +1,92 @@
+"""Terminal output of the snapshot viewers.
+
+A `Screen` remembers the lines of the frame it showed last and, on the next step, only rewrites
+the lines that changed, using ANSI cursor control instead of clearing the terminal with a
+`clear`/`cls` subprocess. Lines wider than the terminal are wrapped by the screen itself, so every
+row can be addressed. The rows below the frame are kept free for the navigation prompt; frames that
+do not fit into the rest of the terminal are redrawn completely, as rewriting rows that scrolled
+away would corrupt the display.
+"""
+import os
+import shutil
+import sys
+
+CSI = "\x1b["
+# rows of the navigation prompt of the viewers: the question, six choices and a spare row
+PROMPT_ROWS = 8
+
+
+def wrap_lines(text, columns):
+    """Split text into the rows it takes in a terminal of the given width."""
+    width = max(1, columns - 1)
+    return [line[start:start + width] for line in text.split("\n") for start in range(0, max(len(line), 1), width)]
+
+
+def text_rows(text, columns) -> int:
+    """Number of terminal rows text takes in a terminal of the given width."""
+    width = max(1, columns - 1)
+    return sum(max(1, -(-len(line) // width)) for line in text.split("\n"))
+
+
+def enable_ansi():
+    """Enable ANSI escape sequences on Windows consoles (nothing to do on other systems)."""
+    if os.name != "nt":
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # standard output
+        mode = ctypes.c_uint32()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except (AttributeError, OSError):
+        pass
+
+
+class Screen:
+    """Shows frames of text, rewriting only the lines that differ from the previous frame.
+
+    The cursor is left on the line below the frame, where prompts and messages are printed; they
+    are cleared by the next frame. reserved_rows rows are kept free for them.
+    """
+    def __init__(self, stream=None, terminal_size=None, reserved_rows=PROMPT_ROWS):
+        self.stream = stream or sys.stdout
+        self._terminal_size = terminal_size or shutil.get_terminal_size
+        self.reserved_rows = reserved_rows
+        self._lines = None  # lines of the frame on screen, None if the screen must be redrawn
+        self._size = None
+        enable_ansi()
+
+    def frame_size(self):
+        """Return (columns, rows) available for a frame that can be updated in place."""
+        columns, rows = self._terminal_size()
+        return columns, rows - self.reserved_rows - 1
+
+    def invalidate(self):
+        """Redraw the next frame completely, e.g. after other output scrolled the terminal."""
+        self._lines = None
+
+    def draw(self, text):
+        """Show a frame and return the number of lines that were written."""
+        size = tuple(self._terminal_size())
+        columns, rows = size
+        lines = wrap_lines(text, columns)
+        # rows that scrolled out of the terminal, e.g. when the prompt is shown, cannot be addressed by row number
+        fits = len(lines) + self.reserved_rows < rows
+        if self._lines is None or size != self._size or not fits:
+            output = [f"{CSI}H{CSI}2J", "\n".join(lines), "\n"]
+            written = len(lines)
+        else:
+            output = []
+            written = 0
+            for row, line in enumerate(lines):
+                if row >= len(self._lines) or self._lines[row] != line:
+                    output.append(f"{CSI}{row + 1};1H{line}{CSI}K")
+                    written += 1
+            # clear the rest of the previous frame, the prompt and messages below it
+            output.append(f"{CSI}{len(lines) + 1};1H{CSI}J")
+        self.stream.write("".join(output))
+        self.stream.flush()
+        self._lines = lines if fits else None
+        self._size = size
+        return written